@@ -102,6 +102,82 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # AI assistant answers (see apps/interactions/services.py). Entries expire
+    # after TIMEOUT seconds, and past MAX_ENTRIES the least recently used
+    # ones are evicted first.
+    'ai_answers': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ai-answers',
+        'TIMEOUT': int(os.getenv('AI_ANSWER_CACHE_TTL', '86400')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('AI_ANSWER_CACHE_MAX_ENTRIES', '10000'))},
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
\ No newline at end of file
+    # Every list endpoint is cursor-paginated; clients may ask for up to
+    # `KeysetPagination.max_page_size` rows with `?page_size=`.
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '100')),
+}
+
+# --- Webhook Outbox Delivery ---
+# Tuning for the `deliver_webhooks` worker (see apps/core/services/webhooks.py).
+WEBHOOK_DELIVERY = {
+    'TIMEOUT': float(os.getenv('WEBHOOK_TIMEOUT', '10')),
+    'MAX_ATTEMPTS': int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '8')),
+    'BACKOFF_BASE_SECONDS': int(os.getenv('WEBHOOK_BACKOFF_BASE_SECONDS', '30')),
+    'BACKOFF_MAX_SECONDS': int(os.getenv('WEBHOOK_BACKOFF_MAX_SECONDS', '3600')),
+    'LEASE_SECONDS': int(os.getenv('WEBHOOK_LEASE_SECONDS', '120')),
+    'BATCH_SIZE': int(os.getenv('WEBHOOK_BATCH_SIZE', '100')),
+    'WORKERS': int(os.getenv('WEBHOOK_WORKERS', '8')),
+    'PER_ENDPOINT_CONCURRENCY': int(os.getenv('WEBHOOK_PER_ENDPOINT_CONCURRENCY', '2')),
+    # Values above 1 send events for the same target as JSON arrays of up
+    # to this many payloads, waiting up to the window for a group to fill.
+    'COALESCE_MAX_EVENTS': int(os.getenv('WEBHOOK_COALESCE_MAX_EVENTS', '1')),
+    'COALESCE_WINDOW_SECONDS': float(os.getenv('WEBHOOK_COALESCE_WINDOW_SECONDS', '5')),
+}
+
+# --- AI Assistant ---
+# The chat completion endpoint and the pooled async client used by the
+# streamed assistant endpoint (see apps/interactions/services.py).
+AI_ASSISTANT = {
+    'API_URL': os.getenv('OPENROUTER_API_URL', 'https://openrouter.ai/api/v1/chat/completions'),
+    'MODEL': os.getenv('AI_ASSISTANT_MODEL', 'mistralai/mistral-7b-instruct'),
+    'CONNECT_TIMEOUT': float(os.getenv('AI_ASSISTANT_CONNECT_TIMEOUT', '5')),
+    # Longest pause tolerated between two chunks of a streamed answer.
+    'READ_TIMEOUT': float(os.getenv('AI_ASSISTANT_READ_TIMEOUT', '30')),
+    'MAX_CONNECTIONS': int(os.getenv('AI_ASSISTANT_MAX_CONNECTIONS', '100')),
+    'MAX_KEEPALIVE_CONNECTIONS': int(os.getenv('AI_ASSISTANT_MAX_KEEPALIVE_CONNECTIONS', '20')),
+    # Guard around upstream calls, per process (apps/interactions/resilience.py).
+    'MAX_IN_FLIGHT': int(os.getenv('AI_ASSISTANT_MAX_IN_FLIGHT', '32')),
+    'MAX_IN_FLIGHT_PER_COURSE': int(os.getenv('AI_ASSISTANT_MAX_IN_FLIGHT_PER_COURSE', '8')),
+    # How long a question may wait for a free upstream slot.
+    'QUEUE_TIMEOUT': float(os.getenv('AI_ASSISTANT_QUEUE_TIMEOUT', '5')),
+    # How long an identical question waits for the in-flight answer it joined.
+    'COALESCE_WAIT_SECONDS': float(os.getenv('AI_ASSISTANT_COALESCE_WAIT_SECONDS', '30')),
+    'BREAKER_FAILURE_THRESHOLD': int(os.getenv('AI_ASSISTANT_BREAKER_FAILURE_THRESHOLD', '5')),
+    'BREAKER_RESET_SECONDS': float(os.getenv('AI_ASSISTANT_BREAKER_RESET_SECONDS', '30')),
+    # Lesson passages put in the prompt (apps/learning/retrieval.py).
+    'RETRIEVAL_TOP_K': int(os.getenv('AI_ASSISTANT_RETRIEVAL_TOP_K', '5')),
+    'RETRIEVAL_TOKEN_BUDGET': int(os.getenv('AI_ASSISTANT_RETRIEVAL_TOKEN_BUDGET', '1500')),
+}
+
+# --- Background Report Jobs ---
+# Tuning for the `run_report_jobs` worker (see apps/reports/services/jobs.py).
+REPORT_JOBS = {
+    'WORKERS': int(os.getenv('REPORT_JOB_WORKERS', '4')),
+    # Jobs claimed per round, never more than WORKERS.
+    'BATCH_SIZE': int(os.getenv('REPORT_JOB_BATCH_SIZE', '8')),
+    'MAX_ATTEMPTS': int(os.getenv('REPORT_JOB_MAX_ATTEMPTS', '3')),
+    'LEASE_SECONDS': int(os.getenv('REPORT_JOB_LEASE_SECONDS', '900')),
+    # Identical requests reuse a finished report for this long.
+    'REUSE_SECONDS': int(os.getenv('REPORT_JOB_REUSE_SECONDS', '600')),
+    'RETENTION_SECONDS': int(os.getenv('REPORT_JOB_RETENTION_SECONDS', '86400')),
+    # WeasyPrint processes per bulk PDF job; 0 divides the CPUs between the WORKERS.
+    'PDF_PROCESSES': int(os.getenv('REPORT_PDF_PROCESSES', '0')),
+}
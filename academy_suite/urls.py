@@ -18,7 +18,7 @@ urlpatterns = [
     path('api/v1/learning/', include('apps.learning.api.urls', namespace='learning-api')),
     path('api/v1/enrollment/', include('apps.enrollment.api.urls', namespace='enrollment-api')),
     path('api/v1/interactions/', include('apps.interactions.api.urls', namespace='interactions_api')),
-    path('api/v1/reports/', include('apps.reports.api.urls')), # No namespace needed for empty urls
+    path('api/v1/reports/', include('apps.reports.api.urls', namespace='reports-api')),
 
     # Frontend Routes
     path('users/', include('apps.users.urls')),
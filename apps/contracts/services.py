@@ -0,0 +1,126 @@
+# =================================================================
+# apps/contracts/services.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Per-employee progress for a contract is computed with
+# one grouped query (average progress, course and completion counts,
+# last activity) instead of one aggregate per employee, so the client
+# dashboard can sort and paginate the table in the database. The
+# Excel export reuses the same query, streamed with `.iterator()`.
+# =================================================================
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from apps.enrollment.models import Enrollment
+from apps.learning.models import Course
+from apps.reports.services.exporters import EXPORT_CHUNK_SIZE
+
+EMPLOYEE_PAGE_SIZE = 25
+
+# Public sort keys accepted by the employee table, mapped to the
+# annotated columns they order by.
+EMPLOYEE_SORT_FIELDS = {
+    'name': 'display_name',
+    'email': 'email',
+    'progress': 'average_progress',
+    'completed': 'completed_courses',
+    'last_activity': 'last_activity',
+}
+DEFAULT_EMPLOYEE_SORT = 'name'
+
+
+def employee_progress(contract):
+    """
+    Returns one row per employee covered by `contract`, with their
+    enrollments aggregated in a single GROUP BY query.
+
+    Each row is a dict with `pk`, `display_name`, `email`, `date_joined`,
+    `average_progress`, `course_count`, `completed_courses` and
+    `last_activity` keys.
+    """
+    return contract.enrolled_students.annotate(
+        display_name=Coalesce(NullIf('full_name', Value('')), 'username'),
+        average_progress=Coalesce(Avg('enrollment__progress'), 0.0),
+        course_count=Count('enrollment'),
+        completed_courses=Count('enrollment', filter=Q(enrollment__status='completed')),
+        last_activity=Max('enrollment__last_activity_at'),
+    ).values(
+        'pk', 'display_name', 'email', 'date_joined',
+        'average_progress', 'course_count', 'completed_courses', 'last_activity',
+    )
+
+
+def sort_employee_progress(rows, sort):
+    """
+    Orders `employee_progress()` rows by a public sort key such as
+    'progress' or '-last_activity'. Unknown keys fall back to the default.
+
+    Returns:
+        A tuple of (ordered rows, the sort key actually applied).
+    """
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    if key not in EMPLOYEE_SORT_FIELDS:
+        key, descending = DEFAULT_EMPLOYEE_SORT, False
+
+    column = F(EMPLOYEE_SORT_FIELDS[key])
+    ordering = column.desc(nulls_last=True) if descending else column.asc(nulls_last=True)
+    return rows.order_by(ordering, 'pk'), f"-{key}" if descending else key
+
+
+def contract_summary(contract):
+    """ Returns the contract's employee count and overall average progress in one query. """
+    summary = contract.enrolled_students.aggregate(
+        total_employees=Count('pk', distinct=True),
+        average_progress=Avg('enrollment__progress'),
+    )
+    summary['average_progress'] = summary['average_progress'] or 0
+    return summary
+
+
+def _spreadsheet_datetime(value):
+    """ Excel has no time zones: export aware datetimes as naive local time. """
+    if value is None:
+        return None
+    return timezone.localtime(value).replace(tzinfo=None)
+
+
+def employee_export_rows(contract):
+    """
+    Yields one export row per employee, in name order, streaming the
+    grouped `employee_progress()` query in chunks.
+    """
+    rows = employee_progress(contract).order_by('display_name', 'pk')
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        progress = round(row['average_progress'], 2)
+        yield (
+            row['display_name'],
+            row['email'],
+            _spreadsheet_datetime(row['date_joined']),
+            progress,
+            'Completed' if progress >= 100 else 'In Progress',
+            row['completed_courses'],
+            row['course_count'],
+            _spreadsheet_datetime(row['last_activity']),
+        )
+
+
+def course_breakdown_rows(contract):
+    """
+    Yields one row per course the contract's employees are enrolled in:
+    title, enrolled employees, completions and average progress.
+    """
+    rows = Enrollment.objects.filter(
+        content_type=ContentType.objects.get_for_model(Course),
+        student__contracts_as_student=contract,
+    ).values('object_id').annotate(
+        course_title=Subquery(Course.objects.filter(pk=OuterRef('object_id')).values('title')[:1]),
+        enrolled=Count('pk'),
+        completed=Count('pk', filter=Q(status='completed')),
+        average_progress=Avg('progress'),
+    ).order_by('course_title', 'object_id')
+
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (row['course_title'], row['enrolled'], row['completed'], round(row['average_progress'] or 0, 2))
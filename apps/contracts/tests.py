@@ -3,12 +3,24 @@
 # -----------------------------------------------------------------
 # MIGRATION: Tests are updated to use standard ORM creation methods
 # for the new relational models.
+# PERFORMANCE: Also checks that the client dashboard and the Excel
+# export aggregate employees in a fixed number of queries.
 # =================================================================
-from django.test import TestCase
+from io import BytesIO
+from unittest import mock
+
+import openpyxl
+
+from django.contrib.contenttypes.models import ContentType
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
 from django.utils import timezone
 from apps.users.models import CustomUser
 from apps.contracts.models import Contract
-from apps.learning.models import LearningPath
+from apps.contracts.views import ExportContractReportView
+from apps.core.views.dashboards import DashboardView
+from apps.enrollment.models import Enrollment
+from apps.learning.models import Course, LearningPath
 
 class ContractModelTest(TestCase):
     @classmethod
@@ -49,4 +61,70 @@ class ContractModelTest(TestCase):
             start_date=timezone.now(),
             end_date=timezone.now() + timezone.timedelta(days=30)
         )
-        self.assertEqual(str(contract), "Test String Representation")
\ No newline at end of file
+        self.assertEqual(str(contract), "Test String Representation")
+
+
+class ClientDashboardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = CustomUser.objects.create_user(username='bigcorp', role=CustomUser.Roles.THIRD_PARTY)
+        cls.contract = Contract.objects.create(
+            title="Company Wide", client=cls.client_user,
+            start_date=timezone.now(), end_date=timezone.now() + timezone.timedelta(days=30)
+        )
+        course_content_type = ContentType.objects.get_for_model(Course)
+        courses = [
+            Course.objects.create(title=f"Course {n}", slug=f'corp-course-{n}', description="", category="Web")
+            for n in range(2)
+        ]
+        cls.employees = []
+        for n in range(30):
+            employee = CustomUser.objects.create_user(username=f'employee{n:02d}', email=f'e{n}@corp.test')
+            cls.employees.append(employee)
+            for course, progress in zip(courses, (n, 100 if n % 3 == 0 else 0)):
+                Enrollment.objects.create(
+                    student=employee, content_type=course_content_type, object_id=course.pk,
+                    progress=progress, status='completed' if progress == 100 else 'in_progress'
+                )
+        cls.contract.enrolled_students.add(*cls.employees)
+
+    def render_dashboard(self, **params):
+        request = RequestFactory().get('/dashboard/', params)
+        request.user = self.client_user
+        with mock.patch('apps.core.views.dashboards.render', return_value=HttpResponse()) as render:
+            DashboardView.as_view()(request)
+        return render.call_args.args[2]
+
+    def test_employee_table_is_aggregated_in_fixed_queries(self):
+        # contract, summary, page count, page rows
+        with self.assertNumQueries(4):
+            context = self.render_dashboard()
+            rows = list(context['employee_data'])
+        self.assertEqual(context['total_employees'], 30)
+        self.assertEqual(len(rows), 25)
+        first = rows[0]
+        self.assertEqual((first['display_name'], first['average_progress'], first['completed_courses']), ('employee00', 50.0, 1))
+
+    def test_employee_table_is_sorted_and_paginated(self):
+        context = self.render_dashboard(sort='-progress', page=2)
+        self.assertEqual(context['employee_sort'], '-progress')
+        self.assertEqual([row['display_name'] for row in context['employee_data']], [
+            'employee07', 'employee05', 'employee04', 'employee02', 'employee01'
+        ])
+
+        context = self.render_dashboard(sort='password')
+        self.assertEqual(context['employee_sort'], 'name')
+
+    def test_export_streams_grouped_rows(self):
+        request = RequestFactory().get('/export/')
+        request.user = self.client_user
+        # contract, employee rows, course breakdown rows
+        with self.assertNumQueries(3):
+            response = ExportContractReportView.as_view()(request, pk=str(self.contract.pk))
+
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        employees = list(workbook["Employees"].values)
+        self.assertEqual(len(employees), 31)
+        self.assertEqual(employees[1][:7], ('employee00', 'e0@corp.test', employees[1][2], 50.0, 'In Progress', 1, 2))
+        courses = list(workbook["By Course"].values)
+        self.assertEqual(courses[1:], [("Course 0", 30, 0, 14.5), ("Course 1", 30, 10, 33.33)])
@@ -4,52 +4,41 @@
 # MIGRATION: Queries are updated to be more explicit with the
 # relational structure, ensuring data for the report is fetched
 # efficiently from the new PostgreSQL schema.
+# PERFORMANCE: The export streams grouped queries into a write-only
+# workbook instead of aggregating each student separately.
 # =================================================================
 
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
-from django.contrib.contenttypes.models import ContentType
 
 from .models import Contract
-from apps.enrollment.models import Enrollment
+from .services import course_breakdown_rows, employee_export_rows
 from apps.reports.services.excel_generator import ExcelReportGenerator
+from apps.reports.services.exporters import EXPORTERS
 from apps.users.models import CustomUser
-from apps.learning.models import Course, LearningPath
 
 class ExportContractReportView(LoginRequiredMixin, UserPassesTestMixin, View):
     """
-    Handles the request to export a contract's employee progress report as an Excel file.
+    Handles the request to export a contract's employee progress report as an
+    Excel file, or as CSV with `?format=csv`.
     """
     def test_func(self):
-        contract = get_object_or_404(Contract, pk=self.kwargs['pk'])
+        self.contract = get_object_or_404(Contract, pk=self.kwargs['pk'])
         user = self.request.user
-        return user.role == CustomUser.Roles.ADMIN or user == contract.client
+        return user.role == CustomUser.Roles.ADMIN or user.pk == self.contract.client_id
 
     def get(self, request, *args, **kwargs):
-        contract = get_object_or_404(Contract, pk=self.kwargs['pk'])
-
-        # --- Data Gathering Logic (Live Relational Data) ---
-        enrolled_students = contract.enrolled_students.all()
-        student_ids = enrolled_students.values_list('id', flat=True)
-
-        # Get all enrollments for these students
-        all_enrollments = Enrollment.objects.filter(student_id__in=student_ids)
-
-        report_data = []
-        for student in enrolled_students:
-            # Calculate average progress for this student
-            avg_progress = all_enrollments.filter(student=student).aggregate(Avg('progress'))['progress__avg'] or 0
-
-            report_data.append({
-                'student_name': student.full_name or student.username,
-                'student_email': student.email,
-                'enrollment_date': student.date_joined.strftime("%Y-%m-%d"), # Approximation
-                'progress': f"{avg_progress:.2f}",
-                'status': 'Completed' if avg_progress >= 100 else 'In Progress',
-            })
+        contract = self.contract
+        export_format = request.GET.get('format', 'xlsx')
+        if export_format not in EXPORTERS:
+            return HttpResponseBadRequest(f"Unsupported export format: {export_format}")
 
+        # One grouped query per sheet, streamed row by row into the exporter;
+        # nothing is collected in memory.
         report_title = f"Contract_{contract.title.replace(' ', '_')}"
         generator = ExcelReportGenerator()
-        return generator.generate_course_enrollment_excel(report_title, report_data)
\ No newline at end of file
+        return generator.generate_contract_progress_excel(
+            report_title, employee_export_rows(contract), course_breakdown_rows(contract), export_format
+        )
@@ -0,0 +1,25 @@
+# =================================================================
+# apps/core/admin.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Exposes the webhook outbox so operators can inspect
+# failed deliveries and requeue them.
+# =================================================================
+
+from django.contrib import admin
+from django.utils import timezone
+from .models import WebhookEvent
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_type', 'target_url', 'status', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status', 'event_type')
+    search_fields = ('target_url', 'last_error')
+    readonly_fields = ('created_at', 'delivered_at')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected events for immediate delivery")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=WebhookEvent.Status.DELIVERED).update(
+            status=WebhookEvent.Status.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} event(s) requeued.")
@@ -0,0 +1,56 @@
+# =================================================================
+# apps/core/management/commands/deliver_webhooks.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Long-running worker that drains the webhook outbox.
+# Events go out through the pooled `WebhookDispatcher`, whose
+# per-target throughput and latency are reported every
+# `--stats-interval` seconds.
+# Run it as its own process (see infra/docker-compose.yml); several
+# workers can run side by side since events are claimed with
+# SELECT ... FOR UPDATE SKIP LOCKED.
+# =================================================================
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.core.services.webhooks import WebhookDeliveryWorker
+
+
+class Command(BaseCommand):
+    help = "Delivers queued n8n webhooks with retries, backoff and per-endpoint concurrency limits."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Deliver one batch and exit.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--stats-interval', type=float, default=60.0, help="Seconds between per-target stats reports.")
+
+    def handle(self, *args, **options):
+        worker = WebhookDeliveryWorker()
+        last_report = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                counts = worker.run_once()
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"Delivered {counts['delivered']}, retrying {counts['retrying']}, failed {counts['failed']}."
+                    )
+                if options['once'] or time.monotonic() - last_report >= options['stats_interval']:
+                    self.report_stats(worker.dispatcher.stats())
+                    last_report = time.monotonic()
+                if options['once']:
+                    break
+                if not any(counts.values()):
+                    time.sleep(options['interval'])
+        finally:
+            worker.dispatcher.close()
+
+    def report_stats(self, stats):
+        for endpoint, target in stats.items():
+            self.stdout.write(
+                f"{endpoint}: {target['events']} event(s) in {target['requests']} request(s), "
+                f"{target['errors']} error(s), {target['events_per_second']} events/s, "
+                f"p50 {target['latency_p50_ms']} ms, p95 {target['latency_p95_ms']} ms, max {target['latency_max_ms']} ms"
+            )
@@ -0,0 +1,38 @@
+# =================================================================
+# apps/core/models.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Transactional outbox for outgoing n8n webhooks. Events
+# are written in the same transaction as the record that caused them
+# and delivered later by the `deliver_webhooks` worker, so request
+# latency no longer depends on the webhook target being reachable.
+# =================================================================
+
+from django.db import models
+from django.utils import timezone
+
+class WebhookEvent(models.Model):
+    """ A webhook waiting to be (or already) delivered to an external endpoint. """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        DELIVERED = 'delivered', 'Delivered'
+        FAILED = 'failed', 'Failed'
+
+    event_type = models.CharField(max_length=100, help_text="e.g. 'enrollment.created'.")
+    target_url = models.URLField(max_length=500)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            # The worker's claim query: due pending events, oldest first.
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} -> {self.target_url} ({self.status})"
@@ -0,0 +1,197 @@
+# =================================================================
+# apps/core/pagination.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Keyset ("cursor") pagination. A page is the rows that
+# sort after the last row of the previous page, fetched with a
+# `WHERE (a, b) > (x, y)`-style filter on an indexed ordering, so
+# every page costs an index range scan however deep the client
+# goes, unlike OFFSET, and rows inserted meanwhile do not shift
+# later pages. The cursor is the last row's ordering values as
+# base64-encoded JSON, opaque to clients. Decoding coerces each value
+# with its ordering field's `to_python()`, so a tampered cursor is
+# rejected as invalid rather than reaching the query.
+#
+# `KeysetPagination` is the project-wide DRF pagination class: list
+# endpoints return `{"next": <url>, "results": [...]}` pages of
+# `page_size` rows (capped at `max_page_size`), walking each view's
+# `keyset_ordering`, so API clients can sync whole tables at steady
+# memory use.
+# =================================================================
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    """ The cursor was not produced by `encode_cursor` for this ordering. """
+
+
+def _json_default(value):
+    # Full precision: a truncated timestamp would skip or repeat rows.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, fields) -> list:
+    """
+    Decodes `cursor` into one value per model field in `fields`, each
+    converted and validated by that field.
+
+    Raises:
+        InvalidCursor: If `cursor` is malformed, does not hold one value
+            per field, or holds a value its field rejects.
+    """
+    fields = list(fields)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor(cursor)
+
+    decoded = []
+    for field, value in zip(fields, values):
+        # The ordering fields are non-null, and `encode_cursor` only ever
+        # writes scalars.
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise InvalidCursor(cursor)
+        try:
+            value = field.to_python(value)
+            field.run_validators(value)
+        except (TypeError, ValueError, ValidationError) as exc:
+            raise InvalidCursor(cursor) from exc
+        decoded.append(value)
+    return decoded
+
+
+def _ordering_fields(model, ordering):
+    """ The model fields behind `ordering`, in order. """
+    opts = model._meta
+    return [
+        opts.pk if name == 'pk' else opts.get_field(name)
+        for name in (field.lstrip('-') for field in ordering)
+    ]
+
+
+def _after(ordering, values):
+    """ A filter for the rows that sort strictly after `values` under `ordering`. """
+    condition = Q()
+    for position in reversed(range(len(ordering))):
+        field = ordering[position].lstrip('-')
+        lookup = 'lt' if ordering[position].startswith('-') else 'gt'
+        step = Q(**{f'{field}__{lookup}': values[position]})
+        if position < len(ordering) - 1:
+            step |= Q(**{field: values[position]}) & condition
+        condition = step
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=20):
+    """
+    Returns one page of `queryset` in `ordering`.
+
+    Args:
+        queryset: The rows to page through.
+        ordering: Field names, '-' prefixed for descending. The last one
+            must be unique (usually 'pk') so that every row has a distinct
+            position.
+        cursor: The `next_cursor` of the previous page, or None for the first.
+        page_size: The number of rows per page.
+
+    Returns:
+        A dict with `results` (a list) and `next_cursor` (None on the last page).
+
+    Raises:
+        InvalidCursor: If `cursor` is malformed.
+    """
+    ordering = tuple(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, _ordering_fields(queryset.model, ordering))
+        queryset = queryset.filter(_after(ordering, values))
+
+    # One extra row tells whether another page follows.
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor(getattr(last, field.lstrip('-')) for field in ordering)
+    return {'results': rows[:page_size], 'next_cursor': next_cursor}
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination over `view.keyset_ordering` (default
+    newest first by primary key). Clients follow `next` until it is null
+    and may ask for `?page_size=` up to `max_page_size` rows.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-pk',)
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or self.max_page_size
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return min(max(requested, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        try:
+            page = keyset_page(
+                queryset, ordering, request.query_params.get(self.cursor_query_param), self.get_page_size(request)
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor.")
+        self.next_cursor = page['next_cursor']
+        return page['results']
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': "The `next` cursor of the previous page.", 'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f"Rows per page (at most {self.max_page_size}).", 'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,36 @@
+# =================================================================
+# apps/core/serializers.py
+# -----------------------------------------------------------------
+# PERFORMANCE: `?fields=` sparse fieldsets for the API. Clients that
+# need only a few columns (e.g. syncing ids and statuses) ask for
+# them, and the other fields are neither computed nor sent.
+# =================================================================
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsetMixin:
+    """
+    Limits a serializer's output to the comma-separated `?fields=` of the
+    request, e.g. `?fields=id,status`. Applies to read requests and to the
+    top-level serializer only; nested serializers keep their fields.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        requested = request.query_params.get(self.fields_query_param)
+        if not requested:
+            return
+        wanted = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = wanted - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {self.fields_query_param: f"Unknown field(s): {', '.join(sorted(unknown))}."}
+            )
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
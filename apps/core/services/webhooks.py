@@ -0,0 +1,302 @@
+# =================================================================
+# apps/core/services/webhooks.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Outbox-based webhook delivery.
+# - `enqueue_webhook` is called from post_save receivers and only
+#   inserts a `WebhookEvent` row inside the caller's transaction.
+# - `WebhookDispatcher` owns one pooled HTTP session per target,
+#   enforces the per-target concurrency limit, optionally coalesces
+#   events into array payloads, and keeps per-target throughput and
+#   latency stats.
+# - `WebhookDeliveryWorker` claims due events with SKIP LOCKED,
+#   sends them through the dispatcher from a thread pool, and
+#   reschedules failures with exponential backoff until
+#   `MAX_ATTEMPTS` is reached.
+# =================================================================
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.models import WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_webhook(event_type: str, url_env_var: str, payload: dict):
+    """
+    Queues a webhook for background delivery.
+
+    Args:
+        event_type: A short name for the event, e.g. 'enrollment.created'.
+        url_env_var: The environment variable holding the target URL.
+        payload: The JSON body to deliver.
+
+    Returns:
+        The created WebhookEvent, or None if the target URL is not configured.
+    """
+    webhook_url = os.getenv(url_env_var)
+    if not webhook_url:
+        logger.warning(f"{url_env_var} is not set. Skipping webhook.")
+        return None
+    return WebhookEvent.objects.create(event_type=event_type, target_url=webhook_url, payload=payload)
+
+
+def backoff_delay(attempts: int, base: int, maximum: int) -> timedelta:
+    """ Exponential backoff with up to 10% jitter, capped at `maximum` seconds. """
+    delay = min(base * (2 ** max(attempts - 1, 0)), maximum)
+    return timedelta(seconds=delay + random.uniform(0, delay * 0.1))
+
+
+def _percentile_ms(sorted_seconds, q):
+    if not sorted_seconds:
+        return None
+    index = min(int(q * len(sorted_seconds)), len(sorted_seconds) - 1)
+    return round(sorted_seconds[index] * 1000, 1)
+
+
+class WebhookDispatcher:
+    """
+    Sends webhook payloads over one pooled, keep-alive HTTP session per
+    target endpoint, so a burst of events (e.g. a bulk-enrolled contract
+    cohort) reuses a handful of TCP/TLS connections.
+
+    With `coalesce_max_events` > 1, events for the same target and event
+    type are sent together as a JSON array of up to that many payloads.
+    A partial group is held back until its oldest event is
+    `coalesce_window` seconds old, giving later events a chance to join.
+    """
+    LATENCY_SAMPLES = 500
+
+    def __init__(self, timeout=10, pool_size=2, coalesce_max_events=1, coalesce_window=0):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.coalesce_max_events = max(coalesce_max_events, 1)
+        self.coalesce_window = timedelta(seconds=coalesce_window)
+        self._sessions = {}
+        self._slots = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    @property
+    def coalescing(self) -> bool:
+        return self.coalesce_max_events > 1
+
+    def _endpoint(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _target(self, url: str):
+        """ Returns the (session, concurrency slot, stats) of the endpoint serving `url`. """
+        endpoint = self._endpoint(url)
+        with self._lock:
+            if endpoint not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount(endpoint, adapter)
+                self._sessions[endpoint] = session
+                self._slots[endpoint] = threading.BoundedSemaphore(self.pool_size)
+                self._stats[endpoint] = {
+                    'requests': 0, 'events': 0, 'errors': 0,
+                    'latencies': deque(maxlen=self.LATENCY_SAMPLES),
+                }
+            return self._sessions[endpoint], self._slots[endpoint], self._stats[endpoint]
+
+    def group(self, events, now=None):
+        """
+        Splits claimed events into delivery groups.
+
+        Returns:
+            A tuple of (ready, held): lists of event lists. `held` groups are
+            partial coalescing groups whose window has not yet elapsed.
+        """
+        if not self.coalescing:
+            return [[event] for event in events], []
+
+        now = now or timezone.now()
+        ready, held = [], []
+        keyed = sorted(events, key=lambda event: (event.target_url, event.event_type, event.created_at))
+        for _, same_target in groupby(keyed, key=lambda event: (event.target_url, event.event_type)):
+            same_target = list(same_target)
+            for i in range(0, len(same_target), self.coalesce_max_events):
+                chunk = same_target[i:i + self.coalesce_max_events]
+                if len(chunk) < self.coalesce_max_events and now - chunk[0].created_at < self.coalesce_window:
+                    held.append(chunk)
+                else:
+                    ready.append(chunk)
+        return ready, held
+
+    def send(self, events) -> str:
+        """
+        Posts one delivery group. Returns an error message, or '' on success.
+        """
+        url = events[0].target_url
+        body = [event.payload for event in events] if self.coalescing else events[0].payload
+        session, slot, stats = self._target(url)
+
+        with slot:
+            started = time.monotonic()
+            try:
+                response = session.post(url, json=body, timeout=self.timeout)
+                response.raise_for_status()
+                error = ''
+            except requests.exceptions.RequestException as e:
+                error = str(e) or e.__class__.__name__
+            elapsed = time.monotonic() - started
+
+        with self._lock:
+            stats['requests'] += 1
+            stats['latencies'].append(elapsed)
+            if error:
+                stats['errors'] += 1
+            else:
+                stats['events'] += len(events)
+        return error
+
+    def stats(self) -> dict:
+        """
+        Returns per-endpoint delivery stats: request, event and error counts,
+        delivered events per second since start, and latency percentiles (ms)
+        over the most recent requests.
+        """
+        uptime = max(time.monotonic() - self._started, 1e-9)
+        snapshot = {}
+        with self._lock:
+            for endpoint, stats in self._stats.items():
+                latencies = sorted(stats['latencies'])
+                snapshot[endpoint] = {
+                    'requests': stats['requests'],
+                    'events': stats['events'],
+                    'errors': stats['errors'],
+                    'events_per_second': round(stats['events'] / uptime, 2),
+                    'latency_p50_ms': _percentile_ms(latencies, 0.5),
+                    'latency_p95_ms': _percentile_ms(latencies, 0.95),
+                    'latency_max_ms': _percentile_ms(latencies, 1.0),
+                }
+        return snapshot
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class WebhookDeliveryWorker:
+    """
+    Delivers due outbox events. One `run_once` call claims a batch,
+    delivers it concurrently through a `WebhookDispatcher` and records
+    the outcome of every event.
+    """
+    def __init__(self, dispatcher=None, **overrides):
+        config = {**settings.WEBHOOK_DELIVERY, **overrides}
+        self.max_attempts = config['MAX_ATTEMPTS']
+        self.backoff_base = config['BACKOFF_BASE_SECONDS']
+        self.backoff_max = config['BACKOFF_MAX_SECONDS']
+        self.lease = timedelta(seconds=config['LEASE_SECONDS'])
+        self.batch_size = config['BATCH_SIZE']
+        self.workers = config['WORKERS']
+        self.dispatcher = dispatcher or WebhookDispatcher(
+            timeout=config['TIMEOUT'],
+            pool_size=config['PER_ENDPOINT_CONCURRENCY'],
+            coalesce_max_events=config['COALESCE_MAX_EVENTS'],
+            coalesce_window=config['COALESCE_WINDOW_SECONDS'],
+        )
+
+    def claim(self) -> list:
+        """
+        Leases a batch of due events. A leased event is pushed `LEASE_SECONDS`
+        into the future, so it is picked up again if this worker dies.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            events = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status=WebhookEvent.Status.PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at')[:self.batch_size]
+            )
+            if events:
+                WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                    attempts=F('attempts') + 1, next_attempt_at=now + self.lease
+                )
+        for event in events:
+            event.attempts += 1
+        return events
+
+    def release(self, groups):
+        """
+        Hands back the events of coalescing groups that are still filling up,
+        without counting the claim as an attempt. They become due again once
+        the group's window has elapsed.
+        """
+        held = []
+        for group in groups:
+            due_at = group[0].created_at + self.dispatcher.coalesce_window
+            for event in group:
+                event.attempts -= 1
+                event.next_attempt_at = due_at
+                held.append(event)
+        WebhookEvent.objects.bulk_update(held, ['attempts', 'next_attempt_at'])
+
+    def run_once(self) -> dict:
+        """
+        Claims and delivers one batch.
+
+        Returns:
+            A dict with the number of events 'delivered', 'retrying' and 'failed'.
+        """
+        events = self.claim()
+        counts = {'delivered': 0, 'retrying': 0, 'failed': 0}
+        if not events:
+            return counts
+
+        ready, held = self.dispatcher.group(events)
+        if held:
+            self.release(held)
+        if not ready:
+            return counts
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(ready))) as pool:
+            errors = list(pool.map(self.dispatcher.send, ready))
+
+        now = timezone.now()
+        delivered, unsuccessful = [], []
+        for group, error in zip(ready, errors):
+            for event in group:
+                if not error:
+                    delivered.append(event.pk)
+                    continue
+                event.last_error = error[:2000]
+                if event.attempts >= self.max_attempts:
+                    event.status = WebhookEvent.Status.FAILED
+                    counts['failed'] += 1
+                    logger.error(f"Giving up on webhook {event.pk} ({event.event_type}) after {event.attempts} attempts: {error}")
+                else:
+                    event.next_attempt_at = now + backoff_delay(event.attempts, self.backoff_base, self.backoff_max)
+                    counts['retrying'] += 1
+                    logger.warning(f"Webhook {event.pk} ({event.event_type}) failed, retrying at {event.next_attempt_at}: {error}")
+                unsuccessful.append(event)
+
+        if delivered:
+            WebhookEvent.objects.filter(pk__in=delivered).update(
+                status=WebhookEvent.Status.DELIVERED, delivered_at=now, last_error=''
+            )
+            counts['delivered'] = len(delivered)
+        if unsuccessful:
+            WebhookEvent.objects.bulk_update(unsuccessful, ['status', 'last_error', 'next_attempt_at'])
+        return counts
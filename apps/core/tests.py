@@ -0,0 +1,156 @@
+# =================================================================
+# apps/core/tests.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Exercises the webhook outbox against a local stub
+# receiver instead of a real n8n instance.
+# =================================================================
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.models import WebhookEvent
+from apps.core.services.webhooks import WebhookDeliveryWorker, WebhookDispatcher
+from apps.enrollment.models import Enrollment
+from apps.learning.models import Course
+from apps.users.models import CustomUser
+
+class StubReceiver:
+    """ A local HTTP endpoint that records JSON bodies and answers with `status`. """
+    def __init__(self, status=200):
+        self.status = status
+        self.bodies = []
+        self.client_ports = set()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is observable
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                receiver.bodies.append(json.loads(self.rfile.read(length)))
+                receiver.client_ports.add(self.client_address[1])
+                self.send_response(receiver.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class WebhookOutboxTest(TestCase):
+    def setUp(self):
+        self.receiver = StubReceiver()
+        self.student = CustomUser.objects.create_user(username='hooked')
+        self.course = Course.objects.create(title="Hooks", slug='hooks', description="", category="Ops")
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def enroll(self):
+        with mock.patch.dict(os.environ, {'N8N_ENROLLMENT_CREATED_WEBHOOK_URL': self.receiver.url}):
+            return Enrollment.objects.create(
+                student=self.student,
+                content_type=ContentType.objects.get_for_model(Course),
+                object_id=self.course.pk
+            )
+
+    def test_enrollment_queues_instead_of_posting(self):
+        enrollment = self.enroll()
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.event_type, 'enrollment.created')
+        self.assertEqual(event.payload['enrollment_id'], str(enrollment.pk))
+        self.assertEqual(self.receiver.bodies, [])
+
+    def test_worker_delivers_pending_events(self):
+        self.enroll()
+        counts = WebhookDeliveryWorker().run_once()
+
+        self.assertEqual(counts['delivered'], 1)
+        self.assertEqual(self.receiver.bodies[0]['enrollable_type'], 'course')
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEvent.Status.DELIVERED)
+        self.assertEqual(event.attempts, 1)
+
+    def test_failures_back_off_then_give_up(self):
+        self.receiver.status = 503
+        self.enroll()
+        worker = WebhookDeliveryWorker(MAX_ATTEMPTS=2, BACKOFF_BASE_SECONDS=60)
+
+        self.assertEqual(worker.run_once()['retrying'], 1)
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEvent.Status.PENDING)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+        self.assertIn('503', event.last_error)
+
+        # Not due yet: nothing is claimed.
+        self.assertEqual(worker.run_once(), {'delivered': 0, 'retrying': 0, 'failed': 0})
+
+        WebhookEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(worker.run_once()['failed'], 1)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.Status.FAILED)
+
+    def test_rolled_back_enrollment_leaves_no_event(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.enroll()
+            raise RuntimeError
+        self.assertFalse(WebhookEvent.objects.exists())
+
+class WebhookDispatcherTest(TestCase):
+    def setUp(self):
+        self.receiver = StubReceiver()
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def queue(self, count, event_type='enrollment.created'):
+        WebhookEvent.objects.bulk_create(
+            WebhookEvent(event_type=event_type, target_url=self.receiver.url, payload={'n': n})
+            for n in range(count)
+        )
+
+    def test_connections_are_pooled_per_target(self):
+        self.queue(6)
+        dispatcher = WebhookDispatcher(pool_size=1)
+        WebhookDeliveryWorker(dispatcher=dispatcher).run_once()
+        dispatcher.close()
+
+        self.assertEqual(len(self.receiver.bodies), 6)
+        self.assertEqual(len(self.receiver.client_ports), 1)
+        stats = dispatcher.stats()[f"http://127.0.0.1:{self.receiver.server.server_port}"]
+        self.assertEqual((stats['requests'], stats['events'], stats['errors']), (6, 6, 0))
+        self.assertIsNotNone(stats['latency_p95_ms'])
+
+    def test_events_are_coalesced_into_arrays(self):
+        self.queue(5)
+        dispatcher = WebhookDispatcher(coalesce_max_events=2)
+        counts = WebhookDeliveryWorker(dispatcher=dispatcher).run_once()
+        dispatcher.close()
+
+        self.assertEqual(counts['delivered'], 5)
+        self.assertEqual(sorted(len(body) for body in self.receiver.bodies), [1, 2, 2])
+        self.assertFalse(WebhookEvent.objects.exclude(status=WebhookEvent.Status.DELIVERED).exists())
+
+    def test_partial_groups_wait_for_the_window(self):
+        self.queue(3)
+        dispatcher = WebhookDispatcher(coalesce_max_events=2, coalesce_window=60)
+        counts = WebhookDeliveryWorker(dispatcher=dispatcher).run_once()
+        dispatcher.close()
+
+        self.assertEqual(counts['delivered'], 2)
+        held = WebhookEvent.objects.get(status=WebhookEvent.Status.PENDING)
+        self.assertEqual(held.attempts, 0)
+        self.assertGreater(held.next_attempt_at, timezone.now())
@@ -3,24 +3,31 @@
 # -----------------------------------------------------------------
 # MIGRATION: All database queries have been rewritten to use the
 # relational ORM.
-# - Student dashboard now uses GenericForeignKey to get enrollments.
+# - Student dashboard reads the denormalized `CourseCard` rows in a
+#   single query instead of resolving each enrollment's course.
 # - Instructor dashboard uses standard reverse relations to count students and questions.
 # - Third-party and Supervisor dashboards now query the relational models correctly.
+# - Third-party employee progress is one grouped query, sorted and
+#   paginated server-side.
 # - Optimized queries using select_related and prefetch_related where applicable.
+# - The instructor's unanswered-question count is the sum of the
+#   courses' maintained `unanswered_thread_count` counters.
 # =================================================================
 
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Avg, Count, Q
-from django.urls import reverse
+from django.db.models import Count, Q
 from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
 
-from apps.enrollment.models import Enrollment
+from apps.enrollment.models import CourseCard, Enrollment
 from apps.learning.models import Course, LearningPath
 from apps.users.models import CustomUser
 from apps.contracts.models import Contract
-from apps.interactions.models import DiscussionThread, DiscussionPost
+from apps.contracts.services import (
+    DEFAULT_EMPLOYEE_SORT, EMPLOYEE_PAGE_SIZE, contract_summary, employee_progress, sort_employee_progress
+)
 
 class DashboardView(LoginRequiredMixin, View):
     login_url = '/login/'
@@ -38,40 +45,9 @@ class DashboardView(LoginRequiredMixin, View):
             })
 
         elif user.role == 'student':
-            course_content_type = ContentType.objects.get_for_model(Course)
-            student_enrollments = Enrollment.objects.filter(
-                student=user, content_type=course_content_type
-            ).select_related('enrollable') # `enrollable` is the GenericForeignKey
-
-            enrolled_courses_data = []
-            for enrollment in student_enrollments:
-                course = enrollment.enrollable
-                if not course:
-                    continue
-
-                # Determine the URL to continue learning
-                if enrollment.last_accessed_lesson:
-                    continue_url = reverse('learning:lesson_detail', kwargs={
-                        'course_slug': course.slug,
-                        'lesson_order': enrollment.last_accessed_lesson.order
-                    })
-                else:
-                    first_lesson = course.lessons.order_by('order').first()
-                    if first_lesson:
-                        continue_url = reverse('learning:lesson_detail', kwargs={
-                            'course_slug': course.slug,
-                            'lesson_order': first_lesson.order
-                        })
-                    else:
-                        continue_url = '#' # Or a link to the course page
-
-                enrolled_courses_data.append({
-                    'course': course,
-                    'progress': enrollment.progress,
-                    'continue_url': continue_url
-                })
-            
-            context['enrolled_courses_data'] = enrolled_courses_data
+            # One indexed read of the student's precomputed course cards; see
+            # `CourseCard` for how they are kept up to date.
+            context['course_cards'] = list(CourseCard.objects.filter(student=user))
 
         elif user.role == 'instructor':
             instructor_courses = Course.objects.filter(instructor=user)
@@ -82,11 +58,6 @@ class DashboardView(LoginRequiredMixin, View):
                 content_type=course_content_type, object_id__in=course_ids
             ).values('student').distinct().count()
 
-            # Logic to find unanswered questions
-            course_threads = DiscussionThread.objects.filter(course_id__in=course_ids)
-            replied_thread_ids = DiscussionPost.objects.filter(thread__in=course_threads, user=user).values_list('thread_id', flat=True)
-            unanswered_threads_count = course_threads.exclude(pk__in=replied_thread_ids).count()
-            
             # Get student count for each course
             enrollments_per_course = Enrollment.objects.filter(
                 content_type=course_content_type, object_id__in=course_ids
@@ -101,29 +72,24 @@ class DashboardView(LoginRequiredMixin, View):
                 'instructor_courses': instructor_courses,
                 'total_students': total_students_count,
                 'total_courses': instructor_courses.count(),
-                'new_questions_count': unanswered_threads_count,
+                'new_questions_count': sum(course.unanswered_thread_count for course in instructor_courses),
             })
 
         elif user.role == 'third_party':
             try:
                 contract = Contract.objects.get(client=user, is_active=True)
-                student_ids = contract.enrolled_students.values_list('id', flat=True)
-                enrollments = Enrollment.objects.filter(student_id__in=student_ids)
-                average_progress = enrollments.aggregate(Avg('progress'))['progress__avg'] or 0
-                
-                employee_data = []
-                for student in contract.enrolled_students.all():
-                    avg_student_progress = enrollments.filter(student=student).aggregate(Avg('progress'))['progress__avg'] or 0
-                    employee_data.append({
-                        'name': student.full_name or student.username,
-                        'email': student.email,
-                        'progress': avg_student_progress,
-                    })
+                # The employee table is aggregated, sorted and paginated in the
+                # database; see apps/contracts/services.py.
+                rows, sort = sort_employee_progress(
+                    employee_progress(contract), request.GET.get('sort', DEFAULT_EMPLOYEE_SORT)
+                )
+                page = Paginator(rows, EMPLOYEE_PAGE_SIZE).get_page(request.GET.get('page'))
+                context.update(contract_summary(contract))
                 context.update({
                     'contract': contract,
-                    'total_employees': len(student_ids),
-                    'average_progress': average_progress,
-                    'employee_data': employee_data,
+                    'employee_page': page,
+                    'employee_data': page.object_list,
+                    'employee_sort': sort,
                 })
             except Contract.DoesNotExist:
                 context['contract'] = None
@@ -3,14 +3,26 @@
 # -----------------------------------------------------------------
 # MIGRATION: Updated the admin list_display to correctly show
 # the `enrollable` object via the GenericForeignKey.
+# PERFORMANCE: The change list prefetches `enrollable` per content
+# type instead of resolving it row by row.
 # =================================================================
 
 from django.contrib import admin
-from .models import Enrollment
+from .models import Enrollment, QuizAttempt
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ('student', 'enrollable', 'status', 'progress', 'enrollment_date')
     list_filter = ('status', 'content_type')
     search_fields = ('student__username', 'object_id')
-    autocomplete_fields = ('student',)
\ No newline at end of file
+    autocomplete_fields = ('student',)
+    exclude = ('quiz_attempts',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_enrollables()
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ('attempt_id', 'enrollment', 'lesson', 'score', 'submitted_at')
+    search_fields = ('attempt_id', 'enrollment__student__username')
+    raw_id_fields = ('enrollment', 'lesson')
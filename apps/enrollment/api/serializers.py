@@ -3,11 +3,16 @@
 # -----------------------------------------------------------------
 # MIGRATION: Explicitly defined fields for clarity and to properly
 # handle the new GenericForeignKey relationship.
+# PERFORMANCE: Supports `?fields=` sparse fieldsets.
 # =================================================================
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from apps.enrollment.models import Enrollment
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Reads the object prefetched by `Enrollment.objects.with_enrollables()`.
+    enrollable = serializers.SerializerMethodField()
+
     class Meta:
         model = Enrollment
         fields = [
@@ -20,4 +25,9 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'status',
             'progress'
         ]
-        read_only_fields = ['enrollable']
\ No newline at end of file
+
+    def get_enrollable(self, enrollment):
+        enrollable = enrollment.enrollable
+        if enrollable is None:
+            return None
+        return {'type': enrollable._meta.model_name, 'id': enrollable.pk, 'title': str(enrollable)}
\ No newline at end of file
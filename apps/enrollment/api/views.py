@@ -2,11 +2,20 @@
 # apps/enrollment/api/views.py
 # -----------------------------------------------------------------
 # MIGRATION: Logic is heavily refactored for the relational schema.
-# - `mark_lesson_complete`: Uses standard ORM to find the enrollment
-#   and adds the completed lesson via the new ManyToMany relationship.
+# - `mark_lesson_complete`: Delegates to `record_lesson_completion`,
+#   which records the lesson and updates progress with a fixed number
+#   of statements regardless of course size.
+# - `mark_lessons_complete`: Batch endpoint for offline sync and LMS
+#   imports that validates, inserts and recomputes in bulk.
 # - `submit_quiz`: Fetches relational Course, Lesson, and Answer
-#   objects to accurately calculate the quiz score.
+#   objects to accurately calculate the quiz score, and stores each
+#   attempt as an indexed `QuizAttempt` row. Grading uses the cached,
+#   versioned answer key from `apps.learning.services`.
 # - Uses GenericForeignKey lookups via ContentType to handle enrollments.
+# PERFORMANCE: The enrollment list is keyset-paginated on the primary
+# key (see apps/core/pagination.py) instead of serializing the table,
+# and each page resolves its `enrollable` objects in one query per
+# content type.
 # =================================================================
 
 from rest_framework import viewsets, status, permissions
@@ -15,17 +24,22 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.contrib.contenttypes.models import ContentType
-import uuid
-from datetime import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from apps.enrollment.models import Enrollment
-from apps.learning.models import Course, Lesson, Answer
+from apps.enrollment.models import Enrollment, QuizAttempt
+from apps.enrollment.services import record_lesson_completion, record_lesson_completions
+from apps.learning.models import Course, Lesson
+from apps.learning.services import get_answer_key, grade_submission
 from .serializers import EnrollmentSerializer
 
 class EnrollmentViewSet(viewsets.ModelViewSet):
-    queryset = Enrollment.objects.all()
+    queryset = Enrollment.objects.with_enrollables()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('pk',)
+
+    MAX_BATCH_COMPLETIONS = 500
 
     @action(detail=False, methods=['post'], url_path='mark-lesson-complete')
     def mark_lesson_complete(self, request):
@@ -37,19 +51,61 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
 
         course_content_type = ContentType.objects.get_for_model(Course)
         enrollment = get_object_or_404(
-            Enrollment,
+            Enrollment.objects.only('pk', 'status', 'progress', 'completed_count'),
             student=user,
             content_type=course_content_type,
             object_id=course_id
         )
-        lesson_to_complete = get_object_or_404(Lesson, pk=lesson_id, course_id=course_id)
-
-        enrollment.completed_lessons.add(lesson_to_complete)
-        enrollment.last_accessed_lesson = lesson_to_complete
-        enrollment.save()
-        enrollment.update_progress() # This method was also updated in the model
+        lesson_to_complete = get_object_or_404(
+            Lesson.objects.select_related('course').only('pk', 'order', 'course__lesson_count'),
+            pk=lesson_id,
+            course_id=course_id
+        )
 
-        return Response({'status': 'success', 'progress': enrollment.progress}, status=status.HTTP_200_OK)
+        progress = record_lesson_completion(enrollment, lesson_to_complete)
+
+        return Response({'status': 'success', 'progress': progress}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='mark-lessons-complete')
+    def mark_lessons_complete(self, request):
+        """
+        Batch variant of `mark_lesson_complete` for offline sync and LMS
+        imports. Expects `{"completions": [{"course_id", "lesson_id",
+        "completed_at"}, ...]}` and reports a status for every item.
+        """
+        completions = request.data.get('completions')
+        if not isinstance(completions, list) or not completions:
+            return Response({'error': 'completions must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(completions) > self.MAX_BATCH_COMPLETIONS:
+            return Response(
+                {'error': f'At most {self.MAX_BATCH_COMPLETIONS} completions can be sent at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = []
+        for index, completion in enumerate(completions):
+            try:
+                completed_at = completion.get('completed_at')
+                if completed_at:
+                    completed_at = parse_datetime(completed_at)
+                    if completed_at is None:
+                        raise ValueError
+                    if timezone.is_naive(completed_at):
+                        completed_at = timezone.make_aware(completed_at)
+                items.append({
+                    'course_id': int(completion['course_id']),
+                    'lesson_id': int(completion['lesson_id']),
+                    'completed_at': completed_at or None,
+                })
+            except (AttributeError, KeyError, TypeError, ValueError):
+                return Response(
+                    {'error': f'completions[{index}] must contain integer course_id and lesson_id '
+                              f'and an optional ISO 8601 completed_at.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        results, progress = record_lesson_completions(request.user, items)
+        return Response({'status': 'success', 'results': results, 'progress': progress}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], url_path='submit-quiz')
     def submit_quiz(self, request):
@@ -60,45 +116,29 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
 
         course_content_type = ContentType.objects.get_for_model(Course)
         enrollment = get_object_or_404(
-            Enrollment,
+            Enrollment.objects.only('pk'),
             student=user,
             content_type=course_content_type,
             object_id=course_id
         )
-        lesson = get_object_or_404(Lesson, pk=lesson_id, course_id=course_id)
+        lesson = get_object_or_404(
+            Lesson.objects.only('pk', 'content_type', 'quiz_version'), pk=lesson_id, course_id=course_id
+        )
 
         if lesson.content_type != 'quiz':
             return Response({'error': 'Lesson is not a quiz.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        questions = lesson.questions.all().prefetch_related('answers')
-        total_questions = questions.count()
-        correct_answers_count = 0
-
-        # Grade the submission
-        for i, question in enumerate(questions):
-            question_key = f'question_{i+1}'
-            submitted_answer_id = answers.get(question_key)
-            
-            # Find the correct answer ID for this question
-            correct_answer = question.answers.filter(is_correct=True).first()
-
-            if correct_answer and submitted_answer_id == str(correct_answer.pk):
-                correct_answers_count += 1
-
-        score = round((correct_answers_count / total_questions) * 100, 2) if total_questions > 0 else 100
-
-        # Save the attempt with a unique ID
-        attempt_id = str(uuid.uuid4())
-        attempt_data = {
-            'attempt_id': attempt_id,
-            'lesson_id': lesson_id,
-            'score': score,
-            'submitted_at': datetime.utcnow().isoformat(),
-            'answers': answers,
-        }
-        
-        enrollment.quiz_attempts.append(attempt_data)
-        enrollment.save(update_fields=['quiz_attempts'])
+        # Grade against the cached answer key; no per-question queries.
+        score = grade_submission(get_answer_key(lesson), answers)
+
+        # Save the attempt as its own row; the enrollment row is never rewritten.
+        attempt = QuizAttempt.objects.create(
+            enrollment_id=enrollment.pk,
+            lesson_id=lesson.pk,
+            score=score,
+            answers=answers,
+        )
+        attempt_id = str(attempt.attempt_id)
 
         result_url = reverse('learning:quiz_result', kwargs={'enrollment_pk': enrollment.pk, 'attempt_id': attempt_id})
 
@@ -0,0 +1,110 @@
+# =================================================================
+# apps/enrollment/management/commands/migrate_quiz_attempts.py
+# -----------------------------------------------------------------
+# PERFORMANCE: One-off data migration that moves the attempts stored
+# in the legacy `Enrollment.quiz_attempts` JSON blob into the indexed
+# `QuizAttempt` table and empties the blob. Safe to re-run: attempts
+# are keyed by their original `attempt_id`. Malformed or orphaned
+# attempts are logged and left in the blob for manual review.
+# =================================================================
+
+import logging
+import uuid
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.enrollment.models import Enrollment, QuizAttempt
+from apps.learning.models import Lesson
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Moves quiz attempts out of the Enrollment.quiz_attempts JSON blob into the QuizAttempt table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Enrollments processed per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = (
+            Enrollment.objects.exclude(quiz_attempts=[])
+            .only('pk', 'quiz_attempts')
+            .order_by('pk')
+        )
+
+        migrated = skipped = 0
+        batch = []
+        for enrollment in pending.iterator(chunk_size=batch_size):
+            batch.append(enrollment)
+            if len(batch) >= batch_size:
+                counts = self.migrate_batch(batch)
+                migrated, skipped = migrated + counts[0], skipped + counts[1]
+                batch = []
+        if batch:
+            counts = self.migrate_batch(batch)
+            migrated, skipped = migrated + counts[0], skipped + counts[1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Migrated {migrated} quiz attempt(s); skipped {skipped} malformed or orphaned attempt(s), "
+            f"left in Enrollment.quiz_attempts."
+        ))
+
+    @transaction.atomic
+    def migrate_batch(self, enrollments):
+        """
+        Copies the valid attempts of `enrollments` into QuizAttempt and
+        rewrites each blob to hold only the attempts that were skipped.
+
+        Returns:
+            A tuple of (migrated, skipped).
+        """
+        lesson_ids = {
+            str(attempt.get('lesson_id'))
+            for enrollment in enrollments for attempt in enrollment.quiz_attempts
+            if isinstance(attempt, dict)
+        }
+        existing_lessons = {
+            str(pk) for pk in Lesson.objects.filter(pk__in=[pk for pk in lesson_ids if pk.isdigit()]).values_list('pk', flat=True)
+        }
+
+        attempts, kept = [], {}
+        for enrollment in enrollments:
+            for data in enrollment.quiz_attempts:
+                try:
+                    lesson_id = str(data.get('lesson_id'))
+                    attempt_id = uuid.UUID(str(data['attempt_id']))
+                    score = float(data['score'])
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    reason = "malformed"
+                else:
+                    reason = None if lesson_id in existing_lessons else f"unknown lesson {lesson_id}"
+                if reason:
+                    logger.warning(f"Kept quiz attempt {data!r} of enrollment {enrollment.pk}: {reason}")
+                    kept.setdefault(enrollment.pk, []).append(data)
+                    continue
+
+                submitted_at = parse_datetime(data.get('submitted_at') or '') or timezone.now()
+                if timezone.is_naive(submitted_at):
+                    # Legacy attempts were stamped with naive UTC times.
+                    submitted_at = timezone.make_aware(submitted_at, dt_timezone.utc)
+                attempts.append(QuizAttempt(
+                    attempt_id=attempt_id,
+                    enrollment_id=enrollment.pk,
+                    lesson_id=int(lesson_id),
+                    score=score,
+                    answers=data.get('answers') or {},
+                    submitted_at=submitted_at,
+                ))
+
+        QuizAttempt.objects.bulk_create(attempts, ignore_conflicts=True)
+        Enrollment.objects.filter(
+            pk__in=[enrollment.pk for enrollment in enrollments if enrollment.pk not in kept]
+        ).update(quiz_attempts=[])
+        for enrollment_pk, remaining in kept.items():
+            Enrollment.objects.filter(pk=enrollment_pk).update(quiz_attempts=remaining)
+        return len(attempts), sum(len(remaining) for remaining in kept.values())
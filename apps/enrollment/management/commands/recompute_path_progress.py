@@ -0,0 +1,28 @@
+# =================================================================
+# apps/enrollment/management/commands/recompute_path_progress.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Recomputes every learning-path enrollment's progress
+# from the course enrollments of its student with two set-based
+# UPDATEs, however many paths and students there are. Course
+# progress changes keep path progress current, so this backfills
+# path enrollments created before the rollup existed and repairs
+# drift after bulk operations that bypass the signals.
+# =================================================================
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.enrollment.services import recompute_path_progress
+
+
+class Command(BaseCommand):
+    help = "Recomputes the progress of all learning-path enrollments from their course enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', type=int, action='append', dest='paths',
+                            help="Only recompute this learning path (repeatable).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = recompute_path_progress(path_ids=options['paths'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed progress of {updated} learning-path enrollment(s)."))
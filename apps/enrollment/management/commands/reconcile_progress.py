@@ -0,0 +1,26 @@
+# =================================================================
+# apps/enrollment/management/commands/reconcile_progress.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Repairs drift in the denormalized progress counters
+# (`Course.lesson_count`, `Enrollment.completed_count`) that can be
+# introduced by bulk operations bypassing the model signals, and
+# rebuilds the dashboard `CourseCard` rows (which also backfills them
+# for enrollments created before the read model existed).
+# =================================================================
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.enrollment.services import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recounts lesson and completion counters, recomputes course progress and rebuilds dashboard cards."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            courses_fixed, enrollments_fixed = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled progress counters: {courses_fixed} course(s) and "
+            f"{enrollments_fixed} enrollment(s) had drifted."
+        ))
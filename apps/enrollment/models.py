@@ -4,12 +4,40 @@
 # FINAL FIX: Added unique `related_name` arguments to the
 # `completed_lessons` and `last_accessed_lesson` fields to resolve
 # the reverse accessor clash identified by the system check.
+# PERFORMANCE: `Enrollment.objects.with_enrollables()` (and
+# `resolve_enrollables` for already-loaded rows) resolve the
+# `enrollable` GenericForeignKey of many enrollments with one query
+# per content type instead of one per enrollment.
 # =================================================================
 
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.utils import timezone
 from django.conf import settings
+from django.urls import reverse
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import prefetch_related_objects
+
+from apps.learning.models import Course
+
+
+def resolve_enrollables(enrollments):
+    """
+    Loads `enrollable` for every enrollment in `enrollments` (any iterable
+    of loaded rows), one query per content type among them.
+    """
+    enrollments = list(enrollments)
+    prefetch_related_objects(enrollments, 'enrollable')
+    return enrollments
+
+
+class EnrollmentQuerySet(models.QuerySet):
+    def with_enrollables(self):
+        """ Prefetches `enrollable` (one query per content type) and the student. """
+        return self.select_related('student').prefetch_related('enrollable')
+
 
 class Enrollment(models.Model):
     STATUS_CHOICES = [
@@ -44,27 +72,110 @@ class Enrollment(models.Model):
         related_name='last_accessed_by_enrollments' # FIX
     )
 
+    # Legacy store for quiz attempts, superseded by `QuizAttempt`. Existing
+    # blobs are moved out by the `migrate_quiz_attempts` command.
     quiz_attempts = models.JSONField(default=list, blank=True)
 
+    # Denormalized size of `completed_lessons`, kept in step by
+    # `apps.enrollment.services.record_lesson_completion`.
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
+    # When the student last opened a new lesson or completed one; written by
+    # the same narrow UPDATEs that move `last_accessed_lesson`.
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EnrollmentQuerySet.as_manager()
+
     class Meta:
+        # Also the index for a student's enrollments and their lookups.
         unique_together = ('student', 'content_type', 'object_id')
+        indexes = [
+            # "Who is enrolled in this course/path", without a student.
+            models.Index(fields=['content_type', 'object_id']),
+        ]
 
     def __str__(self):
         return f"{self.student.username} enrolled in {self.enrollable}"
 
+    def save(self, *args, **kwargs):
+        # The post_save receivers write to the webhook outbox; keeping them in
+        # the same transaction makes the event durable exactly when this row is.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @staticmethod
+    def calculate_progress(completed_count, total_lessons, status='in_progress'):
+        """ Returns the progress percentage for the given counters. """
+        if total_lessons > 0:
+            return min(round((completed_count / total_lessons) * 100, 2), 100)
+        return 100 if status == 'completed' else 0
+
     def update_progress(self):
-        if self.content_type.model == 'course':
-            course = self.enrollable
-            total_lessons = course.lessons.count()
+        """
+        Recomputes progress from the denormalized counters. This never counts
+        the lessons or the completed_lessons table.
+        """
+        if ContentType.objects.get_for_id(self.content_type_id).model == 'course':
+            total_lessons = Course.objects.filter(pk=self.object_id).values_list('lesson_count', flat=True).first() or 0
+
+            self.progress = self.calculate_progress(self.completed_count, total_lessons, self.status)
 
-            if total_lessons > 0:
-                completed_count = self.completed_lessons.count()
-                self.progress = round((completed_count / total_lessons) * 100, 2)
-            else:
-                self.progress = 100 if self.status == 'completed' else 0
+            self.status = 'completed' if self.progress >= 100 else 'in_progress'
 
-            if self.progress >= 100:
-                self.status = 'completed'
-                self.progress = 100
+            self.save(update_fields=['progress', 'status'])
+
+class QuizAttempt(models.Model):
+    """ A single graded submission of a quiz lesson by an enrolled student. """
+    attempt_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='attempts')
+    lesson = models.ForeignKey('learning.Lesson', on_delete=models.CASCADE, related_name='quiz_attempts')
+    score = models.FloatField()
+    answers = models.JSONField(default=dict, blank=True)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['enrollment', 'lesson', 'submitted_at']),
+        ]
+
+    def __str__(self):
+        return f"Attempt {self.attempt_id} on {self.lesson_id} ({self.score}%)"
+
+class CourseCard(models.Model):
+    """
+    Read model behind the student dashboard: one compact row per course
+    enrollment, carrying everything a course card renders so the dashboard
+    is a single indexed query. Rows are derived data, kept in step by
+    `apps.enrollment.services` and the enrollment/learning signals, and can
+    be rebuilt at any time with `reconcile_progress`.
+    """
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_cards')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='cards')
+    course_title = models.CharField(max_length=255)
+    course_slug = models.SlugField(max_length=255)
+    cover_image_url = models.URLField(blank=True, null=True)
+    instructor_name = models.CharField(max_length=255, blank=True)
+    progress = models.FloatField(default=0.0)
+    status = models.CharField(max_length=20, choices=Enrollment.STATUS_CHOICES, default='in_progress')
+    # Order of the last accessed lesson, or of the first lesson when the
+    # student has not opened one yet; null for a course without lessons.
+    continue_lesson_order = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['enrollment']
+        indexes = [
+            models.Index(fields=['student', 'enrollment']),
+        ]
+
+    def __str__(self):
+        return f"{self.course_title} card for student {self.student_id}"
 
-            self.save(update_fields=['progress', 'status'])
\ No newline at end of file
+    @property
+    def continue_url(self):
+        if self.continue_lesson_order is None:
+            return '#'
+        return reverse('learning:lesson_detail', kwargs={
+            'course_slug': self.course_slug,
+            'lesson_order': self.continue_lesson_order
+        })
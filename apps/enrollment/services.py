@@ -1,11 +1,470 @@
-# This file will contain business logic for the enrollment app.
+# =================================================================
+# apps/enrollment/services.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Progress is now kept incrementally. Completing a lesson
+# inserts one row into `completed_lessons` and issues one UPDATE on
+# the enrollment, using the denormalized `Course.lesson_count` and
+# `Enrollment.completed_count` counters instead of COUNT queries.
+# Set-based recomputation is provided for lesson changes and for the
+# `reconcile_progress` management command.
+# The same events keep the `CourseCard` read model (the student
+# dashboard) in step with narrow UPDATEs.
+# Learning-path progress is rolled up from course progress: whenever
+# course enrollments move, the path enrollments of the same students
+# in the paths containing those courses (found in the cached
+# membership map) are recomputed with one set-based UPDATE.
+# =================================================================
 
-def calculate_progress(student, course):
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Least, Round
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from apps.enrollment.models import CourseCard, Enrollment
+from apps.learning.models import Course, LearningPath, LearningPathModule, Lesson
+from apps.learning.services import get_path_membership
+
+
+def _progress_expression(completed, total):
     """
-    Placeholder function to calculate a student's progress in a course.
+    Builds the SQL expression for the progress percentage given the
+    completed and total lesson counts (either may be an expression).
     """
-    # Logic to get enrollment, count total lessons, count completed lessons, and return percentage.
-    pass
+    percentage = Cast(completed, FloatField()) * 100.0 / Cast(total, FloatField())
+    return Least(Round(percentage, 2), Value(100.0))
+
+
+def _status_from_progress():
+    """
+    Builds the SQL expression for an enrollment's status from its stored
+    progress, so a recompute can move it back to in progress as well.
+    """
+    return Case(When(progress__gte=100, then=Value('completed')), default=Value('in_progress'))
+
+
+def _enrollment_value(field):
+    """ Reads `field` from the enrollment behind the outer course card. """
+    return Subquery(Enrollment.objects.filter(pk=OuterRef('pk')).values(field)[:1])
+
+
+def _continue_order_expression():
+    """
+    The order of the outer card's last accessed lesson, falling back to the
+    first lesson of its course.
+    """
+    return Coalesce(
+        _enrollment_value('last_accessed_lesson__order'),
+        Subquery(Lesson.objects.filter(course=OuterRef('course_id')).order_by('order').values('order')[:1]),
+    )
+
+
+def _course_card_fields(course):
+    """ The course-level columns copied onto every card of `course`. """
+    instructor = course.instructor
+    return {
+        'course_title': course.title,
+        'course_slug': course.slug,
+        'cover_image_url': course.cover_image_url,
+        'instructor_name': (instructor.full_name or instructor.username) if instructor else '',
+    }
+
+
+def refresh_course_cards(enrollment_ids=None, course_ids=None):
+    """
+    Rebuilds the `CourseCard` rows of course enrollments from the source
+    tables with one read and one upsert. With no arguments every card is
+    rebuilt.
+
+    Args:
+        enrollment_ids: Optional iterable restricting the refresh to these enrollments.
+        course_ids: Optional iterable restricting the refresh to these courses.
+
+    Returns:
+        The number of cards written.
+    """
+    course_content_type = ContentType.objects.get_for_model(Course)
+    enrollments = Enrollment.objects.filter(content_type=course_content_type)
+    if enrollment_ids is not None:
+        enrollments = enrollments.filter(pk__in=list(enrollment_ids))
+    if course_ids is not None:
+        enrollments = enrollments.filter(object_id__in=list(course_ids))
+
+    first_lesson_order = Subquery(
+        Lesson.objects.filter(course=OuterRef('object_id')).order_by('order').values('order')[:1]
+    )
+    rows = list(enrollments.annotate(first_lesson_order=first_lesson_order).values_list(
+        'pk', 'student_id', 'object_id', 'progress', 'status', 'last_accessed_lesson__order', 'first_lesson_order'
+    ))
+    if not rows:
+        return 0
+
+    courses = Course.objects.select_related('instructor').only(
+        'title', 'slug', 'cover_image_url', 'instructor__username', 'instructor__full_name'
+    ).in_bulk({row[2] for row in rows})
+
+    cards = []
+    for pk, student_id, course_id, progress, status, last_order, first_order in rows:
+        course = courses.get(course_id)
+        if course is None:
+            continue  # enrollment pointing at a deleted course
+        cards.append(CourseCard(
+            enrollment_id=pk,
+            student_id=student_id,
+            course_id=course_id,
+            progress=progress,
+            status=status,
+            continue_lesson_order=last_order if last_order is not None else first_order,
+            **_course_card_fields(course),
+        ))
+
+    CourseCard.objects.bulk_create(
+        cards,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['enrollment'],
+        update_fields=[
+            'student', 'course', 'course_title', 'course_slug', 'cover_image_url',
+            'instructor_name', 'progress', 'status', 'continue_lesson_order',
+        ],
+    )
+    return len(cards)
+
+
+def sync_course_cards(courses):
+    """ Copies the title, slug, cover and instructor of `courses` onto their cards. """
+    for course in courses:
+        CourseCard.objects.filter(course=course).update(**_course_card_fields(course))
+
+
+def refresh_continue_orders(course_ids):
+    """
+    Recomputes `continue_lesson_order` on every card of the given courses
+    after lessons were added, removed or reordered.
+    """
+    return CourseCard.objects.filter(course_id__in=list(course_ids)).update(
+        continue_lesson_order=_continue_order_expression()
+    )
+
+
+def touch_course_enrollment(student, course, lesson):
+    """
+    Records `lesson` as the student's last accessed lesson in `course`,
+    enrolling the student on first visit. Reads one row and only issues a
+    narrow UPDATE when the last accessed lesson actually changes.
+
+    Returns:
+        The enrollment's current progress percentage.
+    """
+    course_content_type = ContentType.objects.get_for_model(Course)
+    row = Enrollment.objects.filter(
+        student=student, content_type=course_content_type, object_id=course.pk
+    ).values_list('pk', 'progress', 'last_accessed_lesson_id').first()
+
+    if row is None:
+        enrollment, _ = Enrollment.objects.get_or_create(
+            student=student,
+            content_type=course_content_type,
+            object_id=course.pk,
+            defaults={'last_accessed_lesson': lesson, 'last_activity_at': timezone.now()},
+        )
+        return enrollment.progress
+
+    enrollment_id, progress, last_accessed_lesson_id = row
+    if last_accessed_lesson_id != lesson.pk:
+        Enrollment.objects.filter(pk=enrollment_id).update(
+            last_accessed_lesson_id=lesson.pk, last_activity_at=timezone.now()
+        )
+        CourseCard.objects.filter(pk=enrollment_id).update(continue_lesson_order=lesson.order)
+    return progress
+
+
+def _completed_count_subquery():
+    """ Counts the completed_lessons rows of the outer enrollment. """
+    through = Enrollment.completed_lessons.through
+    return Coalesce(
+        Subquery(
+            through.objects.filter(enrollment=OuterRef('pk'))
+            .values('enrollment').annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def record_lesson_completion(enrollment, lesson):
+    """
+    Marks `lesson` as completed for `enrollment` and updates its progress
+    with a single atomic UPDATE.
+
+    `lesson.course` must already be loaded (e.g. via select_related) so
+    that its `lesson_count` is available without another query.
+
+    Returns:
+        The enrollment's new progress percentage.
+    """
+    through = Enrollment.completed_lessons.through
+    try:
+        with transaction.atomic():
+            through.objects.create(enrollment_id=enrollment.pk, lesson_id=lesson.pk)
+        newly_completed = True
+    except IntegrityError:
+        # The lesson was already completed; only the last access moves.
+        newly_completed = False
+
+    updates = {'last_accessed_lesson_id': lesson.pk, 'last_activity_at': timezone.now()}
+    total_lessons = lesson.course.lesson_count
+
+    if newly_completed:
+        completed = F('completed_count') + 1
+        updates['completed_count'] = completed
+        if total_lessons > 0:
+            updates['progress'] = _progress_expression(completed, total_lessons)
+            updates['status'] = Case(
+                When(completed_count__gte=total_lessons - 1, then=Value('completed')),
+                default=F('status'),
+            )
+        enrollment.completed_count += 1
+
+    Enrollment.objects.filter(pk=enrollment.pk).update(**updates)
+    CourseCard.objects.filter(pk=enrollment.pk).update(
+        continue_lesson_order=lesson.order,
+        progress=_enrollment_value('progress'),
+        status=_enrollment_value('status'),
+    )
+    if newly_completed:
+        refresh_path_progress([lesson.course_id], enrollment_ids=[enrollment.pk])
+
+    enrollment.last_accessed_lesson_id = lesson.pk
+    if newly_completed and total_lessons > 0:
+        enrollment.progress = Enrollment.calculate_progress(enrollment.completed_count, total_lessons)
+        if enrollment.progress >= 100:
+            enrollment.status = 'completed'
+    return enrollment.progress
+
+
+@transaction.atomic
+def record_lesson_completions(student, items):
+    """
+    Records a batch of lesson completions for `student` with a fixed number
+    of queries: the lessons, enrollments and already-completed rows are each
+    loaded once, new rows go in with one bulk insert, and progress is
+    recomputed once per affected enrollment.
+
+    Args:
+        student: The user the completions belong to.
+        items: A list of dicts with integer `course_id` and `lesson_id` keys
+               and an optional `completed_at` datetime.
+
+    Returns:
+        A tuple of (results, progress) where `results` holds one status dict
+        per item, in order, and `progress` maps course ids to new progress.
+    """
+    course_content_type = ContentType.objects.get_for_model(Course)
+    course_ids = {item['course_id'] for item in items}
+    lesson_ids = {item['lesson_id'] for item in items}
+
+    lesson_courses = dict(
+        Lesson.objects.filter(pk__in=lesson_ids, course_id__in=course_ids).values_list('pk', 'course_id')
+    )
+    enrollment_ids = dict(
+        Enrollment.objects.filter(
+            student=student, content_type=course_content_type, object_id__in=course_ids
+        ).values_list('object_id', 'pk')
+    )
+    through = Enrollment.completed_lessons.through
+    already_completed = set(
+        through.objects.filter(
+            enrollment_id__in=enrollment_ids.values(), lesson_id__in=lesson_ids
+        ).values_list('enrollment_id', 'lesson_id')
+    )
+
+    now = timezone.now()
+    results = []
+    new_rows = {}
+    last_accessed = {}
+    last_activity = {}
+    for index, item in enumerate(items):
+        course_id, lesson_id = item['course_id'], item['lesson_id']
+        result = {'course_id': course_id, 'lesson_id': lesson_id}
+        enrollment_id = enrollment_ids.get(course_id)
+
+        if enrollment_id is None:
+            result['status'] = 'not_enrolled'
+        elif lesson_courses.get(lesson_id) != course_id:
+            result['status'] = 'not_found'
+        else:
+            key = (enrollment_id, lesson_id)
+            if key in already_completed or key in new_rows:
+                result['status'] = 'already_completed'
+            else:
+                result['status'] = 'completed'
+                new_rows[key] = through(enrollment_id=enrollment_id, lesson_id=lesson_id)
+
+            # The most recent completion becomes the lesson to resume from.
+            rank = (item.get('completed_at') is not None, item.get('completed_at'), index)
+            if enrollment_id not in last_accessed or rank > last_accessed[enrollment_id][0]:
+                last_accessed[enrollment_id] = (rank, lesson_id)
+            activity = min(item.get('completed_at') or now, now)
+            last_activity[enrollment_id] = max(activity, last_activity.get(enrollment_id, activity))
+        results.append(result)
+
+    if not last_accessed:
+        return results, {}
+
+    through.objects.bulk_create(new_rows.values(), ignore_conflicts=True)
+    Enrollment.objects.bulk_update(
+        [
+            Enrollment(pk=pk, last_accessed_lesson_id=lesson_id, last_activity_at=last_activity[pk])
+            for pk, (_, lesson_id) in last_accessed.items()
+        ],
+        ['last_accessed_lesson', 'last_activity_at'],
+    )
+
+    affected = list(last_accessed)
+    affected_courses = [course_id for course_id, pk in enrollment_ids.items() if pk in last_accessed]
+    Enrollment.objects.filter(pk__in=affected).update(completed_count=_completed_count_subquery())
+    recompute_course_progress(course_ids=affected_courses, enrollment_ids=affected)
+    CourseCard.objects.filter(pk__in=affected).update(continue_lesson_order=_continue_order_expression())
+
+    progress = dict(Enrollment.objects.filter(pk__in=affected).values_list('object_id', 'progress'))
+    return results, progress
+
+
+def recompute_course_progress(course_ids=None, enrollment_ids=None):
+    """
+    Recomputes `progress` and `status` for every course enrollment from
+    the denormalized counters, using set-based UPDATEs, then rolls the
+    result up into the affected learning-path enrollments.
+
+    Args:
+        course_ids: Optional iterable restricting the update to these courses.
+        enrollment_ids: Optional iterable restricting the update to these enrollments.
+
+    Returns:
+        The number of enrollments updated.
+    """
+    course_content_type = ContentType.objects.get_for_model(Course)
+    enrollments = Enrollment.objects.filter(content_type=course_content_type)
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        enrollments = enrollments.filter(object_id__in=course_ids)
+    if enrollment_ids is not None:
+        enrollment_ids = list(enrollment_ids)
+        enrollments = enrollments.filter(pk__in=enrollment_ids)
+
+    lesson_count = Subquery(Course.objects.filter(pk=OuterRef('object_id')).values('lesson_count')[:1])
+    updated = enrollments.update(
+        progress=Case(
+            When(GreaterThan(lesson_count, 0), then=_progress_expression(F('completed_count'), lesson_count)),
+            When(status='completed', then=Value(100.0)),
+            default=Value(0.0),
+        )
+    )
+    enrollments.update(status=_status_from_progress())
+    CourseCard.objects.filter(enrollment__in=enrollments).update(
+        progress=_enrollment_value('progress'), status=_enrollment_value('status')
+    )
+    if course_ids is None:
+        recompute_path_progress(enrollment_ids=enrollment_ids)
+    else:
+        refresh_path_progress(course_ids, enrollment_ids=enrollment_ids)
+    return updated
+
+
+def recompute_path_progress(path_ids=None, enrollment_ids=None):
+    """
+    Recomputes `progress` and `status` for learning-path enrollments with
+    set-based UPDATEs. A path's progress is the mean progress of the
+    student's enrollments in its courses; a course the student is not
+    enrolled in counts as 0.
+
+    Args:
+        path_ids: Optional iterable restricting the update to these paths.
+        enrollment_ids: Optional iterable of enrollment ids restricting the
+            update to the path enrollments of their students.
+
+    Returns:
+        The number of path enrollments updated.
+    """
+    content_types = ContentType.objects.get_for_models(Course, LearningPath)
+    enrollments = Enrollment.objects.filter(content_type=content_types[LearningPath])
+    if path_ids is not None:
+        enrollments = enrollments.filter(object_id__in=list(path_ids))
+    if enrollment_ids is not None:
+        students = Enrollment.objects.filter(pk__in=list(enrollment_ids)).values('student')
+        enrollments = enrollments.filter(student__in=students)
+
+    path_courses = LearningPathModule.objects.filter(learning_path=OuterRef(OuterRef('object_id'))).values('course')
+    progress_total = Subquery(
+        Enrollment.objects.filter(
+            content_type=content_types[Course], student=OuterRef('student'), object_id__in=path_courses
+        ).values('student').annotate(total=Sum('progress')).values('total')
+    )
+    course_count = Subquery(
+        LearningPathModule.objects.filter(learning_path=OuterRef('object_id'))
+        .values('learning_path').annotate(total=Count('pk')).values('total')
+    )
+    mean_progress = Cast(Coalesce(progress_total, Value(0.0)), FloatField()) / Cast(course_count, FloatField())
+    updated = enrollments.update(
+        progress=Case(
+            When(GreaterThan(course_count, 0), then=Least(Round(mean_progress, 2), Value(100.0))),
+            When(status='completed', then=Value(100.0)),
+            default=Value(0.0),
+        )
+    )
+    enrollments.update(status=_status_from_progress())
+    return updated
+
+
+def refresh_path_progress(course_ids, enrollment_ids=None):
+    """
+    Recomputes the learning-path enrollments affected by progress changes
+    in `course_ids`. The paths come from the cached membership map, so
+    courses that belong to no path cost no queries.
+
+    Args:
+        course_ids: The courses whose enrollments' progress changed.
+        enrollment_ids: Optional iterable restricting the update to the
+            students of these enrollments.
+
+    Returns:
+        The number of path enrollments updated.
+    """
+    membership = get_path_membership()
+    path_ids = {path_id for course_id in course_ids for path_id in membership.get(course_id, ())}
+    if not path_ids:
+        return 0
+    return recompute_path_progress(path_ids, enrollment_ids)
+
+
+def reconcile_counters():
+    """
+    Repairs drift in the denormalized counters by recounting them from the
+    source tables, then recomputes all course and learning-path progress
+    and rebuilds the dashboard course cards.
+
+    Returns:
+        A tuple of (courses_fixed, enrollments_fixed).
+    """
+    actual_lessons = Coalesce(
+        Subquery(
+            Lesson.objects.filter(course=OuterRef('pk'))
+            .values('course').annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+    courses_fixed = Course.objects.annotate(actual=actual_lessons).exclude(lesson_count=F('actual')).count()
+    Course.objects.update(lesson_count=actual_lessons)
+
+    actual_completed = _completed_count_subquery()
+    enrollments_fixed = Enrollment.objects.annotate(actual=actual_completed).exclude(completed_count=F('actual')).count()
+    Enrollment.objects.update(completed_count=actual_completed)
+
+    recompute_course_progress()
+    refresh_course_cards()
+    return courses_fixed, enrollments_fixed
+
 
 def generate_certificate(enrollment):
     """
@@ -13,4 +472,4 @@ def generate_certificate(enrollment):
     This might call a reporting service.
     """
     # Logic to verify completion and then call a PDF generation service.
-    pass
\ No newline at end of file
+    pass
@@ -1,40 +1,77 @@
 # =================================================================
 # apps/enrollment/signals.py
 # -----------------------------------------------------------------
-# MIGRATION: Webhook payload updated to use the relational fields.
-# `enrollable_id` is now `object_id` and `enrollable_type` is
-# derived from the `content_type` relation.
+# PERFORMANCE: The new-enrollment webhook is no longer posted inside
+# the request. It is written to the webhook outbox in the same
+# transaction as the enrollment and delivered by the
+# `deliver_webhooks` worker with retries and backoff.
+# Enrollment and instructor changes also refresh the `CourseCard`
+# rows the student dashboard reads from, and new learning-path
+# enrollments start from the progress already made in the path's
+# courses.
 # =================================================================
 
-import requests
-import os
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
-from .models import Enrollment
+from .models import CourseCard, Enrollment
+from .services import recompute_path_progress, refresh_course_cards, refresh_path_progress
+from apps.core.services.webhooks import enqueue_webhook
+from apps.learning.models import Course, LearningPath
+from apps.users.models import CustomUser
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Enrollment fields the dashboard course card is derived from.
+CARD_SOURCE_FIELDS = {'student', 'content_type', 'object_id', 'progress', 'status', 'last_accessed_lesson'}
+INSTRUCTOR_NAME_FIELDS = {'full_name', 'username', 'first_name', 'last_name'}
+
 @receiver(post_save, sender=Enrollment)
 def trigger_new_enrollment_webhook(sender, instance, created, **kwargs):
     if created:
-        webhook_url = os.getenv('N8N_ENROLLMENT_CREATED_WEBHOOK_URL')
-
-        if not webhook_url:
-            logger.warning("N8N_ENROLLMENT_CREATED_WEBHOOK_URL is not set. Skipping webhook.")
-            return
-
         payload = {
             'enrollment_id': str(instance.pk),
-            'student_id': str(instance.student.pk),
+            'student_id': str(instance.student_id),
             'enrollable_id': str(instance.object_id),
-            'enrollable_type': instance.content_type.model, # e.g., 'course' or 'learningpath'
+            'enrollable_type': ContentType.objects.get_for_id(instance.content_type_id).model, # e.g., 'course' or 'learningpath'
             'enrollment_date': instance.enrollment_date.isoformat(),
         }
+        if enqueue_webhook('enrollment.created', 'N8N_ENROLLMENT_CREATED_WEBHOOK_URL', payload):
+            logger.info(f"Queued webhook for enrollment ID {instance.pk}")
+
+
+@receiver(m2m_changed, sender=Enrollment.completed_lessons.through)
+def sync_completed_count(sender, instance, action, reverse, **kwargs):
+    # The completion endpoint keeps `completed_count` in step itself; this
+    # covers edits made through the ORM relation (e.g. the admin form).
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    instance.completed_count = instance.completed_lessons.count()
+    instance.save(update_fields=['completed_count'])
+    instance.update_progress()
+    if instance.content_type_id == ContentType.objects.get_for_model(Course).pk:
+        refresh_path_progress([instance.object_id], enrollment_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Enrollment)
+def refresh_enrollment_card(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and not CARD_SOURCE_FIELDS & set(update_fields):
+        return
+    if instance.content_type_id == ContentType.objects.get_for_model(Course).pk:
+        refresh_course_cards(enrollment_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Enrollment)
+def roll_up_new_path_enrollment(sender, instance, created, **kwargs):
+    if created and instance.content_type_id == ContentType.objects.get_for_model(LearningPath).pk:
+        recompute_path_progress(path_ids=[instance.object_id], enrollment_ids=[instance.pk])
+
 
-        try:
-            response = requests.post(webhook_url, json=payload, timeout=5)
-            response.raise_for_status()
-            logger.info(f"Successfully sent webhook for enrollment ID {instance.pk}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send webhook for enrollment ID {instance.pk}: {e}")
\ No newline at end of file
+@receiver(post_save, sender=CustomUser)
+def sync_instructor_name_on_cards(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and not INSTRUCTOR_NAME_FIELDS & set(update_fields)):
+        return
+    CourseCard.objects.filter(course__instructor=instance).update(
+        instructor_name=instance.full_name or instance.username
+    )
@@ -0,0 +1,492 @@
+# =================================================================
+# apps/enrollment/tests.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Covers the incremental progress accounting used by the
+# "Complete & Continue" endpoint and the counter reconciliation.
+# =================================================================
+from io import StringIO
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.core.views.dashboards import DashboardView
+from apps.enrollment.models import CourseCard, Enrollment, QuizAttempt, resolve_enrollables
+from apps.learning.models import Answer, Course, LearningPath, LearningPathModule, Lesson, Question
+from apps.learning.services import bump_quiz_version
+from apps.users.models import CustomUser
+
+class ProgressAccountingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='learner', password='password123')
+        cls.course = Course.objects.create(title="Django Basics", slug='django-basics', description="", category="Web")
+        cls.lessons = [
+            Lesson.objects.create(course=cls.course, title=f"Lesson {i}", order=i, content_type='text_editor')
+            for i in range(1, 5)
+        ]
+        cls.enrollment = Enrollment.objects.create(
+            student=cls.student,
+            content_type=ContentType.objects.get_for_model(Course),
+            object_id=cls.course.pk
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.student)
+        self.url = reverse('enrollment-api:enrollment-mark-lesson-complete')
+
+    def complete(self, lesson):
+        return self.client.post(self.url, {'course_id': self.course.pk, 'lesson_id': lesson.pk})
+
+    def test_lesson_count_is_maintained(self):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.lesson_count, 4)
+
+    def test_completion_updates_progress(self):
+        response = self.complete(self.lessons[0])
+        self.assertEqual(response.data['progress'], 25.0)
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_count, 1)
+        self.assertEqual(self.enrollment.progress, 25.0)
+        self.assertEqual(self.enrollment.last_accessed_lesson_id, self.lessons[0].pk)
+
+    def test_repeated_completion_is_idempotent(self):
+        self.complete(self.lessons[0])
+        response = self.complete(self.lessons[0])
+        self.assertEqual(response.data['progress'], 25.0)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_count, 1)
+
+    def test_completing_all_lessons_completes_enrollment(self):
+        for lesson in self.lessons:
+            response = self.complete(lesson)
+        self.assertEqual(response.data['progress'], 100)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.status, 'completed')
+        self.assertEqual(self.enrollment.progress, 100)
+
+    def test_added_lesson_reopens_completed_enrollment(self):
+        for lesson in self.lessons:
+            self.complete(lesson)
+        Lesson.objects.create(course=self.course, title="Lesson 5", order=5, content_type='text_editor')
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.status, 'in_progress')
+        self.assertEqual(self.enrollment.progress, 80.0)
+        card = CourseCard.objects.get(pk=self.enrollment.pk)
+        self.assertEqual((card.status, card.progress), ('in_progress', 80.0))
+
+    def test_moving_a_lesson_updates_both_courses(self):
+        other = Course.objects.create(title="Django Advanced", slug='django-advanced', description="", category="Web")
+        Lesson.objects.create(course=other, title="Advanced 1", order=1, content_type='text_editor')
+        for lesson in self.lessons:
+            self.complete(lesson)
+
+        moved = Lesson.objects.get(pk=self.lessons[3].pk)
+        moved.course, moved.order = other, 2
+        moved.save()
+
+        self.course.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.course.lesson_count, other.lesson_count), (3, 2))
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_count, 3)
+        self.assertEqual(self.enrollment.completed_lessons.count(), 3)
+        self.assertEqual((self.enrollment.status, self.enrollment.progress), ('completed', 100))
+
+        moved.course, moved.order = self.course, 4
+        moved.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.status, self.enrollment.progress), ('in_progress', 75.0))
+
+    def test_query_count_is_independent_of_course_size(self):
+        self.complete(self.lessons[0])
+        for i in range(5, 50):
+            Lesson.objects.create(course=self.course, title=f"Lesson {i}", order=i, content_type='text_editor')
+        # enrollment, lesson, savepoint + insert + release, enrollment and card updates
+        with self.assertNumQueries(7):
+            self.complete(self.lessons[1])
+
+    def test_lesson_changes_keep_counters_correct(self):
+        self.complete(self.lessons[0])
+        self.complete(self.lessons[1])
+
+        self.lessons[0].delete()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_count, 1)
+        self.assertEqual(self.enrollment.progress, round(100 / 3, 2))
+
+        Lesson.objects.create(course=self.course, title="Lesson 5", order=5, content_type='text_editor')
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, 25.0)
+
+    def test_reconcile_repairs_drift(self):
+        self.complete(self.lessons[0])
+        Course.objects.filter(pk=self.course.pk).update(lesson_count=40)
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(completed_count=7, progress=3)
+
+        call_command('reconcile_progress', stdout=StringIO())
+
+        self.course.refresh_from_db()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.course.lesson_count, 4)
+        self.assertEqual(self.enrollment.completed_count, 1)
+        self.assertEqual(self.enrollment.progress, 25.0)
+
+
+class BatchCompletionTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='syncer', password='password123')
+        course_content_type = ContentType.objects.get_for_model(Course)
+        cls.courses, cls.lessons = [], {}
+        for n in range(2):
+            course = Course.objects.create(title=f"Course {n}", slug=f'course-{n}', description="", category="Web")
+            cls.courses.append(course)
+            cls.lessons[course.pk] = [
+                Lesson.objects.create(course=course, title=f"Lesson {i}", order=i, content_type='video')
+                for i in range(1, 3)
+            ]
+            Enrollment.objects.create(student=cls.student, content_type=course_content_type, object_id=course.pk)
+        cls.other_course = Course.objects.create(title="Not Enrolled", slug='not-enrolled', description="", category="Web")
+        cls.other_lesson = Lesson.objects.create(course=cls.other_course, title="Other", order=1, content_type='video')
+
+    def setUp(self):
+        self.client.force_authenticate(self.student)
+        self.url = reverse('enrollment-api:enrollment-mark-lessons-complete')
+
+    def test_batch_reports_per_item_results(self):
+        first, second = self.courses
+        payload = {'completions': [
+            {'course_id': first.pk, 'lesson_id': self.lessons[first.pk][0].pk, 'completed_at': '2026-01-02T10:00:00Z'},
+            {'course_id': first.pk, 'lesson_id': self.lessons[first.pk][0].pk},
+            {'course_id': second.pk, 'lesson_id': self.lessons[second.pk][0].pk},
+            {'course_id': second.pk, 'lesson_id': self.lessons[second.pk][1].pk},
+            {'course_id': first.pk, 'lesson_id': self.lessons[second.pk][0].pk},
+            {'course_id': self.other_course.pk, 'lesson_id': self.other_lesson.pk},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['completed', 'already_completed', 'completed', 'completed', 'not_found', 'not_enrolled']
+        )
+        self.assertEqual(response.data['progress'], {first.pk: 50.0, second.pk: 100.0})
+
+        enrollment = Enrollment.objects.get(student=self.student, object_id=second.pk)
+        self.assertEqual(enrollment.completed_count, 2)
+        self.assertEqual(enrollment.status, 'completed')
+        self.assertEqual(enrollment.last_accessed_lesson_id, self.lessons[second.pk][1].pk)
+
+    def test_batch_query_count_is_fixed(self):
+        completions = [
+            {'course_id': course.pk, 'lesson_id': lesson.pk}
+            for course in self.courses for lesson in self.lessons[course.pk]
+        ]
+        with self.assertNumQueries(13):
+            self.client.post(self.url, {'completions': completions}, format='json')
+
+    def test_malformed_batch_is_rejected(self):
+        response = self.client.post(self.url, {'completions': [{'course_id': 'x'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class QuizAttemptTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='quizzer', password='password123')
+        cls.course = Course.objects.create(title="Quizzes", slug='quizzes', description="", category="Web")
+        cls.lesson = Lesson.objects.create(course=cls.course, title="Quiz", order=1, content_type='quiz')
+        cls.correct = []
+        for n in range(1, 3):
+            question = Question.objects.create(lesson=cls.lesson, question_text=f"Question {n}")
+            cls.correct.append(Answer.objects.create(question=question, answer_text="Right", is_correct=True))
+            Answer.objects.create(question=question, answer_text="Wrong")
+        cls.enrollment = Enrollment.objects.create(
+            student=cls.student,
+            content_type=ContentType.objects.get_for_model(Course),
+            object_id=cls.course.pk
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_submission_creates_attempt_row(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.post(reverse('enrollment-api:enrollment-submit-quiz'), {
+            'course_id': self.course.pk,
+            'lesson_id': self.lesson.pk,
+            'answers[question_1]': self.correct[0].pk,
+            'answers[question_2]': 0,
+        })
+
+        attempt = QuizAttempt.objects.get(enrollment=self.enrollment)
+        self.assertEqual(attempt.score, 50.0)
+        self.assertIn(str(attempt.attempt_id), response.data['result_url'])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.quiz_attempts, [])
+
+    def test_grading_uses_cached_answer_key(self):
+        self.client.force_authenticate(self.student)
+        url = reverse('enrollment-api:enrollment-submit-quiz')
+        payload = {
+            'course_id': self.course.pk,
+            'lesson_id': self.lesson.pk,
+            'answers[question_1]': self.correct[0].pk,
+            'answers[question_2]': self.correct[1].pk,
+        }
+        self.client.post(url, payload)
+        # enrollment, lesson, attempt insert: no question or answer queries
+        with self.assertNumQueries(3):
+            self.client.post(url, payload)
+
+        # Rebuilding the quiz retires the compiled key.
+        Answer.objects.filter(pk=self.correct[1].pk).update(is_correct=False)
+        bump_quiz_version(self.lesson)
+        self.client.post(url, payload)
+        self.assertEqual(QuizAttempt.objects.order_by('-submitted_at', '-pk').first().score, 50.0)
+
+    def test_legacy_blobs_are_migrated(self):
+        legacy = {
+            'attempt_id': '6f1c1d9e-52d4-4a4e-9d0a-0d4f3b1c2a10',
+            'lesson_id': str(self.lesson.pk),
+            'score': 100.0,
+            'submitted_at': '2025-03-01T09:30:00',
+            'answers': {'question_1': str(self.correct[0].pk)},
+        }
+        orphaned = {**legacy, 'attempt_id': '0b7e2f4a-1c3d-4e5f-8a9b-0c1d2e3f4a5b', 'lesson_id': '999999'}
+        unmigrated = [{'lesson_id': 'gone'}, orphaned, "garbage"]
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(quiz_attempts=[legacy, *unmigrated])
+
+        for _ in range(2):
+            output = StringIO()
+            with self.assertLogs('apps.enrollment.management.commands.migrate_quiz_attempts', 'WARNING') as logs:
+                call_command('migrate_quiz_attempts', stdout=output)
+            self.assertEqual(len(logs.records), 3)
+            self.assertIn("skipped 3 malformed or orphaned", output.getvalue())
+
+        attempt = QuizAttempt.objects.get(enrollment=self.enrollment)
+        self.assertEqual(str(attempt.attempt_id), legacy['attempt_id'])
+        self.assertEqual(attempt.answers, legacy['answers'])
+        # The attempts that could not be migrated stay in the blob.
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.quiz_attempts, unmigrated)
+
+
+class CourseCardTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = CustomUser.objects.create_user(username='teacher', password='password123', role='instructor')
+        cls.student = CustomUser.objects.create_user(username='carded', password='password123')
+        course_content_type = ContentType.objects.get_for_model(Course)
+        cls.courses, cls.enrollments = [], []
+        for n in range(3):
+            course = Course.objects.create(
+                title=f"Card Course {n}", slug=f'card-course-{n}', description="", category="Web", instructor=cls.instructor
+            )
+            for i in range(1, 5):
+                Lesson.objects.create(course=course, title=f"Lesson {i}", order=i, content_type='text_editor')
+            cls.courses.append(course)
+            cls.enrollments.append(
+                Enrollment.objects.create(student=cls.student, content_type=course_content_type, object_id=course.pk)
+            )
+
+    def card(self, n):
+        return CourseCard.objects.get(pk=self.enrollments[n].pk)
+
+    def render_dashboard(self):
+        request = RequestFactory().get('/dashboard/')
+        request.user = self.student
+        with mock.patch('apps.core.views.dashboards.render', return_value=HttpResponse()) as render:
+            DashboardView.as_view()(request)
+        return render.call_args.args[2]
+
+    def test_dashboard_is_one_query(self):
+        with self.assertNumQueries(1):
+            context = self.render_dashboard()
+        cards = context['course_cards']
+        self.assertEqual([card.course_title for card in cards], ["Card Course 0", "Card Course 1", "Card Course 2"])
+        self.assertEqual(cards[0].instructor_name, 'teacher')
+        self.assertEqual(cards[0].continue_url, reverse('learning:lesson_detail', kwargs={
+            'course_slug': 'card-course-0', 'lesson_order': 1
+        }))
+
+    def test_cards_follow_progress_and_course_changes(self):
+        lesson = self.courses[0].lessons.get(order=3)
+        self.client.force_authenticate(self.student)
+        self.client.post(
+            reverse('enrollment-api:enrollment-mark-lesson-complete'),
+            {'course_id': self.courses[0].pk, 'lesson_id': lesson.pk}
+        )
+        card = self.card(0)
+        self.assertEqual((card.progress, card.continue_lesson_order), (25.0, 3))
+
+        self.courses[1].title = "Renamed"
+        self.courses[1].save()
+        self.instructor.full_name = "Dr. Teacher"
+        self.instructor.save()
+        card = self.card(1)
+        self.assertEqual((card.course_title, card.instructor_name), ("Renamed", "Dr. Teacher"))
+
+        # Deleting the last accessed lesson falls back to the first lesson.
+        lesson.delete()
+        card = self.card(0)
+        self.assertEqual((card.progress, card.continue_lesson_order), (0.0, 1))
+
+    def test_reconcile_rebuilds_cards(self):
+        CourseCard.objects.all().delete()
+        call_command('reconcile_progress', stdout=StringIO())
+        self.assertEqual(CourseCard.objects.filter(student=self.student).count(), 3)
+        self.assertEqual(self.card(2).course_slug, 'card-course-2')
+
+
+class EnrollableResolutionTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='resolver', password='password123')
+        course_type = ContentType.objects.get_for_model(Course)
+        path_type = ContentType.objects.get_for_model(LearningPath)
+        for n in range(4):
+            course = Course.objects.create(title=f"GFK Course {n}", slug=f'gfk-{n}', description="", category="Web")
+            path = LearningPath.objects.create(title=f"GFK Path {n}", description="")
+            student = CustomUser.objects.create_user(username=f'resolver{n}')
+            Enrollment.objects.create(student=student, content_type=course_type, object_id=course.pk)
+            Enrollment.objects.create(student=student, content_type=path_type, object_id=path.pk)
+
+    def test_list_costs_one_query_per_content_type(self):
+        self.client.force_authenticate(self.student)
+        # The enrollments (with students), then courses, then learning paths.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('enrollment-api:enrollment-list'))
+        enrollables = [row['enrollable'] for row in response.data['results']]
+        self.assertEqual(len(enrollables), 8)
+        self.assertEqual({item['type'] for item in enrollables}, {'course', 'learningpath'})
+        last_path = LearningPath.objects.get(title="GFK Path 3")
+        self.assertEqual(enrollables[-1], {'type': 'learningpath', 'id': last_path.pk, 'title': "GFK Path 3"})
+
+    def test_resolve_loaded_enrollments(self):
+        enrollments = list(Enrollment.objects.all())
+        with self.assertNumQueries(2):
+            resolve_enrollables(enrollments)
+            titles = sorted(str(enrollment.enrollable) for enrollment in enrollments)
+        self.assertEqual(titles[:2], ["GFK Course 0", "GFK Course 1"])
+
+
+class PathProgressTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='pathfinder', password='password123')
+        cls.path = LearningPath.objects.create(title="Web Diploma", description="")
+        cls.courses, cls.lessons = [], {}
+        for n in range(2):
+            course = Course.objects.create(title=f"Path Course {n}", slug=f'path-course-{n}', description="", category="Web")
+            cls.courses.append(course)
+            cls.lessons[course.pk] = [
+                Lesson.objects.create(course=course, title=f"Lesson {i}", order=i, content_type='video')
+                for i in range(1, 3)
+            ]
+            LearningPathModule.objects.create(learning_path=cls.path, course=course, order=n + 1)
+        course_type = ContentType.objects.get_for_model(Course)
+        cls.course_enrollments = [
+            Enrollment.objects.create(student=cls.student, content_type=course_type, object_id=course.pk)
+            for course in cls.courses
+        ]
+        cls.path_enrollment = Enrollment.objects.create(
+            student=cls.student, content_type=ContentType.objects.get_for_model(LearningPath), object_id=cls.path.pk
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.student)
+
+    def complete(self, course, lesson):
+        return self.client.post(
+            reverse('enrollment-api:enrollment-mark-lesson-complete'), {'course_id': course.pk, 'lesson_id': lesson.pk}
+        )
+
+    def path_progress(self):
+        self.path_enrollment.refresh_from_db()
+        return self.path_enrollment.progress
+
+    def test_course_completion_rolls_up_to_path(self):
+        first, second = self.courses
+        self.complete(first, self.lessons[first.pk][0])
+        self.assertEqual(self.path_progress(), 25.0)
+
+        self.client.post(reverse('enrollment-api:enrollment-mark-lessons-complete'), {'completions': [
+            {'course_id': first.pk, 'lesson_id': self.lessons[first.pk][1].pk},
+            {'course_id': second.pk, 'lesson_id': self.lessons[second.pk][0].pk},
+            {'course_id': second.pk, 'lesson_id': self.lessons[second.pk][1].pk},
+        ]}, format='json')
+        self.assertEqual(self.path_progress(), 100)
+        self.assertEqual(self.path_enrollment.status, 'completed')
+
+    def test_other_students_paths_are_untouched(self):
+        other = CustomUser.objects.create_user(username='bystander')
+        other_enrollment = Enrollment.objects.create(
+            student=other, content_type=ContentType.objects.get_for_model(LearningPath), object_id=self.path.pk
+        )
+        Enrollment.objects.filter(pk=other_enrollment.pk).update(progress=42)
+        self.complete(self.courses[0], self.lessons[self.courses[0].pk][0])
+        other_enrollment.refresh_from_db()
+        self.assertEqual(other_enrollment.progress, 42)
+
+    def test_structure_changes_recompute_path(self):
+        first, second = self.courses
+        self.complete(first, self.lessons[first.pk][0])
+        self.complete(first, self.lessons[first.pk][1])
+        self.assertEqual(self.path_progress(), 50.0)
+
+        LearningPathModule.objects.filter(learning_path=self.path, course=second).delete()
+        self.assertEqual(self.path_progress(), 100)
+
+    def test_structure_update_recomputes_once(self):
+        first, second = self.courses
+        self.complete(first, self.lessons[first.pk][0])
+        self.complete(first, self.lessons[first.pk][1])
+        self.client.force_authenticate(CustomUser.objects.create_user(username='path-admin', is_staff=True))
+        url = reverse('learning-api:learningpath-update-structure', args=[self.path.pk])
+
+        def capture(course_ids):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.post(url, {'course_ids': course_ids}, format='json').status_code, 200)
+            return len(queries)
+
+        extra = [
+            Course.objects.create(title=f"Extra {n}", slug=f'extra-{n}', description="", category="Web").pk
+            for n in range(6)
+        ]
+        self.assertEqual(capture([first.pk, second.pk] + extra), capture([second.pk, first.pk, 'x', first.pk]))
+        self.assertEqual(
+            list(LearningPathModule.objects.filter(learning_path=self.path).values_list('course_id', flat=True)),
+            [second.pk, first.pk],
+        )
+        self.assertEqual(self.path_progress(), 50.0)
+        capture([first.pk])
+        self.assertEqual(self.path_progress(), 100)
+
+    def test_courses_outside_paths_cost_no_extra_queries(self):
+        lone = Course.objects.create(title="Standalone", slug='standalone', description="", category="Web")
+        lessons = [
+            Lesson.objects.create(course=lone, title=f"Lesson {i}", order=i, content_type='video') for i in range(1, 3)
+        ]
+        Enrollment.objects.create(student=self.student, content_type=ContentType.objects.get_for_model(Course), object_id=lone.pk)
+        self.complete(lone, lessons[0])
+        # enrollment, lesson, savepoint + insert + release, enrollment and card updates
+        with self.assertNumQueries(7):
+            self.complete(lone, lessons[1])
+
+    def test_backfill_command_recomputes_all_paths(self):
+        Enrollment.objects.filter(pk=self.course_enrollments[0].pk).update(progress=100)
+        Enrollment.objects.filter(pk=self.course_enrollments[1].pk).update(progress=50)
+        call_command('recompute_path_progress', stdout=StringIO())
+        self.assertEqual(self.path_progress(), 75.0)
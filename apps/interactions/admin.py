@@ -7,7 +7,7 @@
 # =================================================================
 
 from django.contrib import admin
-from .models import DiscussionThread, DiscussionPost
+from .models import DiscussionThread, DiscussionPost, PinnedAnswer
 
 @admin.register(DiscussionThread)
 class DiscussionThreadAdmin(admin.ModelAdmin):
@@ -25,4 +25,10 @@ class DiscussionPostInline(admin.TabularInline):
 class DiscussionPostAdmin(admin.ModelAdmin):
     list_display = ('thread', 'user', 'created_at')
     search_fields = ('reply_text',)
-    autocomplete_fields = ('thread', 'user')
\ No newline at end of file
+    autocomplete_fields = ('thread', 'user')
+
+@admin.register(PinnedAnswer)
+class PinnedAnswerAdmin(admin.ModelAdmin):
+    list_display = ('question', 'lesson', 'pinned_by', 'updated_at')
+    search_fields = ('question', 'answer')
+    autocomplete_fields = ('lesson', 'pinned_by')
@@ -1,9 +1,22 @@
 from rest_framework import serializers
 
+from apps.interactions.models import PinnedAnswer
+
 class AIQuestionSerializer(serializers.Serializer):
     """
     Serializer for validating the incoming AI assistant question.
     """
     question = serializers.CharField(max_length=1000)
     course_id = serializers.CharField(max_length=24)
-    lesson_id = serializers.CharField(max_length=24)
\ No newline at end of file
+    lesson_id = serializers.CharField(max_length=24)
+
+
+class PinnedAnswerSerializer(serializers.ModelSerializer):
+    """
+    An instructor's canonical answer. Pinning the same (normalized) question
+    again replaces the earlier answer.
+    """
+    class Meta:
+        model = PinnedAnswer
+        fields = ['id', 'lesson', 'question', 'answer', 'pinned_by', 'updated_at']
+        read_only_fields = ['pinned_by', 'updated_at']
@@ -6,7 +6,7 @@
 # =================================================================
 
 from django.urls import path
-from .views import AIAssistantApiView
+from .views import AIAssistantApiView, AIAssistantMetricsApiView, PinnedAnswerApiView, ai_assistant_stream
 
 # This is NOT an app_name for frontend URLs, but for API versioning.
 app_name = 'interactions_api'
@@ -15,4 +15,8 @@ urlpatterns = [
     # This URL directly matches the endpoint defined in the foundational document.
     # It's the single point of contact for the frontend to ask the AI a question.
     path('ai-assistant/ask/', AIAssistantApiView.as_view(), name='ai_ask'),
+    # Streamed (server-sent events) variant used by the chat form.
+    path('ai-assistant/stream/', ai_assistant_stream, name='ai_stream'),
+    path('ai-assistant/pins/', PinnedAnswerApiView.as_view(), name='ai_pin'),
+    path('ai-assistant/metrics/', AIAssistantMetricsApiView.as_view(), name='ai_metrics'),
 ]
\ No newline at end of file
@@ -3,16 +3,29 @@
 # -----------------------------------------------------------------
 # MIGRATION: The context-building logic for the AI assistant is
 # updated to fetch Course and Lesson objects using the relational ORM.
+# PERFORMANCE: Answers go through the AI answer cache; instructors
+# can pin canonical answers, and staff can read the cache and
+# upstream guard metrics.
+# `ai_assistant_stream` is an async view that relays the answer as
+# server-sent events while it is generated; served over ASGI, the
+# model call does not hold a request worker.
 # =================================================================
 
+import json
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
 
-from .serializers import AIQuestionSerializer
-from apps.interactions.services import AIAssistantService
-from apps.learning.models import Course, Lesson
+from .serializers import AIQuestionSerializer, PinnedAnswerSerializer
+from apps.interactions.models import PinnedAnswer, normalize_question
+from apps.interactions.resilience import get_assistant_guard
+from apps.interactions.services import AIAssistantService, AnswerCache
+from apps.learning.models import Lesson
+from apps.users.api.permissions import IsAdminOrSupervisorRole
 
 class AIAssistantApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -28,19 +41,85 @@ class AIAssistantApiView(APIView):
         lesson_id = validated_data['lesson_id']
 
         try:
-            course = get_object_or_404(Course, pk=course_id)
-            lesson = get_object_or_404(Lesson, pk=lesson_id, course=course)
-
-            context = {
-                "course_title": course.title,
-                "lesson_title": lesson.title,
-                "lesson_content": lesson.content_data.get('description', 'No textual content available for this lesson.')
-            }
+            lesson = get_object_or_404(Lesson.objects.select_related('course'), pk=lesson_id, course_id=course_id)
 
             ai_service = AIAssistantService()
-            answer = ai_service.get_answer(question=question, context=context)
-            
-            return Response({'answer': answer}, status=status.HTTP_200_OK)
+            answer, source = ai_service.answer_for_lesson(lesson, question)
+
+            return Response({'answer': answer, 'source': source}, status=status.HTTP_200_OK)
 
         except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PinnedAnswerApiView(APIView):
+    """
+    Lets the course instructor (or an admin) pin a canonical answer for a
+    lesson question. POSTing a question that is already pinned replaces
+    its answer.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = PinnedAnswerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lesson = serializer.validated_data['lesson']
+        if not (request.user.role == 'admin' or lesson.course.instructor_id == request.user.pk):
+            return Response(
+                {'detail': "Only the course instructor can pin answers."}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        pin = PinnedAnswer.objects.filter(
+            lesson=lesson, normalized_question=normalize_question(serializer.validated_data['question'])
+        ).first()
+        serializer = PinnedAnswerSerializer(pin, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(pinned_by=request.user)
+        return Response(serializer.data, status=status.HTTP_200_OK if pin else status.HTTP_201_CREATED)
+
+
+class AIAssistantMetricsApiView(APIView):
+    """
+    Answer cache counters, and this process's upstream guard metrics: queue
+    depth, in-flight and coalesced calls, circuit state and latency.
+    """
+    permission_classes = [IsAdminOrSupervisorRole]
+
+    def get(self, request, *args, **kwargs):
+        return Response({'cache': AnswerCache().stats(), 'upstream': get_assistant_guard().stats()})
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@require_POST
+async def ai_assistant_stream(request):
+    """
+    Streams the answer to a lesson question as server-sent events: a
+    `token` event per chunk of text, then `done` (with the answer source)
+    or `error` (with a message for the student).
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': "Authentication credentials were not provided."}, status=403)
+
+    serializer = AIQuestionSerializer(data=request.POST)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    validated_data = serializer.validated_data
+
+    lesson = await Lesson.objects.select_related('course').filter(
+        pk=validated_data['lesson_id'], course_id=validated_data['course_id']
+    ).afirst()
+    if lesson is None:
+        return JsonResponse({'detail': "Lesson not found."}, status=404)
+
+    async def events():
+        async for event, data in AIAssistantService().stream_answer_for_lesson(lesson, validated_data['question']):
+            yield _sse_event(event, data)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # let nginx pass events through unbuffered
+    return response
@@ -0,0 +1,155 @@
+# =================================================================
+# apps/interactions/discussions.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Lesson discussion threads are served a page at a
+# time with keyset pagination on (created_at, id), newest first. A
+# page is an index range scan on (lesson, created_at, id) however
+# deep the student scrolls, unlike OFFSET, and threads posted while
+# they read do not shift later pages (see apps/core/pagination.py).
+#
+# `thread_queryset()` is the one way threads are loaded for display:
+# the author is joined, the reply count is annotated, and the
+# replies are prefetched in order with their authors. A page of
+# threads, however many, renders in two queries, and so does a
+# single thread after a reply is posted.
+#
+# Whether an instructor has replied is stored, not computed: the
+# signals call `record_reply` / `refresh_answered` as posts come and
+# go, which keep `DiscussionThread.answered` and
+# `Course.unanswered_thread_count` in step with conditional UPDATEs.
+# The instructor dashboard reads the counters and the unanswered
+# queue walks a partial index of unanswered threads.
+# =================================================================
+
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, Max, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import DiscussionPost, DiscussionThread
+from apps.core.pagination import keyset_page
+from apps.learning.models import Course
+from apps.users.models import CustomUser
+
+THREADS_PER_PAGE = 20
+
+
+def thread_queryset():
+    """
+    Threads ready for rendering. Each carries `reply_count` and
+    `ordered_posts` (its replies, oldest first, with `user` loaded).
+    """
+    replies = DiscussionPost.objects.select_related('user').order_by('created_at', 'pk')
+    return (
+        DiscussionThread.objects.select_related('student')
+        .annotate(reply_count=Count('posts'))
+        .prefetch_related(Prefetch('posts', queryset=replies, to_attr='ordered_posts'))
+    )
+
+
+def _threads_page(threads, ordering, cursor, page_size):
+    page = keyset_page(threads, ordering, cursor, page_size)
+    return {'threads': page['results'], 'next_cursor': page['next_cursor']}
+
+
+def lesson_threads_page(lesson_pk, cursor=None, page_size=THREADS_PER_PAGE):
+    """
+    Returns one page of a lesson's threads, newest first.
+
+    Args:
+        lesson_pk: The lesson whose threads are listed.
+        cursor: The `next_cursor` of the previous page, or None for the first.
+        page_size: The number of threads per page.
+
+    Returns:
+        A dict with `threads` (a list) and `next_cursor` (None on the last page).
+
+    Raises:
+        InvalidCursor: If `cursor` is malformed.
+    """
+    return _threads_page(thread_queryset().filter(lesson_id=lesson_pk), ('-created_at', '-pk'), cursor, page_size)
+
+
+def unanswered_threads_page(instructor, cursor=None, page_size=THREADS_PER_PAGE):
+    """
+    Returns one page of the threads no instructor has replied to in the
+    courses `instructor` teaches, oldest first. Same shape as
+    `lesson_threads_page`.
+    """
+    threads = thread_queryset().filter(answered=False, course__instructor=instructor).select_related('course', 'lesson')
+    return _threads_page(threads, ('created_at', 'pk'), cursor, page_size)
+
+
+def record_reply(post):
+    """ Marks the thread of a new instructor reply as answered. """
+    if post.user.role != CustomUser.Roles.INSTRUCTOR:
+        return
+    newly_answered = DiscussionThread.objects.filter(pk=post.thread_id, answered=False).update(
+        answered=True, last_instructor_reply_at=post.created_at
+    )
+    if newly_answered:
+        Course.objects.filter(discussion_threads=post.thread_id).update(
+            unanswered_thread_count=Greatest(F('unanswered_thread_count') - 1, 0)
+        )
+    else:
+        DiscussionThread.objects.filter(pk=post.thread_id).update(last_instructor_reply_at=post.created_at)
+
+
+def refresh_answered(thread_id):
+    """ Re-derives a thread's answered state from its remaining instructor replies. """
+    last_reply_at = DiscussionPost.objects.filter(
+        thread_id=thread_id, user__role=CustomUser.Roles.INSTRUCTOR
+    ).aggregate(last=Max('created_at'))['last']
+    if last_reply_at is not None:
+        DiscussionThread.objects.filter(pk=thread_id).update(last_instructor_reply_at=last_reply_at)
+        return
+    reopened = DiscussionThread.objects.filter(pk=thread_id, answered=True).update(
+        answered=False, last_instructor_reply_at=None
+    )
+    if reopened:
+        Course.objects.filter(discussion_threads=thread_id).update(
+            unanswered_thread_count=F('unanswered_thread_count') + 1
+        )
+
+
+def _unanswered_count_subquery():
+    return Coalesce(
+        Subquery(
+            DiscussionThread.objects.filter(course=OuterRef('pk'), answered=False)
+            .values('course').annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def recount_unanswered(course_ids=None):
+    """ Recounts `Course.unanswered_thread_count` from the threads (all courses by default). """
+    courses = Course.objects.all() if course_ids is None else Course.objects.filter(pk__in=course_ids)
+    courses.update(unanswered_thread_count=_unanswered_count_subquery())
+
+
+def reconcile_discussion_counters():
+    """
+    Re-derives every thread's answered state from its instructor replies,
+    then recounts the per-course counters.
+
+    Returns:
+        A tuple of (threads_fixed, courses_fixed).
+    """
+    last_reply = Subquery(
+        DiscussionPost.objects.filter(thread=OuterRef('pk'), user__role=CustomUser.Roles.INSTRUCTOR)
+        .values('thread').annotate(last=Max('created_at')).values('last')
+    )
+    threads = DiscussionThread.objects.annotate(actual=last_reply)
+    threads_fixed = threads.filter(
+        Q(answered=True, actual__isnull=True) | Q(answered=False, actual__isnull=False)
+        | ~Q(last_instructor_reply_at=F('actual'))
+    ).count()
+    DiscussionThread.objects.update(last_instructor_reply_at=last_reply)
+    DiscussionThread.objects.update(
+        answered=ExpressionWrapper(Q(last_instructor_reply_at__isnull=False), output_field=BooleanField())
+    )
+
+    courses_fixed = Course.objects.annotate(actual=_unanswered_count_subquery()).exclude(
+        unanswered_thread_count=F('actual')
+    ).count()
+    recount_unanswered()
+    return threads_fixed, courses_fixed
@@ -0,0 +1,26 @@
+# =================================================================
+# apps/interactions/management/commands/reconcile_discussion_counters.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Re-derives the threads' `answered` flags and
+# `last_instructor_reply_at` from their replies and recounts
+# `Course.unanswered_thread_count`. The signals keep them current,
+# so this backfills existing threads once and repairs drift after
+# bulk operations that bypass the signals.
+# =================================================================
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.interactions.discussions import reconcile_discussion_counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes which discussion threads have an instructor reply and the per-course unanswered counters."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            threads_fixed, courses_fixed = reconcile_discussion_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled discussion counters: {threads_fixed} thread(s) and "
+            f"{courses_fixed} course(s) had drifted."
+        ))
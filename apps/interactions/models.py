@@ -5,11 +5,30 @@
 # Converted `lesson_id` and `course_id` from CharField to proper
 # ForeignKey relationships to ensure relational integrity with the
 # newly structured learning models.
+# PERFORMANCE: `PinnedAnswer` holds instructor-approved answers that
+# the AI assistant returns without calling the model.
+# Threads are indexed on (lesson, created_at, id), the key of the
+# lesson's paginated thread list (see discussions.py). Whether an
+# instructor has replied is stored on the thread (`answered`) and
+# counted per course (`Course.unanswered_thread_count`) by the
+# signals; a partial index covers the unanswered threads only.
 # =================================================================
 
-from django.db import models
+import re
+import unicodedata
+
+from django.db import models, transaction
 from django.conf import settings
 
+
+def normalize_question(text: str) -> str:
+    """
+    Folds a question to the form answers are matched on: Unicode-normalized,
+    lower-cased, punctuation removed and whitespace collapsed.
+    """
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
 class DiscussionThread(models.Model):
     """
     Represents a discussion thread related to a specific lesson.
@@ -20,10 +39,29 @@ class DiscussionThread(models.Model):
     title = models.CharField(max_length=255)
     question = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by the DiscussionPost signals; see discussions.py.
+    answered = models.BooleanField(default=False, editable=False)
+    last_instructor_reply_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lesson', 'created_at', 'id']),
+            # The instructors' unanswered queue, oldest first.
+            models.Index(
+                fields=['course', 'created_at', 'id'], condition=models.Q(answered=False),
+                name='thread_unanswered_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # The post_save receivers write to the webhook outbox; keeping them in
+        # the same transaction makes the event durable exactly when this row is.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
 class DiscussionPost(models.Model):
     """
     Represents a single reply within a discussion thread.
@@ -34,4 +72,29 @@ class DiscussionPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Reply by {self.user.username} on {self.thread.title}"
\ No newline at end of file
+        return f"Reply by {self.user.username} on {self.thread.title}"
+
+class PinnedAnswer(models.Model):
+    """
+    An instructor's canonical answer to a question about a lesson. The AI
+    assistant returns it for any question that normalizes to the same text.
+    """
+    lesson = models.ForeignKey('learning.Lesson', on_delete=models.CASCADE, related_name='pinned_answers')
+    question = models.CharField(max_length=1000)
+    normalized_question = models.CharField(max_length=1000, editable=False)
+    answer = models.TextField()
+    pinned_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lesson', 'normalized_question'], name='unique_pinned_answer'),
+        ]
+
+    def __str__(self):
+        return self.question[:80]
+
+    def save(self, *args, **kwargs):
+        self.normalized_question = normalize_question(self.question)
+        super().save(*args, **kwargs)
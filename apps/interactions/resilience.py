@@ -0,0 +1,397 @@
+# =================================================================
+# apps/interactions/resilience.py
+# -----------------------------------------------------------------
+# PERFORMANCE: The guard around upstream AI assistant calls, so a
+# slow or failing model degrades into quick, friendly errors instead
+# of a pile of requests waiting on their timeouts:
+# - `InFlightLimiter` caps concurrent upstream calls globally and per
+#   course; extra callers queue for at most `QUEUE_TIMEOUT` seconds.
+# - `SingleFlight` lets identical questions that arrive while one is
+#   being answered wait for that answer instead of asking again.
+# - `CircuitBreaker` fails fast for `BREAKER_RESET_SECONDS` after
+#   `BREAKER_FAILURE_THRESHOLD` consecutive upstream failures, then
+#   lets a single trial call through.
+# Both the sync and the async (streaming) code paths share one guard
+# per process; `AssistantGuard.stats()` reports queue depth, in-flight
+# calls, breaker state and upstream latency.
+# =================================================================
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+
+class AIAssistantUnavailable(Exception):
+    """ The model could not produce an answer; the message is safe to show to students. """
+
+
+class AssistantBusy(AIAssistantUnavailable):
+    """ Too many questions are being answered; the caller waited too long for a slot. """
+
+
+class CircuitOpen(AIAssistantUnavailable):
+    """ The upstream model failed repeatedly and is not being called for a while. """
+
+
+BUSY_MESSAGE = "The AI Assistant is busy right now. Please try again in a moment."
+CIRCUIT_OPEN_MESSAGE = "The AI Assistant is temporarily unavailable. Please try again in a few minutes."
+
+
+def _percentile_ms(sorted_seconds, q):
+    if not sorted_seconds:
+        return None
+    index = min(int(q * len(sorted_seconds)), len(sorted_seconds) - 1)
+    return round(sorted_seconds[index] * 1000, 1)
+
+
+class CircuitBreaker:
+    """ Opens after `failure_threshold` consecutive failures; half-opens after `reset_seconds`. """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpen: While the breaker is open, or while the half-open
+                trial call is still running.
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_running):
+                raise CircuitOpen(CIRCUIT_OPEN_MESSAGE)
+            if state == self.HALF_OPEN:
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """ Lets another trial through when a half-open call ended without an outcome. """
+        with self._lock:
+            self._trial_running = False
+
+
+class InFlightLimiter:
+    """
+    Caps concurrent calls globally and per course. Blocked callers, sync or
+    async, queue until a slot frees up or `max_wait` seconds pass.
+    """
+    def __init__(self, max_in_flight, max_per_course, max_wait):
+        self.max_in_flight = max_in_flight
+        self.max_per_course = max_per_course
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._per_course = Counter()
+        # Callables that wake one queued caller so it retries.
+        self._waiters = set()
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _try_acquire(self, course_id):
+        if self._in_flight >= self.max_in_flight or self._per_course[course_id] >= self.max_per_course:
+            return False
+        self._in_flight += 1
+        self._per_course[course_id] += 1
+        return True
+
+    def acquire(self, course_id):
+        """
+        Raises:
+            AssistantBusy: If no slot became free within `max_wait` seconds.
+        """
+        deadline = time.monotonic() + self.max_wait
+        event = threading.Event()
+        try:
+            while True:
+                with self._lock:
+                    if self._try_acquire(course_id):
+                        return
+                    event.clear()
+                    self._waiters.add(event.set)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not event.wait(remaining):
+                    raise AssistantBusy(BUSY_MESSAGE)
+        finally:
+            with self._lock:
+                self._waiters.discard(event.set)
+
+    async def aacquire(self, course_id):
+        """ The async counterpart of `acquire`; waits without blocking the event loop. """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        event = asyncio.Event()
+
+        def wake():
+            loop.call_soon_threadsafe(event.set)
+
+        try:
+            while True:
+                with self._lock:
+                    if self._try_acquire(course_id):
+                        return
+                    event.clear()
+                    self._waiters.add(wake)
+                try:
+                    await asyncio.wait_for(event.wait(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    raise AssistantBusy(BUSY_MESSAGE)
+        finally:
+            with self._lock:
+                self._waiters.discard(wake)
+
+    def release(self, course_id):
+        with self._lock:
+            self._in_flight -= 1
+            self._per_course[course_id] -= 1
+            if not self._per_course[course_id]:
+                del self._per_course[course_id]
+            # Any waiter may be the one that fits now (per-course limits),
+            # so all of them retry.
+            waiters = list(self._waiters)
+        for wake in waiters:
+            wake()
+
+
+class _Flight:
+    """ One in-flight answer that identical questions can wait for. """
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+        self._callbacks = []
+
+
+class SingleFlight:
+    """ Coalesces concurrent calls for the same key into one. """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key):
+        """
+        Returns:
+            A tuple of (flight, is_leader). The leader must call `finish`;
+            everyone else waits on the flight.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.result, flight.error = result, error
+            flight._done.set()
+            callbacks = list(flight._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def wait(self, flight, timeout):
+        """
+        Returns the leader's result.
+
+        Raises:
+            AIAssistantUnavailable: The leader's error, or AssistantBusy if it
+                did not finish within `timeout` seconds.
+        """
+        if not flight._done.wait(timeout):
+            raise AssistantBusy(BUSY_MESSAGE)
+        return self._outcome(flight)
+
+    async def await_result(self, flight, timeout):
+        """ The async counterpart of `wait`. """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            if flight._done.is_set():
+                return self._outcome(flight)
+            flight._callbacks.append(lambda: loop.call_soon_threadsafe(event.set))
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise AssistantBusy(BUSY_MESSAGE)
+        return self._outcome(flight)
+
+    def _outcome(self, flight):
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def __len__(self):
+        return len(self._flights)
+
+
+class AssistantGuard:
+    """
+    Limiter, single-flight and circuit breaker for upstream model calls,
+    configured from `settings.AI_ASSISTANT` (upper-case keys may be
+    overridden as keyword arguments).
+    """
+    LATENCY_WINDOW = 500
+
+    def __init__(self, **overrides):
+        config = {**settings.AI_ASSISTANT, **overrides}
+        self.coalesce_wait = config['COALESCE_WAIT_SECONDS']
+        self.limiter = InFlightLimiter(
+            config['MAX_IN_FLIGHT'], config['MAX_IN_FLIGHT_PER_COURSE'], config['QUEUE_TIMEOUT']
+        )
+        self.flights = SingleFlight()
+        self.breaker = CircuitBreaker(config['BREAKER_FAILURE_THRESHOLD'], config['BREAKER_RESET_SECONDS'])
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._counts = Counter()
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def record_coalesced(self):
+        self._count('coalesced')
+
+    def _finish_call(self, started, failed):
+        with self._lock:
+            self._latencies.append(time.perf_counter() - started)
+            self._counts['failed' if failed else 'succeeded'] += 1
+
+    @contextmanager
+    def upstream_call(self, course_id):
+        """
+        Wraps one upstream model call: checks the breaker, waits for a slot,
+        and records the outcome and latency.
+
+        Raises:
+            CircuitOpen, AssistantBusy: Without calling upstream.
+        """
+        self._enter_checks()
+        try:
+            self.limiter.acquire(course_id)
+        except AssistantBusy:
+            self._abandon_trial('rejected_busy')
+            raise
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        except AIAssistantUnavailable:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._exit_call(course_id, started, failed)
+
+    @asynccontextmanager
+    async def aupstream_call(self, course_id):
+        """ The async counterpart of `upstream_call`. """
+        self._enter_checks()
+        try:
+            await self.limiter.aacquire(course_id)
+        except AssistantBusy:
+            self._abandon_trial('rejected_busy')
+            raise
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        except AIAssistantUnavailable:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._exit_call(course_id, started, failed)
+
+    def _enter_checks(self):
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            self._count('rejected_open')
+            raise
+
+    def _abandon_trial(self, outcome):
+        self.breaker.release_trial()
+        self._count(outcome)
+
+    def _exit_call(self, course_id, started, failed):
+        self.limiter.release(course_id)
+        if not failed:
+            self.breaker.record_success()
+        else:
+            # Cancelled or crashed without a verdict on the upstream.
+            self.breaker.release_trial()
+        self._finish_call(started, failed)
+
+    def stats(self) -> dict:
+        """ Queue depth, in-flight and coalesced calls, breaker state, outcome counts and latency (ms). """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = dict(self._counts)
+        return {
+            'in_flight': self.limiter.in_flight,
+            'queued': self.limiter.queued,
+            'coalescing': len(self.flights),
+            'circuit': self.breaker.state,
+            'succeeded': counts.get('succeeded', 0),
+            'failed': counts.get('failed', 0),
+            'coalesced': counts.get('coalesced', 0),
+            'rejected_busy': counts.get('rejected_busy', 0),
+            'rejected_open': counts.get('rejected_open', 0),
+            'latency_p50_ms': _percentile_ms(latencies, 0.5),
+            'latency_p95_ms': _percentile_ms(latencies, 0.95),
+            'latency_max_ms': _percentile_ms(latencies, 1.0),
+        }
+
+
+_default_guard = None
+_default_guard_lock = threading.Lock()
+
+
+def get_assistant_guard() -> AssistantGuard:
+    """ The process-wide guard shared by every AIAssistantService. """
+    global _default_guard
+    with _default_guard_lock:
+        if _default_guard is None:
+            _default_guard = AssistantGuard()
+        return _default_guard
@@ -1,16 +1,279 @@
+# =================================================================
+# apps/interactions/services.py
+# -----------------------------------------------------------------
+# PERFORMANCE: AI assistant answers are cached per lesson, keyed on
+# the lesson's `content_version` and the normalized question text,
+# in the dedicated 'ai_answers' cache (TTL and LRU eviction come from
+# its TIMEOUT and MAX_ENTRIES). Instructor-pinned answers are served
+# before the cache; they are cached under the lesson's `pins_version`,
+# which every pin change bumps in the database, so no process keeps
+# serving old pins. Repeated questions therefore cost no model call;
+# hits and misses are counted for `AnswerCache.stats()`.
+#
+# `stream_answer_for_lesson` is the non-blocking variant used by the
+# streamed assistant endpoint: tokens are relayed as the model sends
+# them, over an `httpx.AsyncClient` pooled per event loop, so a slow
+# model call holds a coroutine instead of a request worker.
+#
+# Both paths call the model through the process-wide
+# `AssistantGuard` (see resilience.py): concurrent identical
+# questions share one upstream call, upstream concurrency is capped
+# globally and per course, and a circuit breaker fails fast while
+# the model keeps erroring.
+#
+# The prompt carries only the top passages of the course's BM25
+# retrieval index (apps/learning/retrieval.py) that fit in
+# `RETRIEVAL_TOKEN_BUDGET`, rather than whole lessons.
+# =================================================================
+
+import asyncio
+import hashlib
+import json
 import os
+import weakref
+
+import httpx
 import requests
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+
+from .models import PinnedAnswer, normalize_question
+from .resilience import AIAssistantUnavailable, get_assistant_guard
+from apps.learning.models import Lesson
+from apps.learning.retrieval import get_course_index
+
 logger = logging.getLogger(__name__)
 
+UNEXPECTED_ERROR_MESSAGE = "Sorry, I encountered an error while processing your request. Please try again later."
+
+
+class AnswerCache:
+    """ Cached and pinned AI assistant answers, per lesson. """
+    STAT_KEYS = ('hits', 'misses', 'pinned')
+
+    def __init__(self, alias='ai_answers'):
+        self.cache = caches[alias]
+
+    def answer_key(self, lesson, question):
+        digest = hashlib.sha256(normalize_question(question).encode('utf-8')).hexdigest()
+        # The prompt draws on the whole course (see `lesson_context`), so any
+        # lesson change in it (which bumps `outline_version`) retires answers.
+        return (
+            f"interactions:ai-answer:{lesson.pk}:v{lesson.content_version}.{lesson.course.outline_version}:{digest}"
+        )
+
+    def pins_key(self, lesson):
+        return f"interactions:ai-pins:{lesson.pk}:v{lesson.pins_version}"
+
+    def pinned_answers(self, lesson):
+        """ The lesson's pinned answers as {normalized question: answer}, cached until a pin changes. """
+        key = self.pins_key(lesson)
+        pins = self.cache.get(key)
+        if pins is None:
+            pins = dict(
+                PinnedAnswer.objects.filter(lesson_id=lesson.pk).values_list('normalized_question', 'answer')
+            )
+            self.cache.set(key, pins)
+        return pins
+
+    def forget_pins(self, lesson_id):
+        """ Retires the cached pins of a lesson in every process. """
+        Lesson.objects.filter(pk=lesson_id).update(pins_version=F('pins_version') + 1)
+
+    def lookup(self, lesson, question):
+        """
+        Returns a tuple of (answer, source) where source is 'pinned' or
+        'cache', or (None, None) on a miss.
+        """
+        pinned = self.pinned_answers(lesson).get(normalize_question(question))
+        if pinned is not None:
+            self._count('pinned')
+            return pinned, 'pinned'
+        answer = self.cache.get(self.answer_key(lesson, question))
+        self._count('hits' if answer is not None else 'misses')
+        return (answer, 'cache') if answer is not None else (None, None)
+
+    def store(self, lesson, question, answer):
+        self.cache.set(self.answer_key(lesson, question), answer)
+
+    def _count(self, stat):
+        key = f"interactions:ai-answer-stats:{stat}"
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # First event since the counter was created or evicted.
+            self.cache.add(key, 0, None)
+            self.cache.incr(key)
+
+    def stats(self):
+        """ Hit, miss and pinned-answer counts, and the hit ratio over all lookups. """
+        counts = self.cache.get_many([f"interactions:ai-answer-stats:{stat}" for stat in self.STAT_KEYS])
+        stats = {stat: counts.get(f"interactions:ai-answer-stats:{stat}", 0) for stat in self.STAT_KEYS}
+        lookups = sum(stats.values())
+        stats['hit_ratio'] = round((stats['hits'] + stats['pinned']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# One pooled async client per event loop (a client cannot be shared
+# across loops); it lives as long as its loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """ The pooled HTTP client for the running event loop, created on first use. """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        config = settings.AI_ASSISTANT
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config['MAX_CONNECTIONS'],
+                max_keepalive_connections=config['MAX_KEEPALIVE_CONNECTIONS'],
+            ),
+            timeout=httpx.Timeout(config['READ_TIMEOUT'], connect=config['CONNECT_TIMEOUT']),
+        )
+        _async_clients[loop] = client
+    return client
+
+
 class AIAssistantService:
     """
     A service to interact with a Large Language Model via OpenRouter API.
     """
-    API_URL = "https://openrouter.ai/api/v1/chat/completions"
     API_KEY = os.getenv("OPENROUTER_API_KEY")
 
+    def __init__(self, guard=None):
+        self.answer_cache = AnswerCache()
+        self.guard = guard or get_assistant_guard()
+
+    def answer_for_lesson(self, lesson, question: str):
+        """
+        Answers a question about `lesson`, from a pinned answer or the answer
+        cache when possible and from the model otherwise.
+
+        Args:
+            lesson: The Lesson, with its `course` loaded.
+            question: The student's question.
+
+        Returns:
+            A tuple of (answer, source), where source is 'pinned', 'cache',
+            'coalesced' (shared with an identical in-flight question), 'model'
+            or 'error'.
+        """
+        answer, source = self.answer_cache.lookup(lesson, question)
+        if answer is not None:
+            return answer, source
+
+        key = self.answer_cache.answer_key(lesson, question)
+        flight, leader = self.guard.flights.join(key)
+        if not leader:
+            try:
+                answer = self.guard.flights.wait(flight, self.guard.coalesce_wait)
+            except AIAssistantUnavailable as exc:
+                return str(exc), 'error'
+            self.guard.record_coalesced()
+            return answer, 'coalesced'
+
+        answer, error = None, AIAssistantUnavailable(UNEXPECTED_ERROR_MESSAGE)
+        try:
+            context = self.lesson_context(lesson, question)
+            with self.guard.upstream_call(lesson.course_id):
+                answer = self.request_answer(question, context)
+            self.answer_cache.store(lesson, question, answer)
+            error = None
+        except AIAssistantUnavailable as exc:
+            error = exc
+        finally:
+            self.guard.flights.finish(key, flight, result=answer, error=error)
+        if error is not None:
+            return str(error), 'error'
+        return answer, 'model'
+
+    async def stream_answer_for_lesson(self, lesson, question: str):
+        """
+        The streaming counterpart of `answer_for_lesson`.
+
+        Yields:
+            ('token', text) tuples as the answer arrives, then a single
+            ('done', source) or ('error', message). A pinned or cached
+            answer arrives as one token. Complete model answers are cached.
+        """
+        answer, source = await sync_to_async(self.answer_cache.lookup)(lesson, question)
+        if answer is not None:
+            yield 'token', answer
+            yield 'done', source
+            return
+
+        key = self.answer_cache.answer_key(lesson, question)
+        flight, leader = self.guard.flights.join(key)
+        if not leader:
+            try:
+                answer = await self.guard.flights.await_result(flight, self.guard.coalesce_wait)
+            except AIAssistantUnavailable as exc:
+                yield 'error', str(exc)
+                return
+            self.guard.record_coalesced()
+            yield 'token', answer
+            yield 'done', 'coalesced'
+            return
+
+        tokens = []
+        answer, error = None, AIAssistantUnavailable(UNEXPECTED_ERROR_MESSAGE)
+        try:
+            context = await sync_to_async(self.lesson_context)(lesson, question)
+            async with self.guard.aupstream_call(lesson.course_id):
+                async for token in self.stream_answer(question, context):
+                    tokens.append(token)
+                    yield 'token', token
+            answer = ''.join(tokens).strip()
+            await sync_to_async(self.answer_cache.store)(lesson, question, answer)
+            error = None
+        except AIAssistantUnavailable as exc:
+            error = exc
+        finally:
+            # Also runs when the client disconnects mid-stream.
+            self.guard.flights.finish(key, flight, result=answer, error=error)
+        if error is not None:
+            yield 'error', str(error)
+            return
+        yield 'done', 'model'
+
+    async def stream_answer(self, question: str, context: dict):
+        """
+        Streams the model's answer token by token. Same arguments and
+        errors as `request_answer`.
+        """
+        if not self.API_KEY:
+            logger.error("OPENROUTER_API_KEY is not set. AI Assistant is disabled.")
+            raise AIAssistantUnavailable("The AI Assistant is currently unavailable. Please contact your instructor.")
+
+        data = {**self.build_payload(question, context), "stream": True}
+        try:
+            async with get_async_client().stream(
+                'POST', settings.AI_ASSISTANT['API_URL'], headers=self.headers(), json=data
+            ) as response:
+                response.raise_for_status()
+                # Server-sent events: "data: {chunk}" lines, ending with "data: [DONE]".
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    chunk = line[len('data:'):].strip()
+                    if chunk == '[DONE]':
+                        break
+                    token = json.loads(chunk)['choices'][0].get('delta', {}).get('content')
+                    if token:
+                        yield token
+        except httpx.HTTPError as e:
+            logger.error(f"AI Assistant streaming request failed: {e}")
+            raise AIAssistantUnavailable(UNEXPECTED_ERROR_MESSAGE)
+        except (ValueError, KeyError, IndexError) as e:
+            logger.error(f"AI Assistant stream was malformed: {e}")
+            raise AIAssistantUnavailable("Sorry, I received an unexpected response. Please try again.")
+
     def get_answer(self, question: str, context: dict) -> str:
         """
         Gets a context-aware answer from the AI model.
@@ -23,45 +286,84 @@ class AIAssistantService:
         Returns:
             The AI-generated answer as a string.
         """
+        try:
+            return self.request_answer(question, context)
+        except AIAssistantUnavailable as exc:
+            return str(exc)
+
+    def request_answer(self, question: str, context: dict) -> str:
+        """
+        Calls the model. Same arguments as `get_answer`.
+
+        Raises:
+            AIAssistantUnavailable: If the assistant is not configured, the
+                request failed or the response was malformed.
+        """
         if not self.API_KEY:
             logger.error("OPENROUTER_API_KEY is not set. AI Assistant is disabled.")
-            return "The AI Assistant is currently unavailable. Please contact your instructor."
+            raise AIAssistantUnavailable("The AI Assistant is currently unavailable. Please contact your instructor.")
+
+        try:
+            response = requests.post(
+                settings.AI_ASSISTANT['API_URL'], headers=self.headers(),
+                json=self.build_payload(question, context), timeout=20,
+            )
+            response.raise_for_status()
+
+            response_json = response.json()
+            answer = response_json['choices'][0]['message']['content']
+            return answer.strip()
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"AI Assistant API request failed: {e}")
+            raise AIAssistantUnavailable(UNEXPECTED_ERROR_MESSAGE)
+        except (KeyError, IndexError) as e:
+            logger.error(f"AI Assistant API response was malformed: {e}")
+            raise AIAssistantUnavailable("Sorry, I received an unexpected response. Please try again.")
 
+    def lesson_context(self, lesson, question: str) -> dict:
+        """
+        The prompt context for a question: the passages of the course most
+        relevant to it, from the retrieval index, within the configured
+        token budget. Falls back to the lesson description when nothing
+        matches.
+        """
+        config = settings.AI_ASSISTANT
+        passages = get_course_index(lesson.course).search(
+            question, config['RETRIEVAL_TOP_K'], config['RETRIEVAL_TOKEN_BUDGET'], lesson_id=lesson.pk
+        )
+        if passages:
+            content = "\n\n".join(f"[{passage['lesson_title']}]\n{passage['text']}" for passage in passages)
+        else:
+            content = lesson.content_data.get('description', 'No textual content available for this lesson.')
+        return {
+            "course_title": lesson.course.title,
+            "lesson_title": lesson.title,
+            "lesson_content": content,
+        }
+
+    def headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.API_KEY}",
+            "Content-Type": "application/json"
+        }
+
+    def build_payload(self, question: str, context: dict) -> dict:
+        """ The chat completion request body for a question in a lesson context. """
         # Construct a detailed, context-aware prompt [cite: 681, 682]
         prompt = (
             f"You are an expert teaching assistant for the course titled '{context.get('course_title', 'N/A')}'. "
             f"A student is currently in a lesson named '{context.get('lesson_title', 'N/A')}'.\n"
-            f"Here is the relevant content from the lesson:\n---START OF CONTENT---\n"
+            f"Here is the relevant content from the course:\n---START OF CONTENT---\n"
             f"{context.get('lesson_content', 'No content available.')}\n---END OF CONTENT---\n\n"
             f"Based on this context ONLY, please answer the following student's question clearly and concisely.\n"
             f"Student's Question: \"{question}\""
         )
 
-        headers = {
-            "Authorization": f"Bearer {self.API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        # Data payload for the API request
-        data = {
-            "model": "mistralai/mistral-7b-instruct", # Example model, can be configured
+        return {
+            "model": settings.AI_ASSISTANT['MODEL'],
             "messages": [
                 {"role": "system", "content": "You are a helpful teaching assistant."},
                 {"role": "user", "content": prompt}
             ]
         }
-
-        try:
-            response = requests.post(self.API_URL, headers=headers, json=data, timeout=20)
-            response.raise_for_status()
-            
-            response_json = response.json()
-            answer = response_json['choices'][0]['message']['content']
-            return answer.strip()
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"AI Assistant API request failed: {e}")
-            return "Sorry, I encountered an error while processing your request. Please try again later."
-        except (KeyError, IndexError) as e:
-            logger.error(f"AI Assistant API response was malformed: {e}")
-            return "Sorry, I received an unexpected response. Please try again."
\ No newline at end of file
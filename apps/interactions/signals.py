@@ -1,46 +1,66 @@
 # =================================================================
 # apps/interactions/signals.py
 # -----------------------------------------------------------------
-# MIGRATION: The webhook payload now correctly accesses related
-# object IDs using `instance.student.id`, `instance.course.id`, etc.,
-# which is the standard for relational ForeignKey fields.
+# PERFORMANCE: The new-question webhook is written to the webhook
+# outbox in the same transaction as the thread instead of being
+# posted synchronously; the `deliver_webhooks` worker sends it.
+# Changing a pinned AI answer drops the lesson's cached pins.
+# New and deleted threads and instructor replies keep the threads'
+# `answered` flags and the per-course unanswered counters in step
+# (see discussions.py).
 # =================================================================
 
-import requests
-import os
 import logging
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import DiscussionThread
+from .discussions import record_reply, recount_unanswered, refresh_answered
+from .models import DiscussionPost, DiscussionThread, PinnedAnswer
+from .services import AnswerCache
+from apps.core.services.webhooks import enqueue_webhook
+from apps.learning.models import Course
 
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=DiscussionThread)
 def trigger_new_question_webhook(sender, instance, created, **kwargs):
     if created:
-        webhook_url = os.getenv('N8N_QUESTION_POSTED_WEBHOOK_URL')
-
-        if not webhook_url:
-            logger.warning("N8N_QUESTION_POSTED_WEBHOOK_URL is not set. Skipping webhook.")
-            return
-
-        try:
-            payload = {
-                'thread_id': str(instance.pk),
-                'student_id': str(instance.student.pk),
-                'student_name': instance.student.full_name or instance.student.username,
-                'course_id': str(instance.course.pk),
-                'lesson_id': str(instance.lesson.pk),
-                'question_title': instance.title,
-                'question_text': instance.question,
-                'timestamp': instance.created_at.isoformat(),
-            }
-
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            response.raise_for_status()
-            logger.info(f"Successfully sent 'new question' webhook for thread ID {instance.pk}")
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send 'new question' webhook for thread ID {instance.pk}: {e}")
-        except Exception as e:
-            logger.error(f"An unexpected error occurred while sending webhook for thread ID {instance.pk}: {e}")
\ No newline at end of file
+        payload = {
+            'thread_id': str(instance.pk),
+            'student_id': str(instance.student.pk),
+            'student_name': instance.student.full_name or instance.student.username,
+            'course_id': str(instance.course_id),
+            'lesson_id': str(instance.lesson_id),
+            'question_title': instance.title,
+            'question_text': instance.question,
+            'timestamp': instance.created_at.isoformat(),
+        }
+        if enqueue_webhook('question.posted', 'N8N_QUESTION_POSTED_WEBHOOK_URL', payload):
+            logger.info(f"Queued 'new question' webhook for thread ID {instance.pk}")
+
+@receiver(post_save, sender=DiscussionThread)
+def count_new_unanswered_thread(sender, instance, created, **kwargs):
+    if created and not instance.answered:
+        Course.objects.filter(pk=instance.course_id).update(
+            unanswered_thread_count=F('unanswered_thread_count') + 1
+        )
+
+@receiver(post_delete, sender=DiscussionThread)
+def recount_on_thread_delete(sender, instance, **kwargs):
+    # Recounted rather than decremented: deleting a thread first cascades
+    # to its replies, whose own receivers may already have reopened it.
+    recount_unanswered([instance.course_id])
+
+@receiver(post_save, sender=DiscussionPost)
+def mark_thread_answered(sender, instance, created, **kwargs):
+    if created:
+        record_reply(instance)
+
+@receiver(post_delete, sender=DiscussionPost)
+def reopen_thread_on_reply_delete(sender, instance, **kwargs):
+    refresh_answered(instance.thread_id)
+
+@receiver(post_save, sender=PinnedAnswer)
+@receiver(post_delete, sender=PinnedAnswer)
+def forget_cached_pins(sender, instance, **kwargs):
+    AnswerCache().forget_pins(instance.lesson_id)
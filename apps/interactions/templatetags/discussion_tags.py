@@ -4,18 +4,23 @@
 # MIGRATION: The `get_discussions_for_lesson` tag now accepts a
 # lesson's primary key and filters DiscussionThread using the
 # relational ForeignKey.
+# PERFORMANCE: It returns only the first page of threads; further
+# pages are fetched with the "load more" button.
 # =================================================================
 
 from django import template
-from ..models import DiscussionThread
+from ..discussions import lesson_threads_page
 from ..forms import DiscussionThreadForm, DiscussionPostForm
 
 register = template.Library()
 
 @register.simple_tag
 def get_discussions_for_lesson(lesson_pk):
-    """ Template tag to fetch all discussion threads for a given lesson_pk. """
-    return DiscussionThread.objects.filter(lesson_id=lesson_pk).order_by('-created_at').select_related('student')
+    """
+    Template tag to fetch the first page of discussion threads for a given
+    lesson_pk, as a dict with `threads` and `next_cursor`.
+    """
+    return lesson_threads_page(lesson_pk)
 
 @register.simple_tag
 def get_discussion_form():
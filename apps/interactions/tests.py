@@ -0,0 +1,422 @@
+# =================================================================
+# apps/interactions/tests.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Checks that repeated AI assistant questions are served
+# from the answer cache or a pinned answer without calling the model,
+# and streams answers from a local fake LLM server without blocking.
+# Also covers the upstream guard: coalescing, limits and the breaker.
+# =================================================================
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.core.pagination import encode_cursor
+from apps.interactions.discussions import (
+    lesson_threads_page, reconcile_discussion_counters, thread_queryset, unanswered_threads_page,
+)
+from apps.interactions.models import DiscussionPost, DiscussionThread, PinnedAnswer
+from apps.interactions.resilience import BUSY_MESSAGE, CIRCUIT_OPEN_MESSAGE, AssistantGuard
+from apps.interactions.services import AIAssistantService, AnswerCache
+from apps.learning.models import Course, Lesson
+from apps.learning.retrieval import clear_course_indexes, get_course_index
+from apps.users.models import CustomUser
+
+class FakeLLMServer:
+    """
+    A local chat completion endpoint that answers with `tokens`, pausing
+    `delay` seconds before each one: as server-sent events when the request
+    asks to stream, as one JSON completion otherwise. `peak_in_flight` is
+    the most requests it was answering at the same time.
+    """
+    def __init__(self, tokens, delay=0.0):
+        self.requests = 0
+        self.in_flight = self.peak_in_flight = 0
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(handler):
+                with lock:
+                    self.requests += 1
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    handler.answer()
+                finally:
+                    with lock:
+                        self.in_flight -= 1
+
+            def answer(handler):
+                body = json.loads(handler.rfile.read(int(handler.headers.get('Content-Length', 0))))
+                handler.send_response(200)
+                if not body.get('stream'):
+                    time.sleep(delay * len(tokens))
+                    completion = json.dumps({'choices': [{'message': {'content': ''.join(tokens)}}]}).encode()
+                    handler.send_header('Content-Type', 'application/json')
+                    handler.send_header('Content-Length', str(len(completion)))
+                    handler.end_headers()
+                    handler.wfile.write(completion)
+                    return
+                handler.send_header('Content-Type', 'text/event-stream')
+                handler.send_header('Connection', 'close')
+                handler.end_headers()
+                for token in tokens:
+                    time.sleep(delay)
+                    chunk = {'choices': [{'delta': {'content': token}}]}
+                    handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    handler.wfile.flush()
+                handler.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def model_response(content):
+    response = mock.Mock()
+    response.json.return_value = {'choices': [{'message': {'content': content}}]}
+    return response
+
+
+@mock.patch.object(AIAssistantService, 'API_KEY', 'test-key')
+class AIAnswerCacheTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = CustomUser.objects.create_user(username='ai-teacher', role=CustomUser.Roles.INSTRUCTOR)
+        cls.student = CustomUser.objects.create_user(username='ai-student')
+        cls.course = Course.objects.create(
+            title="AI Course", slug='ai-course', description="", category="Web", instructor=cls.instructor
+        )
+        cls.lesson = Lesson.objects.create(
+            course=cls.course, title="Closures", order=1, content_type='text_editor',
+            content_data={'description': "A closure captures variables."},
+        )
+
+    def setUp(self):
+        caches['ai_answers'].clear()
+        clear_course_indexes()
+        # A fresh upstream guard (breaker, limiter) per test.
+        patcher = mock.patch('apps.interactions.resilience._default_guard', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ask(self, question, user=None):
+        self.client.force_authenticate(user or self.student)
+        return self.client.post(reverse('interactions_api:ai_ask'), {
+            'question': question, 'course_id': self.course.pk, 'lesson_id': self.lesson.pk,
+        }, format='json').data
+
+    @mock.patch('apps.interactions.services.requests.post', return_value=model_response(" It keeps scope. "))
+    def test_repeated_questions_hit_the_cache(self, post):
+        self.assertEqual(self.ask("What is a closure?"), {'answer': "It keeps scope.", 'source': 'model'})
+        self.assertEqual(self.ask("  what IS a closure "), {'answer': "It keeps scope.", 'source': 'cache'})
+        self.assertEqual(post.call_count, 1)
+        self.assertIn("A closure captures variables.", post.call_args.kwargs['json']['messages'][1]['content'])
+        self.assertEqual(AnswerCache().stats(), {'hits': 1, 'misses': 1, 'pinned': 0, 'hit_ratio': 0.5})
+
+        # Editing the lesson retires its cached answers.
+        self.lesson.refresh_from_db()
+        self.lesson.content_data = {'description': "Closures, revised."}
+        self.lesson.save()
+        self.assertEqual(self.ask("What is a closure?")['source'], 'model')
+        self.assertEqual(post.call_count, 2)
+
+    @mock.patch('apps.interactions.services.requests.post', side_effect=requests.exceptions.Timeout)
+    def test_failures_are_not_cached(self, post):
+        self.assertEqual(self.ask("What is a closure?")['source'], 'error')
+        self.assertEqual(self.ask("What is a closure?")['source'], 'error')
+        self.assertEqual(post.call_count, 2)
+
+    @mock.patch('apps.interactions.services.requests.post')
+    def test_pinned_answers(self, post):
+        self.client.force_authenticate(self.student)
+        pin = {'lesson': self.lesson.pk, 'question': "What is a closure?", 'answer': "See slide 3."}
+        self.assertEqual(self.client.post(reverse('interactions_api:ai_pin'), pin, format='json').status_code, 403)
+
+        self.client.force_authenticate(self.instructor)
+        self.assertEqual(self.client.post(reverse('interactions_api:ai_pin'), pin, format='json').status_code, 201)
+        self.assertEqual(self.ask("what is a closure"), {'answer': "See slide 3.", 'source': 'pinned'})
+
+        self.client.force_authenticate(self.instructor)
+        response = self.client.post(reverse('interactions_api:ai_pin'), {**pin, 'answer': "See slide 4."}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ask("What is a closure?")['answer'], "See slide 4.")
+        post.assert_not_called()
+
+    def test_pin_changes_retire_pins_cached_by_other_processes(self):
+        answers = AnswerCache()
+        pin = PinnedAnswer.objects.create(lesson=self.lesson, question="Scope?", answer="Lexical.")
+        stale = Lesson.objects.get(pk=self.lesson.pk)
+        self.assertEqual(list(answers.pinned_answers(stale).values()), ["Lexical."])
+
+        pin.delete()
+        # The old entry is still cached, as in a process that never saw the
+        # signal, but the lesson now points at a new one.
+        self.assertEqual(list(answers.pinned_answers(stale).values()), ["Lexical."])
+        self.assertEqual(answers.pinned_answers(Lesson.objects.get(pk=self.lesson.pk)), {})
+
+
+@mock.patch.object(AIAssistantService, 'API_KEY', 'test-key')
+class StreamedAIAssistantTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='stream-student')
+        cls.course = Course.objects.create(title="Streams", slug='streams', description="", category="Web")
+        cls.lesson = Lesson.objects.create(course=cls.course, title="Generators", order=1, content_type='text_editor')
+
+    def setUp(self):
+        caches['ai_answers'].clear()
+        clear_course_indexes()
+        # A fresh upstream guard (breaker, limiter) per test.
+        patcher = mock.patch('apps.interactions.resilience._default_guard', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.llm = FakeLLMServer(["Generators ", "yield ", "values."], delay=0.1)
+        self.addCleanup(self.llm.close)
+        self.settings_override = override_settings(AI_ASSISTANT={**settings.AI_ASSISTANT, 'API_URL': self.llm.url})
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    async def ask(self, question):
+        response = await self.async_client.post(reverse('interactions_api:ai_stream'), {
+            'question': question, 'course_id': self.course.pk, 'lesson_id': self.lesson.pk,
+        })
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = []
+        async for chunk in response.streaming_content:
+            for raw in chunk.decode().split('\n\n'):
+                if raw:
+                    name, data = raw.split('\n')
+                    events.append((name.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return events
+
+    async def test_tokens_are_streamed_then_cached(self):
+        await self.async_client.aforce_login(self.student)
+        self.assertEqual(await self.ask("What is a generator?"), [
+            ('token', "Generators "), ('token', "yield "), ('token', "values."), ('done', 'model'),
+        ])
+        self.assertEqual(await self.ask("what is a generator"), [('token', "Generators yield values."), ('done', 'cache')])
+        self.assertEqual(self.llm.requests, 1)
+
+    async def test_concurrent_answers_share_one_event_loop(self):
+        await self.async_client.aforce_login(self.student)
+        answers = await asyncio.gather(*(self.ask(f"Question {n}?") for n in range(5)))
+
+        self.assertEqual({answer[-1] for answer in answers}, {('done', 'model')})
+        self.assertEqual(self.llm.requests, 5)
+        # Sequential handling would never have two upstream streams open.
+        self.assertGreater(self.llm.peak_in_flight, 1)
+
+    async def test_requires_login_and_reports_errors(self):
+        response = await self.async_client.post(reverse('interactions_api:ai_stream'), {'question': "Hi?"})
+        self.assertEqual(response.status_code, 403)
+
+        await self.async_client.aforce_login(self.student)
+        self.llm.close()
+        events = await self.ask("Anyone there?")
+        self.assertEqual(events[-1][0], 'error')
+
+
+@mock.patch.object(AIAssistantService, 'API_KEY', 'test-key')
+class AssistantGuardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title="Guarded", slug='guarded', description="", category="Web")
+        cls.lesson = Lesson.objects.create(course=cls.course, title="Locks", order=1, content_type='text_editor')
+
+    def setUp(self):
+        caches['ai_answers'].clear()
+        clear_course_indexes()
+        self.llm = FakeLLMServer(["Use ", "a lock."], delay=0.15)
+        self.addCleanup(self.llm.close)
+        self.settings_override = override_settings(AI_ASSISTANT={**settings.AI_ASSISTANT, 'API_URL': self.llm.url})
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        # Worker threads must not need the test database.
+        AnswerCache().pinned_answers(self.lesson)
+        get_course_index(self.course)
+
+    def ask_concurrently(self, service, questions):
+        with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+            return list(pool.map(lambda question: service.answer_for_lesson(self.lesson, question), questions))
+
+    def test_identical_questions_share_one_upstream_call(self):
+        guard = AssistantGuard()
+        answers = self.ask_concurrently(AIAssistantService(guard), ["How do I avoid races?"] * 5)
+
+        self.assertEqual(self.llm.requests, 1)
+        self.assertEqual(sorted(source for _, source in answers), ['coalesced'] * 4 + ['model'])
+        self.assertEqual({answer for answer, _ in answers}, {"Use a lock."})
+        self.assertEqual(guard.stats()['coalesced'], 4)
+
+    def test_per_course_limit_rejects_after_queue_timeout(self):
+        guard = AssistantGuard(MAX_IN_FLIGHT_PER_COURSE=1, QUEUE_TIMEOUT=0.05)
+        answers = self.ask_concurrently(AIAssistantService(guard), ["First?", "Second?"])
+
+        self.assertEqual(sorted(source for _, source in answers), ['error', 'model'])
+        self.assertIn((BUSY_MESSAGE, 'error'), answers)
+        stats = guard.stats()
+        self.assertEqual((stats['succeeded'], stats['rejected_busy'], stats['in_flight'], stats['queued']), (1, 1, 0, 0))
+        self.assertIsNotNone(stats['latency_p95_ms'])
+
+    def test_circuit_breaker_fails_fast_then_recovers(self):
+        guard = AssistantGuard(BREAKER_FAILURE_THRESHOLD=2, BREAKER_RESET_SECONDS=0.2)
+        service = AIAssistantService(guard)
+        with mock.patch('apps.interactions.services.requests.post', side_effect=requests.exceptions.Timeout) as post:
+            for n in range(3):
+                answer, source = service.answer_for_lesson(self.lesson, f"Question {n}?")
+            self.assertEqual(post.call_count, 2)
+        self.assertEqual((answer, source), (CIRCUIT_OPEN_MESSAGE, 'error'))
+        self.assertEqual(guard.stats()['circuit'], 'open')
+
+        time.sleep(0.25)  # half-open: one trial call goes through
+        self.assertEqual(service.answer_for_lesson(self.lesson, "Back?"), ("Use a lock.", 'model'))
+        self.assertEqual(guard.stats()['circuit'], 'closed')
+
+
+class DiscussionPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='forum-student')
+        cls.instructor = CustomUser.objects.create_user(username='forum-teacher', role=CustomUser.Roles.INSTRUCTOR)
+        cls.course = Course.objects.create(title="Forum", slug='forum', description="", category="Web")
+        cls.lesson = Lesson.objects.create(course=cls.course, title="Loops", order=1, content_type='text_editor')
+        other = Lesson.objects.create(course=cls.course, title="Other", order=2, content_type='text_editor')
+        DiscussionThread.objects.bulk_create([
+            DiscussionThread(lesson=cls.lesson, course=cls.course, student=cls.student, title=f"Q{n}", question="?")
+            for n in range(45)
+        ] + [DiscussionThread(lesson=other, course=cls.course, student=cls.student, title="Elsewhere", question="?")])
+        # Ties on created_at must not drop or repeat threads across pages.
+        tied = timezone.now()
+        DiscussionThread.objects.filter(lesson=cls.lesson, title__in=[f"Q{n}" for n in range(15, 25)]).update(
+            created_at=tied
+        )
+        cls.answered = DiscussionThread.objects.get(lesson=cls.lesson, title="Q44")
+        for user in (cls.student, cls.instructor, cls.student):
+            DiscussionPost.objects.create(thread=cls.answered, user=user, reply_text=f"From {user.username}")
+        DiscussionPost.objects.create(
+            thread=DiscussionThread.objects.get(title="Q43"), user=cls.student, reply_text="Bump"
+        )
+
+    def test_pages_cover_every_thread_once_newest_first(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            # Threads, then their replies with authors: two queries per page.
+            with self.assertNumQueries(2):
+                page = lesson_threads_page(self.lesson.pk, cursor, page_size=20)
+                for thread in page['threads']:
+                    [thread.student.username, thread.reply_count, thread.answered]
+                    [post.user.role for post in thread.ordered_posts]
+            seen.extend(page['threads'])
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len({thread.pk for thread in seen}), 45)
+        expected = list(DiscussionThread.objects.filter(lesson=self.lesson).order_by('-created_at', '-pk'))
+        self.assertEqual(seen, expected)
+
+    def test_threads_carry_ordered_replies_and_metadata(self):
+        threads = {thread.title: thread for thread in thread_queryset().filter(lesson=self.lesson)}
+
+        answered = threads["Q44"]
+        self.assertEqual(answered.reply_count, 3)
+        self.assertTrue(answered.answered)
+        self.assertEqual(
+            [post.user.username for post in answered.ordered_posts], ['forum-student', 'forum-teacher', 'forum-student']
+        )
+        self.assertEqual((threads["Q43"].reply_count, threads["Q43"].answered), (1, False))
+        self.assertEqual((threads["Q0"].reply_count, threads["Q0"].ordered_posts), (0, []))
+
+    def test_invalid_cursor_is_rejected(self):
+        self.client.force_login(self.student)
+        url = reverse('interactions:lesson_threads', kwargs={'lesson_id': self.lesson.pk})
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+    def test_tampered_cursor_is_rejected(self):
+        self.client.force_login(self.student)
+        url = reverse('interactions:lesson_threads', kwargs={'lesson_id': self.lesson.pk})
+        for values in (["notadate", "x"], ["2026-01-01T00:00:00+00:00", "x"], [1, [2]], [None, 1]):
+            with self.subTest(values=values):
+                self.assertEqual(self.client.get(url, {'cursor': encode_cursor(values)}).status_code, 400)
+
+
+class UnansweredCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = CustomUser.objects.create_user(username='queue-teacher', role=CustomUser.Roles.INSTRUCTOR)
+        cls.student = CustomUser.objects.create_user(username='queue-student')
+        cls.course = Course.objects.create(
+            title="Queue", slug='queue', description="", category="Web", instructor=cls.instructor
+        )
+        cls.lesson = Lesson.objects.create(course=cls.course, title="Sets", order=1, content_type='text_editor')
+
+    def ask(self, title):
+        return DiscussionThread.objects.create(
+            lesson=self.lesson, course=self.course, student=self.student, title=title, question="?"
+        )
+
+    def unanswered_count(self):
+        return Course.objects.get(pk=self.course.pk).unanswered_thread_count
+
+    def test_counters_follow_threads_and_instructor_replies(self):
+        first, second = self.ask("First"), self.ask("Second")
+        self.assertEqual(self.unanswered_count(), 2)
+
+        DiscussionPost.objects.create(thread=first, user=self.student, reply_text="Me too")
+        self.assertEqual(self.unanswered_count(), 2)
+
+        reply = DiscussionPost.objects.create(thread=first, user=self.instructor, reply_text="Use a set.")
+        DiscussionPost.objects.create(thread=first, user=self.instructor, reply_text="Or a dict.")
+        first.refresh_from_db()
+        self.assertTrue(first.answered)
+        self.assertIsNotNone(first.last_instructor_reply_at)
+        self.assertEqual(self.unanswered_count(), 1)
+        self.assertEqual([t.pk for t in unanswered_threads_page(self.instructor)['threads']], [second.pk])
+
+        # Removing one of two instructor replies keeps the thread answered.
+        reply.delete()
+        self.assertEqual(self.unanswered_count(), 1)
+        DiscussionPost.objects.filter(thread=first, user=self.instructor).get().delete()
+        self.assertEqual(self.unanswered_count(), 2)
+
+        DiscussionPost.objects.create(thread=second, user=self.instructor, reply_text="Answered.")
+        second.delete()
+        self.assertEqual(self.unanswered_count(), 1)
+
+    def test_reconcile_repairs_drift(self):
+        thread = self.ask("Drifted")
+        DiscussionPost.objects.bulk_create([DiscussionPost(thread=thread, user=self.instructor, reply_text="Hi")])
+        Course.objects.filter(pk=self.course.pk).update(unanswered_thread_count=7)
+
+        self.assertEqual(reconcile_discussion_counters(), (1, 1))
+        thread.refresh_from_db()
+        self.assertTrue(thread.answered)
+        self.assertEqual(self.unanswered_count(), 0)
+        self.assertEqual(reconcile_discussion_counters(), (0, 0))
+
+    def test_queue_is_for_instructors(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(reverse('interactions:unanswered_questions')).status_code, 403)
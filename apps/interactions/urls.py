@@ -7,12 +7,17 @@
 # =================================================================
 
 from django.urls import path
-from .views import AddDiscussionThreadView, AIChatFormView, AddDiscussionPostView
+from .views import (
+    AddDiscussionThreadView, AIChatFormView, AddDiscussionPostView, DiscussionThreadPageView,
+    UnansweredQuestionsView,
+)
 
 app_name = 'interactions'
 
 urlpatterns = [
     path('lessons/<str:lesson_id>/add-thread/', AddDiscussionThreadView.as_view(), name='add_thread'),
+    path('lessons/<str:lesson_id>/threads/', DiscussionThreadPageView.as_view(), name='lesson_threads'),
+    path('questions/unanswered/', UnansweredQuestionsView.as_view(), name='unanswered_questions'),
     path('ai-chat-form/course/<str:course_pk>/lesson/<str:lesson_id>/', AIChatFormView.as_view(), name='ai_chat_form'),
     
     # New URL to handle posting a reply to a thread.
@@ -5,15 +5,27 @@
 # - Lookups for Course and Lesson now use standard primary keys.
 # - When creating a DiscussionThread, the ForeignKey fields for
 #   `course` and `lesson` are now assigned the actual model instances.
+# PERFORMANCE: A lesson's threads are listed a page at a time
+# (`DiscussionThreadPageView`, the "load more" button), and posting
+# a thread returns only that thread's fragment, which HTMX prepends
+# to the list, instead of re-rendering every thread. Threads are
+# rendered from `thread_queryset()`, which loads replies and their
+# authors up front. Instructors work through unanswered threads in
+# `UnansweredQuestionsView`, which walks a partial index.
 # =================================================================
 
+from django.http import HttpResponseBadRequest
+from django.views import View
 from django.views.generic import CreateView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404, render
 
+from .discussions import lesson_threads_page, thread_queryset, unanswered_threads_page
 from .models import DiscussionThread, DiscussionPost
 from .forms import DiscussionThreadForm, DiscussionPostForm
+from apps.core.pagination import InvalidCursor
 from apps.learning.models import Course, Lesson
+from apps.users.models import CustomUser
 
 class AddDiscussionThreadView(LoginRequiredMixin, CreateView):
     model = DiscussionThread
@@ -29,18 +41,43 @@ class AddDiscussionThreadView(LoginRequiredMixin, CreateView):
         thread.lesson = lesson
         thread.save()
 
-        threads = DiscussionThread.objects.filter(lesson=lesson).order_by('-created_at')
-        context = {
-            'threads': threads,
-            'course': course,
-            'current_lesson_id': lesson.pk
-        }
-
-        response = render(self.request, 'interactions/partials/_discussion_list.html', context)
+        context = {'thread': thread_queryset().get(pk=thread.pk), 'is_new': True}
+        response = render(self.request, 'interactions/partials/_thread_item.html', context)
         response['HX-Trigger-Detail'] = '{"message": "Your question has been posted successfully!"}'
         response['HX-Trigger'] = 'showToast'
         return response
 
+class DiscussionThreadPageView(LoginRequiredMixin, View):
+    """ The next page of a lesson's threads, requested by the "load more" button. """
+    def get(self, request, lesson_id):
+        try:
+            page = lesson_threads_page(lesson_id, request.GET.get('cursor'))
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
+        context = {**page, 'more_url': request.path}
+        return render(request, 'interactions/partials/_discussion_page.html', context)
+
+class UnansweredQuestionsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    The instructor's queue of threads no instructor has replied to, oldest
+    first. "Load more" requests get just the next page.
+    """
+    def test_func(self):
+        return self.request.user.role == CustomUser.Roles.INSTRUCTOR
+
+    def get(self, request):
+        try:
+            page = unanswered_threads_page(request.user, request.GET.get('cursor'))
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
+        context = {**page, 'more_url': request.path, 'show_lesson': True}
+        if request.htmx:
+            return render(request, 'interactions/partials/_discussion_page.html', context)
+        context['unanswered_count'] = sum(
+            Course.objects.filter(instructor=request.user).values_list('unanswered_thread_count', flat=True)
+        )
+        return render(request, 'interactions/unanswered_queue.html', context)
+
 class AddDiscussionPostView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = DiscussionPost
     form_class = DiscussionPostForm
@@ -50,15 +87,15 @@ class AddDiscussionPostView(LoginRequiredMixin, UserPassesTestMixin, CreateView)
         return self.request.user.is_authenticated
 
     def form_valid(self, form):
-        thread = get_object_or_404(DiscussionThread, pk=self.kwargs['thread_id'])
+        thread_id = get_object_or_404(DiscussionThread.objects.values_list('pk', flat=True), pk=self.kwargs['thread_id'])
 
         post = form.save(commit=False)
-        post.thread = thread
+        post.thread_id = thread_id
         post.user = self.request.user
         post.save()
 
         # Re-render the thread detail partial to include the new reply
-        context = {'thread': thread, 'request': self.request} # Pass request for template tags
+        context = {'thread': thread_queryset().get(pk=thread_id), 'request': self.request} # Pass request for template tags
         response = render(self.request, self.template_name, context)
         response['HX-Trigger-Detail'] = '{"message": "Your reply has been posted."}'
         response['HX-Trigger'] = 'showToast'
@@ -7,7 +7,10 @@
 # =================================================================
 
 from django.contrib import admin
+from django.db.models import Max
+
 from .models import Course, LearningPath, Lesson, Question, Answer, LearningPathModule
+from .services import bump_quiz_version
 
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
@@ -20,6 +23,9 @@ class LessonInline(admin.TabularInline):
     model = Lesson
     extra = 1
     ordering = ('order',)
+    # Orders are unique per course, so swapping two here would collide;
+    # lessons are reordered through the course builder / API instead.
+    readonly_fields = ('order',)
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -29,6 +35,21 @@ class CourseAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     inlines = [LessonInline]
 
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not Lesson:
+            return super().save_formset(request, form, formset, change)
+        lessons = formset.save(commit=False)
+        for lesson in formset.deleted_objects:
+            lesson.delete()
+        # Lessons added here go to the end of the course.
+        next_order = (form.instance.lessons.aggregate(last=Max('order'))['last'] or 0) + 1
+        for lesson in lessons:
+            if lesson.pk is None:
+                lesson.order = next_order
+                next_order += 1
+            lesson.save()
+        formset.save_m2m()
+
 class LearningPathModuleInline(admin.TabularInline):
     model = LearningPathModule
     extra = 1
@@ -49,4 +70,27 @@ class AnswerInline(admin.TabularInline):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('question_text', 'lesson')
     list_filter = ('lesson__course__title',)
-    inlines = [AnswerInline]
\ No newline at end of file
+    inlines = [AnswerInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'lesson' in form.changed_data:
+            # The question left its old quiz, whose answer key still holds it.
+            previous = Lesson.objects.filter(pk=form.initial['lesson']).only('pk', 'quiz_version').first()
+            if previous is not None:
+                bump_quiz_version(previous)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Retire the cached answer key used for grading this lesson's quiz.
+        bump_quiz_version(form.instance.lesson)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_quiz_version(obj.lesson)
+
+    def delete_queryset(self, request, queryset):
+        lessons = list(Lesson.objects.filter(questions__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        for lesson in lessons:
+            bump_quiz_version(lesson)
\ No newline at end of file
@@ -4,16 +4,18 @@
 # MIGRATION: Serializers are updated for the relational models.
 # - LearningPathSerializer now properly represents the ManyToMany
 #   relationship to Courses for richer API responses.
+# PERFORMANCE: Both support `?fields=` sparse fieldsets.
 # =================================================================
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from apps.learning.models import Course, LearningPath, Lesson
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'title', 'slug', 'category', 'instructor']
 
-class LearningPathSerializer(serializers.ModelSerializer):
+class LearningPathSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # Use the CourseSerializer to show nested course details
     courses = CourseSerializer(many=True, read_only=True)
 
@@ -2,11 +2,19 @@
 # apps/learning/api/views.py
 # -----------------------------------------------------------------
 # MIGRATION: Logic is heavily adapted for the relational schema.
-# - `update_lesson_order`: Now updates the `order` field on individual
-#   Lesson model instances within a transaction for data integrity.
+# - `update_lesson_order`: Rewrites the `order` field of the lessons
+#   within a transaction for data integrity.
 # - `update_structure`: Rebuilds the relationship through the
 #   `LearningPathModule` model, clearing old entries and creating new
 #   ones with the correct order.
+# PERFORMANCE: Lists are keyset-paginated (see apps/core/pagination.py)
+# and the paths' courses are prefetched for the nested serializer.
+# A path structure update rewrites its modules in bulk under
+# `defer_path_sync`, which skips the per-module signals, then
+# refreshes the path membership map and the path's progress once.
+# A lesson reorder is validated against the course's lessons and
+# written in a fixed number of statements touching only the lessons
+# that moved (see `reorder_lessons`), instead of one UPDATE per lesson.
 # =================================================================
 
 from rest_framework import viewsets, status, permissions
@@ -14,13 +22,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db import transaction
 
-from apps.learning.models import Course, LearningPath, Lesson, LearningPathModule
+from apps.learning.models import Course, LearningPath, LearningPathModule
+from apps.learning.services import (
+    InvalidLessonOrder, bump_outline_version, defer_path_sync, invalidate_path_membership, reorder_lessons,
+)
+from apps.enrollment.services import recompute_path_progress, refresh_continue_orders
 from .serializers import CourseSerializer, LearningPathSerializer
 
 class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAdminUser] # Example permission
+    keyset_ordering = ('pk',)
 
     @action(detail=True, methods=['post'], url_path='update-lesson-order')
     @transaction.atomic
@@ -31,20 +44,26 @@ class CourseViewSet(viewsets.ModelViewSet):
         if not isinstance(lesson_ids_order, list):
             return Response({'error': 'lesson_order must be a list'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update the order for each lesson
-        for index, lesson_id in enumerate(lesson_ids_order):
-            try:
-                Lesson.objects.filter(pk=lesson_id, course=course).update(order=index + 1)
-            except (Lesson.DoesNotExist, ValueError):
-                # Handle cases where lesson_id is invalid or doesn't belong to the course
-                continue
+        try:
+            changed = reorder_lessons(course, lesson_ids_order)
+        except InvalidLessonOrder as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({'status': 'Lesson order updated successfully'}, status=status.HTTP_200_OK)
+        if changed:
+            # Lesson pages read prev/next and the sidebar from the cached outline,
+            # and dashboard cards link to the lesson order to continue from.
+            bump_outline_version(course)
+            refresh_continue_orders([course.pk])
+
+        return Response(
+            {'status': 'Lesson order updated successfully', 'changed': changed}, status=status.HTTP_200_OK
+        )
 
 class LearningPathViewSet(viewsets.ModelViewSet):
-    queryset = LearningPath.objects.all()
+    queryset = LearningPath.objects.prefetch_related('courses')
     serializer_class = LearningPathSerializer
     permission_classes = [permissions.IsAdminUser] # Example permission
+    keyset_ordering = ('pk',)
 
     @action(detail=True, methods=['post'], url_path='update-structure')
     @transaction.atomic
@@ -55,19 +74,28 @@ class LearningPathViewSet(viewsets.ModelViewSet):
         if not isinstance(course_ids, list):
             return Response({'error': 'course_ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Clear existing course structure for this path
-        learning_path.modules.all().delete()
-
-        # Create new module entries with the correct order
-        for index, course_id in enumerate(course_ids):
+        # Unknown or malformed ids are skipped, as are repeats.
+        requested = []
+        for course_id in course_ids:
             try:
-                course = Course.objects.get(pk=course_id)
-                LearningPathModule.objects.create(
-                    learning_path=learning_path,
-                    course=course,
-                    order=index + 1
-                )
-            except (Course.DoesNotExist, ValueError):
+                requested.append(int(course_id))
+            except (TypeError, ValueError):
                 continue
+        requested = list(dict.fromkeys(requested))
+        existing = set(Course.objects.filter(pk__in=requested).values_list('pk', flat=True))
+
+        with defer_path_sync():
+            # Clear existing course structure for this path
+            LearningPathModule.objects.filter(learning_path=learning_path).delete()
+
+            # Create new module entries with the correct order
+            LearningPathModule.objects.bulk_create([
+                LearningPathModule(learning_path=learning_path, course_id=course_id, order=index)
+                for index, course_id in enumerate(
+                    (course_id for course_id in requested if course_id in existing), start=1
+                )
+            ])
+        invalidate_path_membership()
+        recompute_path_progress(path_ids=[learning_path.pk])
 
         return Response({'status': 'Learning path structure updated successfully'}, status=status.HTTP_200_OK)
\ No newline at end of file
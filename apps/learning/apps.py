@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class LearningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.learning'
\ No newline at end of file
+    name = 'apps.learning'
+
+    def ready(self):
+        # This imports the signals file when the app is ready
+        import apps.learning.signals
@@ -0,0 +1,39 @@
+# =================================================================
+# apps/learning/management/commands/index_lesson_content.py
+# -----------------------------------------------------------------
+# PERFORMANCE: (Re)builds the stored lesson chunks behind the AI
+# assistant's retrieval index. Lessons are re-chunked on save, so
+# this is only needed to backfill lessons created before the index
+# existed or changed by bulk updates that bypass the signals.
+# =================================================================
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from apps.learning.models import Course, Lesson
+from apps.learning.retrieval import index_lesson
+
+
+class Command(BaseCommand):
+    help = "Re-chunks lesson text for the AI assistant's retrieval index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help="Only index this course id (repeatable).")
+
+    def handle(self, *args, **options):
+        lessons = Lesson.objects.only('pk', 'course_id', 'title', 'content_data').order_by('course_id', 'order')
+        if options['courses']:
+            lessons = lessons.filter(course_id__in=options['courses'])
+
+        course_ids = set()
+        count = 0
+        for lesson in lessons.iterator(chunk_size=500):
+            with transaction.atomic():
+                index_lesson(lesson)
+            course_ids.add(lesson.course_id)
+            count += 1
+        # Retire the cached course indexes built from the old chunks.
+        Course.objects.filter(pk__in=course_ids).update(outline_version=F('outline_version') + 1)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} lesson(s) in {len(course_ids)} course(s)."))
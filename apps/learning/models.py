@@ -42,6 +42,15 @@ class Course(models.Model):
     )
     cover_image_url = models.URLField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized number of lessons, maintained by the Lesson signals so that
+    # progress updates never have to run `lessons.count()`.
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever a lesson is added, changed, removed or reordered so
+    # that cached course outlines expire.
+    outline_version = models.PositiveIntegerField(default=0, editable=False)
+    # Discussion threads no instructor has replied to yet, maintained by
+    # the interactions signals for the instructor dashboard.
+    unanswered_thread_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -64,9 +73,22 @@ class Lesson(models.Model):
     # This will store video URLs, text content, etc. Quiz content is now linked via relations.
     content_data = models.JSONField(default=dict, blank=True)
     is_previewable = models.BooleanField(default=False)
+    # Bumped whenever the quiz is rebuilt so cached answer keys expire.
+    quiz_version = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever the lesson is saved so cached AI assistant answers
+    # about its content expire.
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever an instructor pins, edits or unpins an AI assistant
+    # answer, so every process stops serving its cached pins.
+    pins_version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['order']
+        constraints = [
+            # Lesson pages are addressed by (course, order); this is also
+            # the index behind them and behind the course outlines.
+            models.UniqueConstraint(fields=['course', 'order'], name='unique_lesson_order'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - Lesson {self.order}: {self.title}"
@@ -76,6 +98,10 @@ class Question(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='questions')
     question_text = models.TextField()
 
+    class Meta:
+        # Questions are graded by position, so their order must be stable.
+        ordering = ['id']
+
     def __str__(self):
         return self.question_text[:80]
 
@@ -88,6 +114,27 @@ class Answer(models.Model):
     def __str__(self):
         return self.answer_text
 
+class LessonChunk(models.Model):
+    """
+    A passage of a lesson's text with its term counts, maintained by the
+    Lesson signals for the AI assistant's retrieval index (see retrieval.py).
+    """
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='chunks')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lesson_chunks')
+    position = models.PositiveIntegerField()
+    text = models.TextField()
+    token_estimate = models.PositiveIntegerField()
+    term_counts = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['lesson', 'position']
+        indexes = [
+            models.Index(fields=['course', 'lesson', 'position']),
+        ]
+
+    def __str__(self):
+        return f"{self.lesson_id}#{self.position}"
+
 class LearningPath(models.Model):
     """ Represents a high-level learning path or diploma. """
     title = models.CharField(max_length=255)
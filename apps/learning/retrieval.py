@@ -0,0 +1,204 @@
+# =================================================================
+# apps/learning/retrieval.py
+# -----------------------------------------------------------------
+# PERFORMANCE: A local BM25 index over lesson text, used to give the
+# AI assistant only the passages relevant to a question, within a
+# token budget, instead of whole lessons.
+# - Each lesson's text is split into overlapping word windows and
+#   stored as `LessonChunk` rows with their term frequencies. Saving
+#   a lesson re-chunks only that lesson (see signals.py).
+# - The per-course postings are assembled from those rows and kept
+#   in a process-local LRU keyed by (course, `outline_version`), which
+#   every lesson change bumps, so a changed course rebuilds from
+#   stored term counts without re-tokenizing its other lessons. The
+#   index is not put in the Django cache: a pickling backend would
+#   deserialize the whole index on every question.
+# =================================================================
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from django.utils.html import strip_tags
+
+from .models import LessonChunk
+
+CHUNK_WORDS = 120
+CHUNK_OVERLAP_WORDS = 30
+# Built course indexes kept per process, least recently used dropped first.
+MAX_CACHED_INDEXES = 32
+
+# BM25 parameters (the usual defaults).
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Passages from the lesson the student is in rank a little higher.
+CURRENT_LESSON_BOOST = 1.25
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Frequent English words that carry no signal for ranking.
+STOP_WORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its of on or so "
+    "than that the their then there these this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text):
+    """ Lower-cased word tokens of `text`, without stop words. """
+    return [token for token in _TOKEN_RE.findall(text.casefold()) if token not in STOP_WORDS]
+
+
+def estimate_tokens(text):
+    """ A model-agnostic estimate of the prompt tokens `text` costs (~4 characters per token). """
+    return math.ceil(len(text) / 4)
+
+
+def lesson_text(lesson):
+    """ The searchable text of a lesson: its title and the text fields of `content_data`. """
+    parts = [lesson.title]
+
+    def collect(value, key=''):
+        if isinstance(value, str):
+            if not key.endswith('url'):
+                parts.append(strip_tags(value))
+        elif isinstance(value, dict):
+            for child_key, child in value.items():
+                collect(child, str(child_key))
+        elif isinstance(value, list):
+            for child in value:
+                collect(child, key)
+
+    collect(lesson.content_data or {})
+    return '\n'.join(part.strip() for part in parts if part and part.strip())
+
+
+def chunk_text(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP_WORDS):
+    """ Splits `text` into windows of `size` words, consecutive windows sharing `overlap` words. """
+    words = text.split()
+    if not words:
+        return []
+    step = size - overlap
+    return [' '.join(words[start:start + size]) for start in range(0, max(len(words) - overlap, 1), step)]
+
+
+def index_lesson(lesson):
+    """ Replaces the stored chunks of `lesson` with freshly computed ones. """
+    LessonChunk.objects.filter(lesson_id=lesson.pk).delete()
+    LessonChunk.objects.bulk_create([
+        LessonChunk(
+            lesson_id=lesson.pk,
+            course_id=lesson.course_id,
+            position=position,
+            text=text,
+            token_estimate=estimate_tokens(text),
+            term_counts=dict(Counter(tokenize(text))),
+        )
+        for position, text in enumerate(chunk_text(lesson_text(lesson)))
+    ])
+
+
+class CourseIndex:
+    """ BM25 postings over the chunks of one course. """
+    def __init__(self, chunks):
+        """
+        Args:
+            chunks: Dicts with `lesson_id`, `lesson_title`, `text`,
+                `token_estimate` and `term_counts` keys.
+        """
+        self.chunks = [
+            {key: chunk[key] for key in ('lesson_id', 'lesson_title', 'text', 'token_estimate')} for chunk in chunks
+        ]
+        self.lengths = []
+        self.postings = {}
+        for position, chunk in enumerate(chunks):
+            self.lengths.append(sum(chunk['term_counts'].values()))
+            for term, count in chunk['term_counts'].items():
+                self.postings.setdefault(term, []).append((position, count))
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def scores(self, query):
+        """ BM25 score of every chunk matching at least one query term, as {chunk position: score}. """
+        total = len(self.chunks)
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[position] / self.average_length)
+                scores[position] += idf * count * (BM25_K1 + 1) / (count + norm)
+        return scores
+
+    def search(self, query, top_k, token_budget, lesson_id=None):
+        """
+        Returns up to `top_k` of the best-scoring chunks whose combined
+        `token_estimate` fits in `token_budget`, best first. Chunks of
+        `lesson_id` get a small boost.
+        """
+        scores = self.scores(query)
+        if lesson_id is not None:
+            for position in scores:
+                if self.chunks[position]['lesson_id'] == lesson_id:
+                    scores[position] *= CURRENT_LESSON_BOOST
+
+        selected, used = [], 0
+        for position in sorted(scores, key=scores.__getitem__, reverse=True):
+            chunk = self.chunks[position]
+            if used + chunk['token_estimate'] > token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk['token_estimate']
+            if len(selected) == top_k:
+                break
+        return selected
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def build_course_index(course_pk):
+    """ Builds the BM25 index of a course from its stored chunks (one query). """
+    chunks = LessonChunk.objects.filter(course_id=course_pk).order_by('lesson__order', 'lesson_id', 'position')
+    return CourseIndex([
+        {**chunk, 'lesson_title': chunk['lesson__title']}
+        for chunk in chunks.values('lesson_id', 'lesson__title', 'text', 'token_estimate', 'term_counts')
+    ])
+
+
+def get_course_index(course):
+    """
+    Returns the BM25 index of a course, built at most once per process
+    and outline version.
+
+    Args:
+        course: The Course; only `pk` and `outline_version` are read.
+    """
+    key = (course.pk, course.outline_version)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = build_course_index(course.pk)
+    with _indexes_lock:
+        # Older versions of the course are never asked for again.
+        for stale in [cached for cached in _indexes if cached[0] == course.pk]:
+            del _indexes[stale]
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def clear_course_indexes():
+    """ Drops every index built by this process. """
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,236 @@
+# =================================================================
+# apps/learning/services.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Versioned, cached read models for the learning app.
+#
+# Course outlines: the ordered (id, order, title, type) list of a
+# course's lessons, cached under `Course.outline_version` so lesson
+# pages build their sidebar and prev/next links from memory.
+#
+# Quiz answer keys: each quiz's correct answers compiled into a list
+# (question position -> correct answer id), cached under the lesson's
+# `quiz_version`, so grading costs no quiz-structure queries on a warm
+# cache. Saving a quiz bumps the version, which retires the old key.
+#
+# Lesson reordering: `reorder_lessons` validates the new order
+# against the course's lessons and rewrites only the lessons whose
+# position changed, in a fixed number of statements.
+#
+# Path membership: which learning paths each course belongs to, as
+# one cached map, so course progress changes find the path
+# enrollments to roll up without a query when the course is in no
+# path. Module changes delete the key; bulk rewrites of a path's
+# modules run under `defer_path_sync` and refresh it once at the end.
+# =================================================================
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min, Q
+
+from .models import Course, LearningPathModule, Lesson, Question
+
+OUTLINE_TIMEOUT = 60 * 60 * 24
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+PATH_MEMBERSHIP_TIMEOUT = 60 * 60 * 24
+PATH_MEMBERSHIP_KEY = "learning:path-membership"
+
+_path_sync_deferred = ContextVar('path_sync_deferred', default=False)
+
+
+class InvalidLessonOrder(ValueError):
+    """ The submitted lesson order is not a permutation of the course's lessons. """
+
+
+def _outline_cache_key(course):
+    return f"learning:outline:{course.pk}:v{course.outline_version}"
+
+
+def get_course_outline(course):
+    """
+    Returns the cached outline of a course.
+
+    Args:
+        course: The Course; only `pk` and `outline_version` are read.
+
+    Returns:
+        A list of dicts with `id`, `order`, `title` and `content_type`
+        keys, one per lesson, sorted by lesson order.
+    """
+    key = _outline_cache_key(course)
+    outline = cache.get(key)
+    if outline is None:
+        outline = list(
+            Lesson.objects.filter(course_id=course.pk)
+            .order_by('order', 'id')
+            .values('id', 'order', 'title', 'content_type')
+        )
+        cache.set(key, outline, OUTLINE_TIMEOUT)
+    return outline
+
+
+def get_adjacent_lessons(outline, lesson_order):
+    """
+    Finds the outline entries before and after `lesson_order`.
+
+    Returns:
+        A tuple of (previous_entry, next_entry); either may be None.
+    """
+    prev_entry = next_entry = None
+    for entry in outline:
+        if entry['order'] < lesson_order:
+            prev_entry = entry
+        elif entry['order'] > lesson_order:
+            next_entry = entry
+            break
+    return prev_entry, next_entry
+
+
+def bump_outline_version(course):
+    """ Retires the cached outline of `course` after its lessons changed. """
+    Course.objects.filter(pk=course.pk).update(outline_version=F('outline_version') + 1)
+    cache.delete(_outline_cache_key(course))
+    course.outline_version += 1
+
+
+def reorder_lessons(course, lesson_ids):
+    """
+    Gives the lessons of `course` the orders 1..n in the sequence of
+    `lesson_ids`. Must run inside a transaction.
+
+    Only the lessons whose order changes are written: they are first
+    moved past the course's highest order, so that no intermediate row
+    collides with the (course, order) unique constraint, then set to
+    their new orders with a single CASE UPDATE.
+
+    Args:
+        course: The Course whose lessons are reordered.
+        lesson_ids: Every lesson id of the course, each exactly once.
+
+    Returns:
+        The number of lessons whose order changed.
+
+    Raises:
+        InvalidLessonOrder: If `lesson_ids` holds a non-integer (or a bool), a duplicate,
+            a lesson of another course, or misses one of the course's lessons.
+    """
+    # bool is an int subclass, but `True` is not a lesson id.
+    if any(isinstance(lesson_id, bool) or not isinstance(lesson_id, int) for lesson_id in lesson_ids):
+        raise InvalidLessonOrder("lesson_order must only contain lesson ids")
+    if len(set(lesson_ids)) != len(lesson_ids):
+        raise InvalidLessonOrder("lesson_order contains duplicate lesson ids")
+
+    current = dict(Lesson.objects.select_for_update().filter(course_id=course.pk).values_list('pk', 'order'))
+    if set(lesson_ids) != current.keys():
+        raise InvalidLessonOrder("lesson_order must list every lesson of the course exactly once")
+
+    changed = [
+        Lesson(pk=lesson_id, order=position)
+        for position, lesson_id in enumerate(lesson_ids, start=1)
+        if current[lesson_id] != position
+    ]
+    if not changed:
+        return 0
+    offset = max(max(current.values()), len(lesson_ids)) + 1
+    Lesson.objects.filter(pk__in=[lesson.pk for lesson in changed]).update(order=F('order') + offset)
+    Lesson.objects.bulk_update(changed, ['order'])
+    return len(changed)
+
+
+def _answer_key_cache_key(lesson):
+    return f"learning:answer-key:{lesson.pk}:v{lesson.quiz_version}"
+
+
+def get_answer_key(lesson):
+    """
+    Returns the compiled answer key for a quiz lesson.
+
+    Args:
+        lesson: The quiz Lesson; only `pk` and `quiz_version` are read.
+
+    Returns:
+        A list with one entry per question, in question order, holding the
+        correct answer's id (or None if the question has no correct answer).
+    """
+    key = _answer_key_cache_key(lesson)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = list(
+            Question.objects.filter(lesson_id=lesson.pk)
+            .annotate(correct_answer_id=Min('answers__pk', filter=Q(answers__is_correct=True)))
+            .order_by('id')
+            .values_list('correct_answer_id', flat=True)
+        )
+        cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+
+def grade_submission(answer_key, submitted_answers):
+    """
+    Grades a submission against a compiled answer key.
+
+    Args:
+        answer_key: The list returned by `get_answer_key`.
+        submitted_answers: A dict of {'question_<n>': '<answer id>'}, 1-based.
+
+    Returns:
+        The score as a percentage rounded to two decimals.
+    """
+    if not answer_key:
+        return 100
+    correct_answers_count = sum(
+        1 for i, correct_answer_id in enumerate(answer_key)
+        if correct_answer_id is not None and str(submitted_answers.get(f'question_{i+1}')) == str(correct_answer_id)
+    )
+    return round((correct_answers_count / len(answer_key)) * 100, 2)
+
+
+def bump_quiz_version(lesson):
+    """ Retires the cached answer key of `lesson` after its quiz changed. """
+    Lesson.objects.filter(pk=lesson.pk).update(quiz_version=F('quiz_version') + 1)
+    cache.delete(_answer_key_cache_key(lesson))
+    lesson.quiz_version += 1
+
+
+def get_path_membership():
+    """
+    Returns the cached course -> learning path membership map.
+
+    Returns:
+        A dict mapping the id of every course that belongs to a learning
+        path to the list of ids of the paths containing it.
+    """
+    membership = cache.get(PATH_MEMBERSHIP_KEY)
+    if membership is None:
+        membership = {}
+        for course_id, path_id in LearningPathModule.objects.values_list('course_id', 'learning_path_id'):
+            membership.setdefault(course_id, []).append(path_id)
+        cache.set(PATH_MEMBERSHIP_KEY, membership, PATH_MEMBERSHIP_TIMEOUT)
+    return membership
+
+
+def invalidate_path_membership():
+    """ Drops the membership map after a path's courses changed. """
+    cache.delete(PATH_MEMBERSHIP_KEY)
+    # A concurrent reader may have cached the old rows before the commit.
+    transaction.on_commit(lambda: cache.delete(PATH_MEMBERSHIP_KEY))
+
+
+@contextmanager
+def defer_path_sync():
+    """
+    Skips the per-module path signals inside the block. The caller must
+    invalidate the membership map and recompute the path itself afterwards.
+    """
+    token = _path_sync_deferred.set(True)
+    try:
+        yield
+    finally:
+        _path_sync_deferred.reset(token)
+
+
+def path_sync_deferred() -> bool:
+    """ Whether the current context runs under `defer_path_sync`. """
+    return _path_sync_deferred.get()
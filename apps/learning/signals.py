@@ -0,0 +1,113 @@
+# =================================================================
+# apps/learning/signals.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Keeps the denormalized `Course.lesson_count` and
+# `Enrollment.completed_count` counters in step with lesson creation
+# and deletion, then refreshes the progress of the course's
+# enrollments with a single set-based UPDATE. Every lesson change
+# also bumps `Course.outline_version` to expire cached outlines and
+# refreshes the "continue" lesson on the student dashboard cards.
+# Saving an existing lesson bumps its `content_version`, which
+# retires the AI assistant answers cached for it, and every save
+# re-chunks the lesson for the assistant's retrieval index. A lesson
+# moved to another course counts as removed from the old course
+# (whose enrollments give back its completion) and added to the new
+# one, and both courses' progress is recomputed.
+# Adding a course to or removing it from a learning path drops the
+# cached path membership map and recomputes the path's enrollments,
+# unless the change runs under `defer_path_sync`.
+# =================================================================
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Course, LearningPathModule, Lesson
+from .retrieval import index_lesson
+from .services import invalidate_path_membership, path_sync_deferred
+from apps.enrollment.models import Enrollment
+from apps.enrollment.services import (
+    recompute_course_progress, recompute_path_progress, refresh_continue_orders, sync_course_cards,
+)
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_course(sender, instance, update_fields=None, **kwargs):
+    instance._previous_course_id = None
+    if instance.pk is not None and (update_fields is None or 'course' in update_fields):
+        instance._previous_course_id = (
+            Lesson.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+        )
+
+
+def _release_moved_lesson(lesson, old_course_id):
+    """ Takes `lesson` out of the completions of the old course's enrollments. """
+    completions = Enrollment.completed_lessons.through.objects.filter(
+        lesson_id=lesson.pk,
+        enrollment__content_type=ContentType.objects.get_for_model(Course),
+        enrollment__object_id=old_course_id,
+    )
+    Enrollment.objects.filter(
+        pk__in=completions.values('enrollment_id'), completed_count__gt=0
+    ).update(completed_count=F('completed_count') - 1)
+    completions.delete()
+    Course.objects.filter(pk=old_course_id).update(
+        lesson_count=Greatest(F('lesson_count') - 1, 0), outline_version=F('outline_version') + 1
+    )
+
+
+@receiver(post_save, sender=Lesson)
+def sync_course_on_lesson_save(sender, instance, created, **kwargs):
+    # Re-chunked before the outline version moves, so a retrieval index
+    # cached under the new version never holds the old chunks.
+    index_lesson(instance)
+    old_course_id = getattr(instance, '_previous_course_id', None)
+    moved = not created and old_course_id is not None and old_course_id != instance.course_id
+    course_ids = [old_course_id, instance.course_id] if moved else [instance.course_id]
+    if created or moved:
+        if moved:
+            _release_moved_lesson(instance, old_course_id)
+        Course.objects.filter(pk=instance.course_id).update(
+            lesson_count=F('lesson_count') + 1, outline_version=F('outline_version') + 1
+        )
+        recompute_course_progress(course_ids=course_ids)
+    else:
+        Course.objects.filter(pk=instance.course_id).update(outline_version=F('outline_version') + 1)
+    if not created:
+        Lesson.objects.filter(pk=instance.pk).update(content_version=F('content_version') + 1)
+    refresh_continue_orders(course_ids)
+
+
+@receiver(pre_delete, sender=Lesson)
+def release_completed_lesson(sender, instance, **kwargs):
+    # The completed_lessons rows are cascaded away with the lesson, so the
+    # enrollments that counted it must give it back while they still exist.
+    Enrollment.objects.filter(
+        completed_lessons=instance, completed_count__gt=0
+    ).update(completed_count=F('completed_count') - 1)
+
+
+@receiver(post_delete, sender=Lesson)
+def sync_course_on_lesson_delete(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(
+        lesson_count=Greatest(F('lesson_count') - 1, 0), outline_version=F('outline_version') + 1
+    )
+    recompute_course_progress(course_ids=[instance.course_id])
+    refresh_continue_orders([instance.course_id])
+
+
+@receiver(post_save, sender=Course)
+def sync_cards_on_course_save(sender, instance, created, **kwargs):
+    if not created:
+        sync_course_cards([instance])
+
+
+@receiver(post_save, sender=LearningPathModule)
+@receiver(post_delete, sender=LearningPathModule)
+def sync_path_on_module_change(sender, instance, **kwargs):
+    if path_sync_deferred():
+        return
+    invalidate_path_membership()
+    recompute_path_progress(path_ids=[instance.learning_path_id])
@@ -0,0 +1,256 @@
+# =================================================================
+# apps/learning/tests.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Enforces the documented per-request query budget of
+# `learning:lesson_detail` and checks the cached course outline and
+# the lesson retrieval index used by the AI assistant.
+# =================================================================
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.enrollment.models import Enrollment, QuizAttempt
+from apps.learning.models import Answer, Course, Lesson, LessonChunk, Question
+from apps.learning.retrieval import CHUNK_WORDS, clear_course_indexes, get_course_index
+from apps.learning.services import get_answer_key
+from apps.learning.views import LessonDetailView
+from apps.users.models import CustomUser
+
+class LessonDetailQueryBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='viewer', password='password123')
+        cls.instructor = CustomUser.objects.create_user(username='teacher', role=CustomUser.Roles.INSTRUCTOR)
+        cls.course = Course.objects.create(
+            title="Outline Course", slug='outline-course', description="", category="Web", instructor=cls.instructor
+        )
+        for i in range(1, 31):
+            Lesson.objects.create(course=cls.course, title=f"Lesson {i}", order=i, content_type='text_editor')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def get(self, lesson_order, slug='outline-course'):
+        path = reverse('learning:lesson_detail', kwargs={'course_slug': slug, 'lesson_order': lesson_order})
+        request = self.factory.get(path)
+        request.user = self.student
+        return LessonDetailView.as_view()(request, course_slug=slug, lesson_order=lesson_order)
+
+    def test_query_budget(self):
+        self.get(1)  # enrolls the student and warms the outline cache
+        # Rendered inside the budget, so lazy lookups from the template count too.
+        with self.assertNumQueries(LessonDetailView.QUERY_BUDGET):
+            response = self.get(2)
+            response.render()
+
+        context = response.context_data
+        self.assertEqual(context['current_lesson'].order, 2)
+        self.assertEqual(context['prev_lesson_order'], 1)
+        self.assertEqual(context['next_lesson_order'], 3)
+        self.assertEqual(len(context['sorted_lessons']), 30)
+
+        # Revisiting the same lesson does not write.
+        with self.assertNumQueries(LessonDetailView.QUERY_BUDGET - 2):
+            self.get(2).render()
+
+    def test_enrollment_is_touched(self):
+        self.get(5)
+        enrollment = Enrollment.objects.get(student=self.student, object_id=self.course.pk)
+        self.assertEqual(enrollment.last_accessed_lesson.order, 5)
+
+    def test_outline_expires_when_lessons_change(self):
+        self.get(1)
+        Lesson.objects.filter(course=self.course, order=30).get().delete()
+        context = self.get(29).context_data
+        self.assertIsNone(context['next_lesson_order'])
+        self.assertEqual(len(context['sorted_lessons']), 29)
+
+    def test_missing_lesson_redirects_to_first(self):
+        response = self.get(99)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.endswith('/lessons/1/'))
+
+
+class RetrievalIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title="Python", slug='python', description="", category="Web")
+        topics = {
+            1: "Lists are ordered mutable sequences. Append adds an item and slicing copies a list.",
+            2: "Dictionaries map hashable keys to values. Lookups by key are constant time on average.",
+            3: "Decorators wrap a function to extend its behaviour without changing the wrapped function.",
+        }
+        for order, text in topics.items():
+            Lesson.objects.create(
+                course=cls.course, title=f"Topic {order}", order=order, content_type='text_editor',
+                content_data={'description': f"<p>{text}</p>", 'video_url': "https://example.com/dictionaries"},
+            )
+        # A long lesson, split into several chunks.
+        Lesson.objects.create(
+            course=cls.course, title="Filler", order=4, content_type='text_editor',
+            content_data={'description': ' '.join(f"word{n}" for n in range(CHUNK_WORDS * 3))},
+        )
+
+    def setUp(self):
+        cache.clear()
+        clear_course_indexes()
+
+    def index(self):
+        return get_course_index(Course.objects.get(pk=self.course.pk))
+
+    def test_most_relevant_passages_first_within_budget(self):
+        results = self.index().search("How do dictionary keys work?", top_k=2, token_budget=1000)
+        self.assertEqual(results[0]['lesson_title'], "Topic 2")
+        self.assertNotIn("example.com", results[0]['text'])
+        self.assertNotIn("<p>", results[0]['text'])
+
+        self.assertEqual(self.index().search("function decorators", top_k=5, token_budget=5), [])
+        self.assertEqual(len(LessonChunk.objects.filter(lesson__title="Filler")), 4)
+
+    def test_lesson_changes_reindex_only_that_lesson(self):
+        self.index()
+        with self.assertNumQueries(1):
+            self.index()  # the course lookup; the index itself is cached
+
+        untouched = set(LessonChunk.objects.exclude(lesson__order=3).values_list('pk', flat=True))
+        lesson = Lesson.objects.get(course=self.course, order=3)
+        lesson.content_data = {'description': "Generators yield values lazily."}
+        lesson.save()
+
+        self.assertEqual(set(LessonChunk.objects.exclude(lesson__order=3).values_list('pk', flat=True)), untouched)
+        self.assertEqual(self.index().search("decorators", top_k=5, token_budget=1000), [])
+        self.assertEqual(self.index().search("lazily yield", top_k=5, token_budget=1000)[0]['lesson_title'], "Topic 3")
+
+
+class LessonReorderTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='organizer', is_staff=True)
+        cls.course = Course.objects.create(title="Reordered", slug='reordered', description="", category="Web")
+        cls.lessons = [
+            Lesson.objects.create(course=cls.course, title=f"Lesson {i}", order=i, content_type='video')
+            for i in range(1, 6)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('learning-api:course-update-lesson-order', args=[self.course.pk])
+
+    def reorder(self, lesson_ids):
+        return self.client.post(self.url, {'lesson_order': lesson_ids}, format='json')
+
+    def orders(self):
+        return list(Lesson.objects.filter(course=self.course).order_by('order').values_list('pk', flat=True))
+
+    def test_only_moved_lessons_are_written(self):
+        ids = [lesson.pk for lesson in self.lessons]
+        ids[1], ids[3] = ids[3], ids[1]
+        response = self.reorder(ids)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['changed'], 2)
+        self.assertEqual(self.orders(), ids)
+        self.assertEqual(self.reorder(ids).data['changed'], 0)
+
+    def test_query_count_is_independent_of_course_size(self):
+        def capture():
+            ids = self.orders()
+            with CaptureQueriesContext(connection) as queries:
+                self.reorder(ids[::-1])
+            return len(queries)
+
+        small = capture()
+        for i in range(6, 60):
+            Lesson.objects.create(course=self.course, title=f"Lesson {i}", order=i, content_type='video')
+        self.assertEqual(capture(), small)
+
+    def test_invalid_orders_are_rejected(self):
+        ids = [lesson.pk for lesson in self.lessons]
+        other_course = Course.objects.create(title="Other", slug='other', description="", category="Web")
+        foreign = Lesson.objects.create(course=other_course, title="Foreign", order=1, content_type='video')
+        for lesson_order in (ids[:-1], ids + [ids[0]], ids[:-1] + [foreign.pk], ids[:-1] + ['x'], ids[:-1] + [True], 'x'):
+            self.assertEqual(self.reorder(lesson_order).status_code, 400)
+        self.assertEqual(self.orders(), ids)
+
+
+class QuestionAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(username='quizmaster', password='password123', email='q@m.org')
+        course = Course.objects.create(title="Quizzes", slug='quizzes', description="", category="Web")
+        cls.quizzes = [
+            Lesson.objects.create(course=course, title=f"Quiz {i}", order=i, content_type='quiz') for i in (1, 2)
+        ]
+        cls.questions = []
+        for n in range(3):
+            question = Question.objects.create(lesson=cls.quizzes[0], question_text=f"Question {n}")
+            Answer.objects.create(question=question, answer_text="Yes", is_correct=True)
+            cls.questions.append(question)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def answer_key(self, lesson):
+        return get_answer_key(Lesson.objects.get(pk=lesson.pk))
+
+    def test_deleting_questions_retires_the_answer_key(self):
+        self.assertEqual(len(self.answer_key(self.quizzes[0])), 3)
+        self.client.post(reverse('admin:learning_question_delete', args=[self.questions[0].pk]), {'post': 'yes'})
+        self.assertEqual(len(self.answer_key(self.quizzes[0])), 2)
+
+        self.client.post(reverse('admin:learning_question_changelist'), {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.questions[1].pk],
+        })
+        self.assertEqual(len(self.answer_key(self.quizzes[0])), 1)
+
+    def test_moving_a_question_retires_both_answer_keys(self):
+        old, new = self.quizzes
+        self.assertEqual((len(self.answer_key(old)), len(self.answer_key(new))), (3, 0))
+        question = self.questions[0]
+        answer = question.answers.get()
+        response = self.client.post(reverse('admin:learning_question_change', args=[question.pk]), {
+            'lesson': new.pk, 'question_text': question.question_text,
+            'answers-TOTAL_FORMS': 1, 'answers-INITIAL_FORMS': 1,
+            'answers-0-id': answer.pk, 'answers-0-question': question.pk,
+            'answers-0-answer_text': "Yes", 'answers-0-is_correct': 'on',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual((len(self.answer_key(old)), len(self.answer_key(new))), (2, 1))
+
+
+class QuizResultViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='quiz-taker', password='password123')
+        course = Course.objects.create(title="Results", slug='results', description="", category="Web")
+        cls.quiz = Lesson.objects.create(course=course, title="Quiz", order=1, content_type='quiz')
+        cls.enrollment = Enrollment.objects.create(
+            student=cls.student, content_type=ContentType.objects.get_for_model(Course), object_id=course.pk
+        )
+        cls.attempt = QuizAttempt.objects.create(enrollment=cls.enrollment, lesson=cls.quiz, score=50.0)
+
+    def setUp(self):
+        self.client.force_login(self.student)
+
+    def url(self, attempt_id):
+        return reverse('learning:quiz_result', kwargs={'enrollment_pk': self.enrollment.pk, 'attempt_id': attempt_id})
+
+    def test_result_is_rendered(self):
+        response = self.client.get(self.url(self.attempt.attempt_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['attempt'], self.attempt)
+        self.assertEqual(response.context['lesson'], self.quiz)
+
+    def test_unknown_attempt_redirects_to_dashboard(self):
+        for attempt_id in (uuid.uuid4(), 'not-a-uuid'):
+            with self.subTest(attempt_id=attempt_id):
+                response = self.client.get(self.url(attempt_id))
+                self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
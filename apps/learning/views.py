@@ -9,6 +9,8 @@
 # - The logic for creating and ordering lessons is updated for the new relational structure.
 # =================================================================
 
+import uuid
+
 from django.views.generic import DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse
@@ -16,53 +18,73 @@ from django.shortcuts import get_object_or_404, render, redirect
 from django.http import HttpResponseRedirect
 from django.contrib import messages
 from django.db import transaction
-from django.contrib.contenttypes.models import ContentType
 
 from .models import Course, LearningPath, Lesson, Question, Answer, LearningPathModule
 from .forms import LearningPathForm, LessonForm
-from apps.enrollment.models import Enrollment
+from .services import bump_quiz_version, get_adjacent_lessons, get_course_outline
+from apps.enrollment.models import Enrollment, QuizAttempt
+from apps.enrollment.services import touch_course_enrollment
 from apps.users.models import CustomUser
 
 class LessonDetailView(LoginRequiredMixin, DetailView):
+    """
+    Renders a lesson inside the course player.
+
+    Query budget (see `QUERY_BUDGET`, enforced in apps/learning/tests.py),
+    for a returning student with a warm outline cache:
+      1. the current lesson joined with its course and instructor;
+      2. the student's enrollment row (pk, progress, last accessed lesson);
+      3-4. narrow UPDATEs of `last_accessed_lesson` and of the dashboard
+         course card, only when the last accessed lesson changes;
+      5. the first page of the lesson's discussion threads, fetched by the
+         `get_discussions_for_lesson` tag while the template renders.
+    The sidebar and prev/next links come from the cached course outline.
+    """
     model = Course
     template_name = 'learning/lesson_detail.html'
     slug_url_kwarg = 'course_slug'
     context_object_name = 'course'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        course = self.get_object()
+    QUERY_BUDGET = 5
+
+    def get(self, request, *args, **kwargs):
+        course_slug = self.kwargs.get('course_slug')
         lesson_order = self.kwargs.get('lesson_order')
 
-        try:
-            current_lesson = course.lessons.get(order=lesson_order)
-        except Lesson.DoesNotExist:
+        self.current_lesson = (
+            Lesson.objects.select_related('course__instructor')
+            .filter(course__slug=course_slug, order=lesson_order)
+            .order_by('id')
+            .first()
+        )
+        if self.current_lesson is None:
             # Redirect to the first lesson if the requested order doesn't exist
-            first_lesson = course.lessons.order_by('order').first()
-            if first_lesson:
-                return redirect('learning:lesson_detail', course_slug=course.slug, lesson_order=first_lesson.order)
+            course = get_object_or_404(Course, slug=course_slug)
+            outline = get_course_outline(course)
+            if outline:
+                return redirect('learning:lesson_detail', course_slug=course.slug, lesson_order=outline[0]['order'])
             return redirect('dashboard') # Or to a "course has no lessons" page
 
-        sorted_lessons = course.lessons.order_by('order')
-        prev_lesson = sorted_lessons.filter(order__lt=current_lesson.order).last()
-        next_lesson = sorted_lessons.filter(order__gt=current_lesson.order).first()
+        self.object = self.current_lesson.course
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
 
-        # Get or create enrollment and update progress
-        course_content_type = ContentType.objects.get_for_model(Course)
-        enrollment, _ = Enrollment.objects.get_or_create(
-            student=self.request.user,
-            content_type=course_content_type,
-            object_id=course.pk
-        )
-        enrollment.last_accessed_lesson = current_lesson
-        enrollment.save()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        course = self.object
+        current_lesson = self.current_lesson
+
+        outline = get_course_outline(course)
+        prev_lesson, next_lesson = get_adjacent_lessons(outline, current_lesson.order)
+
+        progress = touch_course_enrollment(self.request.user, course, current_lesson)
 
         context.update({
-            'sorted_lessons': sorted_lessons,
+            'sorted_lessons': outline,
             'current_lesson': current_lesson,
-            'prev_lesson_order': prev_lesson.order if prev_lesson else None,
-            'next_lesson_order': next_lesson.order if next_lesson else None,
-            'progress': enrollment.progress,
+            'prev_lesson_order': prev_lesson['order'] if prev_lesson else None,
+            'next_lesson_order': next_lesson['order'] if next_lesson else None,
+            'progress': progress,
         })
         return context
 
@@ -115,8 +137,11 @@ class LessonCreateView(LoginRequiredMixin, CreateView):
     model = Lesson
     form_class = LessonForm
 
+    @transaction.atomic
     def form_valid(self, form):
-        course = get_object_or_404(Course, pk=self.kwargs['pk'])
+        # The course row is locked so that concurrent additions take turns
+        # picking the next order, which is unique per course.
+        course = get_object_or_404(Course.objects.select_for_update(), pk=self.kwargs['pk'])
         lesson = form.save(commit=False)
         lesson.course = course
 
@@ -175,6 +200,8 @@ class QuizBuilderView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
                 j += 1
             i += 1
 
+        bump_quiz_version(lesson)
+
         messages.success(request, f"Quiz for '{lesson.title}' has been saved successfully.")
         return redirect('learning:course_manage', pk=course.pk)
 
@@ -195,22 +222,34 @@ class TakeQuizView(LoginRequiredMixin, DetailView):
 
 class QuizResultView(LoginRequiredMixin, DetailView):
     model = Enrollment
+    queryset = Enrollment.objects.defer('quiz_attempts')
     template_name = 'learning/quiz_result.html'
     pk_url_kwarg = 'enrollment_pk'
     context_object_name = 'enrollment'
 
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        self.attempt = None
+        try:
+            attempt_id = uuid.UUID(self.kwargs['attempt_id'])
+        except ValueError:
+            attempt_id = None
+        if attempt_id:
+            self.attempt = QuizAttempt.objects.select_related('lesson__course').filter(
+                enrollment=self.object, attempt_id=attempt_id
+            ).first()
+        if not self.attempt:
+            messages.error(request, "Quiz attempt not found.")
+            return redirect('dashboard')
+
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        attempt_id = self.kwargs['attempt_id']
-        attempt = next((att for att in self.object.quiz_attempts if att['attempt_id'] == attempt_id), None)
-        if not attempt:
-            messages.error(self.request, "Quiz attempt not found.")
-            return redirect('dashboard')
-        
-        lesson = get_object_or_404(Lesson, pk=attempt['lesson_id'])
-        course = lesson.course
-        
-        context['attempt'] = attempt
+        lesson = self.attempt.lesson
+
+        context['attempt'] = self.attempt
         context['lesson'] = lesson
-        context['course'] = course
+        context['course'] = lesson.course
         return context
\ No newline at end of file
@@ -0,0 +1,16 @@
+# =================================================================
+# apps/reports/admin.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Exposes background report jobs so operators can see
+# what is queued, running or failing.
+# =================================================================
+
+from django.contrib import admin
+from .models import ReportJob
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'report_type', 'status', 'requested_by', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'report_type')
+    search_fields = ('job_id', 'params_hash', 'error')
+    readonly_fields = ('job_id', 'params_hash', 'created_at', 'started_at', 'finished_at')
@@ -1,2 +1,81 @@
-# This file intentionally left blank.
-# Can be used later for report generation APIs.
\ No newline at end of file
+# =================================================================
+# apps/reports/api/serializers.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Serializers for the background report job API. The
+# request serializer is also used by the report dashboard form, so
+# both entry points validate parameters the same way before a job is
+# queued.
+# =================================================================
+
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from rest_framework import serializers
+
+from apps.contracts.models import Contract
+from apps.enrollment.models import Enrollment
+from apps.learning.models import Course
+from apps.reports.models import ReportJob
+from apps.reports.services.exporters import EXPORTERS
+from apps.users.models import CustomUser
+
+class ReportJobRequestSerializer(serializers.Serializer):
+    report_type = serializers.ChoiceField(choices=ReportJob.ReportType.choices)
+    course_id = serializers.IntegerField(required=False)
+    contract_id = serializers.IntegerField(required=False)
+    student_id = serializers.IntegerField(required=False)
+    export_format = serializers.ChoiceField(choices=sorted(EXPORTERS), default='xlsx')
+
+    def validate(self, attrs):
+        if attrs['report_type'] == ReportJob.ReportType.BULK_PDF:
+            if ('course_id' in attrs) == ('contract_id' in attrs):
+                raise serializers.ValidationError("Please select either a course or a contract for the bulk PDF report.")
+            if 'contract_id' in attrs:
+                if not Contract.objects.filter(pk=attrs['contract_id']).exists():
+                    raise serializers.ValidationError({'contract_id': "Contract not found."})
+                return attrs
+        elif 'course_id' not in attrs:
+            raise serializers.ValidationError({'course_id': "Please select a course."})
+
+        course = Course.objects.filter(pk=attrs['course_id']).only('title').first()
+        if course is None:
+            raise serializers.ValidationError({'course_id': "Course not found."})
+
+        if attrs['report_type'] == ReportJob.ReportType.STUDENT_PDF:
+            student = CustomUser.objects.filter(pk=attrs.get('student_id')).first()
+            if student is None:
+                raise serializers.ValidationError({'student_id': "Please select a student for the PDF report."})
+            enrolled = Enrollment.objects.filter(
+                student=student, content_type=ContentType.objects.get_for_model(Course), object_id=course.pk
+            ).exists()
+            if not enrolled:
+                raise serializers.ValidationError({'student_id': f"{student} is not enrolled in '{course.title}'."})
+        return attrs
+
+    @property
+    def job_params(self):
+        """ The normalized parameters a job is keyed and built on. """
+        data = self.validated_data
+        if data['report_type'] == ReportJob.ReportType.STUDENT_PDF:
+            return {'course_id': data['course_id'], 'student_id': data['student_id']}
+        if data['report_type'] == ReportJob.ReportType.BULK_PDF:
+            if 'contract_id' in data:
+                return {'contract_id': data['contract_id']}
+            return {'course_id': data['course_id']}
+        return {'course_id': data['course_id'], 'export_format': data['export_format']}
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'job_id', 'report_type', 'params', 'status', 'error',
+            'created_at', 'started_at', 'finished_at', 'download_url',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != ReportJob.Status.SUCCEEDED:
+            return None
+        return reverse('reports-api:report-job-download', kwargs={'job_id': obj.job_id})
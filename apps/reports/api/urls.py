@@ -1,12 +1,18 @@
 # =================================================================
 # apps/reports/api/urls.py
 # -----------------------------------------------------------------
-# FINAL FIX: This file is intentionally left blank as there
-# are no API views for the reports app. This corrects an erroneous import.
+# PERFORMANCE: Routes for the background report job API.
 # =================================================================
 
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ReportJobViewSet
+
+app_name = 'reports-api'
+
+router = DefaultRouter()
+router.register(r'jobs', ReportJobViewSet, basename='report-job')
 
 urlpatterns = [
-    # No API URLs for reports yet.
-]
\ No newline at end of file
+    path('', include(router.urls)),
+]
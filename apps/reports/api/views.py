@@ -1,2 +1,49 @@
-# This file intentionally left blank.
-# Can be used later for report generation APIs.
\ No newline at end of file
+# =================================================================
+# apps/reports/api/views.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Report job API. Submitting returns immediately with a
+# job id; the report itself is built by the `run_report_jobs` worker.
+# Clients poll the job and download the stored artifact when it has
+# succeeded.
+# =================================================================
+
+from django.http import FileResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .serializers import ReportJobRequestSerializer, ReportJobSerializer
+from apps.reports.models import ReportJob
+from apps.reports.services.jobs import submit_report_job
+from apps.users.api.permissions import IsAdminOrSupervisorRole
+
+class ReportJobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    POST   /jobs/                   queue a report (or join an identical one)
+    GET    /jobs/<job_id>/          job status
+    GET    /jobs/<job_id>/download/ the finished report
+    """
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAdminOrSupervisorRole]
+    lookup_field = 'job_id'
+
+    def create(self, request, *args, **kwargs):
+        request_serializer = ReportJobRequestSerializer(data=request.data)
+        request_serializer.is_valid(raise_exception=True)
+        job, created = submit_report_job(
+            request_serializer.validated_data['report_type'], request_serializer.job_params, request.user
+        )
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_202_ACCEPTED if not job.is_finished else status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, job_id=None):
+        job = self.get_object()
+        if job.status != ReportJob.Status.SUCCEEDED:
+            return Response({'error': f'Report job is {job.status}.'}, status=status.HTTP_409_CONFLICT)
+        return FileResponse(
+            job.artifact.open('rb'), as_attachment=True, filename=job.artifact_name, content_type=job.content_type
+        )
@@ -0,0 +1,43 @@
+# =================================================================
+# apps/reports/management/commands/run_report_jobs.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Long-running worker that builds queued report jobs
+# in a thread pool, outside the web workers. Run it as its own
+# process (see infra/docker-compose.yml); several workers can run
+# side by side since jobs are claimed with SELECT ... FOR UPDATE
+# SKIP LOCKED. Expired artifacts are purged while idle.
+# =================================================================
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.reports.services.jobs import ReportJobWorker
+
+
+class Command(BaseCommand):
+    help = "Builds queued report jobs and stores their artifacts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Build one batch and exit.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when no job is queued.")
+        parser.add_argument('--purge-interval', type=float, default=3600.0, help="Seconds between purges of expired reports.")
+
+    def handle(self, *args, **options):
+        worker = ReportJobWorker()
+        last_purge = 0.0
+        while True:
+            close_old_connections()
+            counts = worker.run_once()
+            if any(counts.values()):
+                self.stdout.write(f"Built {counts['succeeded']} report(s), {counts['failed']} failed.")
+            if options['once']:
+                break
+            if not any(counts.values()):
+                if time.monotonic() - last_purge >= options['purge_interval']:
+                    purged = worker.purge_expired()
+                    if purged:
+                        self.stdout.write(f"Purged {purged} expired report(s).")
+                    last_purge = time.monotonic()
+                time.sleep(options['interval'])
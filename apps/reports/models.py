@@ -0,0 +1,69 @@
+# =================================================================
+# apps/reports/models.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Heavy reports are built by the `run_report_jobs`
+# worker instead of inside the request. A `ReportJob` records what
+# was asked for, its progress and the stored artifact. Jobs with the
+# same parameters share one row (see `params_hash`), so concurrent
+# identical requests cause a single computation.
+# =================================================================
+
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+
+class ReportJob(models.Model):
+    """ A report requested from the dashboard or the API, built in the background. """
+    class ReportType(models.TextChoices):
+        STUDENT_PDF = 'student_pdf', 'Single Student Performance (PDF)'
+        COURSE_EXPORT = 'course_excel', 'Full Course Enrollments (Excel/CSV)'
+        BULK_PDF = 'bulk_pdf', 'Student Performance PDFs for a Course or Contract (ZIP)'
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    ACTIVE_STATUSES = (Status.QUEUED, Status.RUNNING)
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    report_type = models.CharField(max_length=30, choices=ReportType.choices)
+    params = models.JSONField(default=dict)
+    params_hash = models.CharField(max_length=64, db_index=True, editable=False)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    artifact = models.FileField(upload_to='reports/%Y/%m/', blank=True)
+    artifact_name = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # At most one queued or running job per parameter set.
+            models.UniqueConstraint(
+                fields=['params_hash'],
+                condition=Q(status__in=['queued', 'running']),
+                name='unique_active_report_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} job {self.job_id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
@@ -0,0 +1,100 @@
+# =================================================================
+# apps/reports/services/datasets.py
+# -----------------------------------------------------------------
+# PERFORMANCE: The data behind each report, shared by the report
+# dashboard and the background job worker. Multi-row datasets are
+# generators over `.iterator()` so they can be streamed straight
+# into the exporters and the bulk PDF renderer.
+# =================================================================
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils.text import slugify
+
+from .exporters import EXPORT_CHUNK_SIZE
+from apps.enrollment.models import Enrollment
+from apps.learning.models import Course
+
+
+def student_performance_data(student, course):
+    """
+    Returns the dict rendered by the student performance PDF, or None if
+    the student is not enrolled in `course`.
+    """
+    enrollment = Enrollment.objects.filter(
+        student=student, content_type=ContentType.objects.get_for_model(Course), object_id=course.pk
+    ).first()
+    if not enrollment:
+        return None
+
+    return {
+        "student_name": student.full_name or student.username,
+        "course_title": course.title,
+        "enrollment_date": enrollment.enrollment_date.strftime("%Y-%m-%d"),
+        "progress": enrollment.progress,
+        "status": enrollment.get_status_display(),
+    }
+
+
+def course_enrollment_data(course):
+    """ Yields one dict per enrollment in `course`, streamed from the database cursor. """
+    enrollments = Enrollment.objects.filter(
+        content_type=ContentType.objects.get_for_model(Course), object_id=course.pk
+    ).annotate(
+        student_name=Coalesce(NullIf('student__full_name', Value('')), 'student__username'),
+        student_email=F('student__email'),
+    ).values(
+        'student_name', 'student_email', 'enrollment_date', 'progress', 'status'
+    ).order_by('pk')
+    status_labels = dict(Enrollment.STATUS_CHOICES)
+
+    for enr in enrollments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'student_name': enr['student_name'],
+            'student_email': enr['student_email'],
+            'enrollment_date': enr['enrollment_date'].strftime("%Y-%m-%d"),
+            'progress': enr['progress'],
+            'status': status_labels.get(enr['status'], enr['status']),
+        }
+
+
+def _performance_documents(enrollments):
+    """
+    Yields a (filename, student_data) pair per enrollment, in the shape
+    rendered by the student performance PDF.
+    """
+    course_titles = Course.objects.filter(pk=OuterRef('object_id'))
+    rows = enrollments.annotate(
+        student_name=Coalesce(NullIf('student__full_name', Value('')), 'student__username'),
+        course_title=Subquery(course_titles.values('title')[:1]),
+        course_slug=Subquery(course_titles.values('slug')[:1]),
+    ).values(
+        'student_id', 'student_name', 'course_title', 'course_slug', 'enrollment_date', 'progress', 'status'
+    ).order_by('student_id', 'object_id')
+    status_labels = dict(Enrollment.STATUS_CHOICES)
+
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        # The student pk keeps archive entries unique when names collide.
+        filename = f"{row['course_slug']}/{row['student_id']}_{slugify(row['student_name'])}.pdf"
+        yield filename, {
+            "student_name": row['student_name'],
+            "course_title": row['course_title'],
+            "enrollment_date": row['enrollment_date'].strftime("%Y-%m-%d"),
+            "progress": row['progress'],
+            "status": status_labels.get(row['status'], row['status']),
+        }
+
+
+def course_performance_documents(course):
+    """ One performance report per student enrolled in `course`. """
+    return _performance_documents(Enrollment.objects.filter(
+        content_type=ContentType.objects.get_for_model(Course), object_id=course.pk
+    ))
+
+
+def contract_performance_documents(contract):
+    """ One performance report per course enrollment of each employee covered by `contract`. """
+    return _performance_documents(Enrollment.objects.filter(
+        content_type=ContentType.objects.get_for_model(Course), student__contracts_as_student=contract
+    ))
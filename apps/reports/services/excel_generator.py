@@ -1,54 +1,74 @@
-import openpyxl
-from django.http import HttpResponse
-from io import BytesIO # Import BytesIO to handle in-memory files
+# =================================================================
+# apps/reports/services/excel_generator.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Reports are written by the streaming exporters in
+# `exporters.py`; rows may be any iterable (including querysets
+# streamed with `.iterator()`) and are never collected in memory.
+# Both reports can also be exported as CSV.
+# =================================================================
+
+from .exporters import Sheet, get_exporter
 
 class ExcelReportGenerator:
     """
-    A service to generate Excel (XLSX) files.
+    A service to generate Excel (XLSX) files, or CSV on request.
     """
-    def generate_course_enrollment_excel(self, course_title: str, enrollments_data: list) -> HttpResponse:
+    ENROLLMENT_HEADERS = ["Student Name", "Email", "Enrollment Date", "Progress (%)", "Status"]
+    EMPLOYEE_HEADERS = [
+        "Student Name", "Email", "Joined", "Progress (%)", "Status", "Completed Courses", "Courses", "Last Activity"
+    ]
+    COURSE_HEADERS = ["Course", "Enrolled Employees", "Completed", "Average Progress (%)"]
+
+    def generate_course_enrollment_excel(self, course_title: str, enrollments_data, export_format: str = 'xlsx'):
         """
-        Generates an Excel report of all students enrolled in a course.
+        Generates a report of all students enrolled in a course.
 
         Args:
             course_title: The title of the course.
-            enrollments_data: A list of dictionaries, where each dict represents an enrolled student.
+            enrollments_data: An iterable of dictionaries, where each dict represents an enrolled student.
+                              It is consumed lazily.
+            export_format: 'xlsx' (default) or 'csv'.
 
         Returns:
-            An HttpResponse object with the XLSX file.
+            A streaming response with the file.
         """
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = f"Enrollments for {course_title[:20]}"
+        return get_exporter(export_format).export(
+            self.course_enrollment_filename(course_title), self.course_enrollment_sheets(course_title, enrollments_data)
+        )
 
-        # Define Headers
-        headers = ["Student Name", "Email", "Enrollment Date", "Progress (%)", "Status"]
-        sheet.append(headers)
+    def course_enrollment_filename(self, course_title: str) -> str:
+        return f"course_enrollments_{course_title}"
 
-        # Populate Data
-        for enrollment in enrollments_data:
-            row = [
+    def course_enrollment_sheets(self, course_title: str, enrollments_data) -> list:
+        """ The sheets of the course enrollment report, with rows produced lazily. """
+        rows = (
+            (
                 enrollment.get('student_name'),
                 enrollment.get('student_email'),
                 enrollment.get('enrollment_date'),
                 enrollment.get('progress'),
                 enrollment.get('status'),
-            ]
-            sheet.append(row)
-
-        # --- NEW METHOD TO SAVE IN MEMORY ---
-        # Create an in-memory binary stream
-        buffer = BytesIO()
-        # Save the workbook to the stream
-        workbook.save(buffer)
-        # Move the cursor to the beginning of the stream
-        buffer.seek(0)
-
-        # Create the HTTP response with the in-memory file
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+            for enrollment in enrollments_data
         )
-        response['Content-Disposition'] = f'attachment; filename="course_enrollments_{course_title}.xlsx"'
-        
-        return response
\ No newline at end of file
+        return [Sheet(f"Enrollments for {course_title[:20]}", self.ENROLLMENT_HEADERS, rows)]
+
+    def generate_contract_progress_excel(self, report_title: str, employee_rows, course_rows, export_format: str = 'xlsx'):
+        """
+        Generates a contract progress report with an employee sheet and a
+        per-course breakdown sheet.
+
+        Args:
+            report_title: Used for the download file name.
+            employee_rows: An iterable of row tuples matching `EMPLOYEE_HEADERS`.
+            course_rows: An iterable of row tuples matching `COURSE_HEADERS`.
+            export_format: 'xlsx' (default) or 'csv'.
+
+        Returns:
+            A streaming response with the file.
+        """
+        sheets = [
+            Sheet("Employees", self.EMPLOYEE_HEADERS, employee_rows),
+            Sheet("By Course", self.COURSE_HEADERS, course_rows),
+        ]
+        return get_exporter(export_format).export(report_title, sheets)
@@ -0,0 +1,240 @@
+# =================================================================
+# apps/reports/services/jobs.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Background report jobs.
+# - `submit_report_job` hashes the report parameters and returns the
+#   queued, running or recently finished job with the same hash when
+#   there is one, so identical requests share a single computation.
+# - `ReportJobWorker` claims queued jobs with SKIP LOCKED and a lease,
+#   builds them in a thread pool and stores the artifact with the
+#   default storage backend. A round claims no more jobs than there
+#   are pool threads, so no lease runs out while its job waits in the
+#   pool's queue, and a job's outcome is only recorded by the worker
+#   holding its latest claim.
+# - Bulk PDF jobs hand the WeasyPrint work to `BulkPDFRenderer`'s
+#   process pool, sized by `PDF_PROCESSES` (by default the CPUs
+#   divided by `WORKERS`, so concurrent jobs do not oversubscribe).
+# =================================================================
+
+import hashlib
+import json
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .datasets import (
+    contract_performance_documents, course_enrollment_data, course_performance_documents, student_performance_data,
+)
+from .excel_generator import ExcelReportGenerator
+from .exporters import get_exporter
+from .pdf_batch import BulkPDFRenderer, purge_pdf_cache
+from .pdf_generator import PDFReportGenerator
+from apps.contracts.models import Contract
+from apps.learning.models import Course
+from apps.reports.models import ReportJob
+from apps.users.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+
+def compute_params_hash(report_type: str, params: dict) -> str:
+    """ A stable hash of the report type and its (JSON-serializable) parameters. """
+    canonical = json.dumps({'report_type': report_type, 'params': params}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def submit_report_job(report_type: str, params: dict, user=None):
+    """
+    Queues a report job, or reuses an equivalent one.
+
+    A job with the same parameters is reused while it is queued or running,
+    and for `REUSE_SECONDS` after it succeeded.
+
+    Returns:
+        A tuple of (job, created).
+    """
+    params_hash = compute_params_hash(report_type, params)
+    reuse_since = timezone.now() - timedelta(seconds=settings.REPORT_JOBS['REUSE_SECONDS'])
+    existing = ReportJob.objects.filter(params_hash=params_hash).filter(
+        Q(status__in=ReportJob.ACTIVE_STATUSES)
+        | Q(status=ReportJob.Status.SUCCEEDED, finished_at__gte=reuse_since)
+    ).order_by('-created_at').first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                report_type=report_type, params=params, params_hash=params_hash, requested_by=user
+            )
+        return job, True
+    except IntegrityError:
+        # Lost the race against an identical submission.
+        return ReportJob.objects.get(params_hash=params_hash, status__in=ReportJob.ACTIVE_STATUSES), False
+
+
+def build_student_pdf(params):
+    course = Course.objects.get(pk=params['course_id'])
+    student = CustomUser.objects.get(pk=params['student_id'])
+    student_data = student_performance_data(student, course)
+    if student_data is None:
+        raise ValueError(f"{student} is not enrolled in '{course.title}'.")
+    pdf = PDFReportGenerator().render_student_performance_pdf(student_data)
+    return f"student_report_{student_data['student_name']}.pdf", 'application/pdf', ContentFile(pdf)
+
+
+def build_course_export(params):
+    course = Course.objects.get(pk=params['course_id'])
+    generator = ExcelReportGenerator()
+    exporter = get_exporter(params.get('export_format', 'xlsx'))
+    output = tempfile.TemporaryFile()
+    exporter.write(generator.course_enrollment_sheets(course.title, course_enrollment_data(course)), output)
+    output.seek(0)
+    filename = f"{generator.course_enrollment_filename(course.title)}.{exporter.extension}"
+    return filename, exporter.content_type, File(output)
+
+
+def build_bulk_pdf(params):
+    if params.get('contract_id'):
+        contract = Contract.objects.get(pk=params['contract_id'])
+        title, documents = contract.title, contract_performance_documents(contract)
+    else:
+        course = Course.objects.get(pk=params['course_id'])
+        title, documents = course.title, course_performance_documents(course)
+    output = tempfile.TemporaryFile()
+    stats = BulkPDFRenderer(processes=settings.REPORT_JOBS['PDF_PROCESSES']).write_zip(documents, output)
+    logger.info(f"Bulk PDF report '{title}': {stats}")
+    output.seek(0)
+    return f"performance_reports_{slugify(title)}.zip", 'application/zip', File(output)
+
+
+REPORT_BUILDERS = {
+    ReportJob.ReportType.STUDENT_PDF: build_student_pdf,
+    ReportJob.ReportType.COURSE_EXPORT: build_course_export,
+    ReportJob.ReportType.BULK_PDF: build_bulk_pdf,
+}
+
+
+class ReportJobWorker:
+    """
+    Claims queued report jobs and builds them. Safe to run in several
+    processes at once: jobs are claimed with SKIP LOCKED and leased, and a
+    job whose worker died is picked up again once its lease expires.
+    """
+    def __init__(self, **overrides):
+        config = {**settings.REPORT_JOBS, **overrides}
+        self.workers = config['WORKERS']
+        # Every claimed job starts at once, so its lease covers its build.
+        self.batch_size = max(1, min(config['BATCH_SIZE'], self.workers))
+        self.max_attempts = config['MAX_ATTEMPTS']
+        self.lease = timedelta(seconds=config['LEASE_SECONDS'])
+
+    def claim(self) -> list:
+        now = timezone.now()
+        with transaction.atomic():
+            # Jobs whose lease ran out too many times are given up on.
+            ReportJob.objects.filter(
+                status=ReportJob.Status.RUNNING, lease_expires_at__lt=now, attempts__gte=self.max_attempts
+            ).update(status=ReportJob.Status.FAILED, error="Worker lease expired too many times.", finished_at=now)
+
+            jobs = list(
+                ReportJob.objects.select_for_update(skip_locked=True).filter(
+                    Q(status=ReportJob.Status.QUEUED)
+                    | Q(status=ReportJob.Status.RUNNING, lease_expires_at__lt=now)
+                ).order_by('created_at')[:self.batch_size]
+            )
+            if jobs:
+                ReportJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    status=ReportJob.Status.RUNNING, attempts=F('attempts') + 1,
+                    started_at=now, lease_expires_at=now + self.lease,
+                )
+        for job in jobs:
+            job.status = ReportJob.Status.RUNNING
+            job.attempts += 1
+        return jobs
+
+    def execute(self, job: ReportJob):
+        """
+        Builds one job and records the outcome.
+
+        Returns:
+            The final status, or None if the job's lease ran out and another
+            worker claimed it meanwhile; that worker records the outcome.
+        """
+        try:
+            filename, content_type, content = REPORT_BUILDERS[job.report_type](job.params)
+            job.artifact.save(filename, content, save=False)
+            job.artifact_name = filename
+            job.content_type = content_type
+            job.status = ReportJob.Status.SUCCEEDED
+            job.error = ''
+        except Exception as exc:
+            logger.exception(f"Report job {job.job_id} failed")
+            job.status = ReportJob.Status.FAILED
+            job.error = str(exc)
+        finally:
+            job.finished_at = timezone.now()
+            job.lease_expires_at = None
+            recorded = ReportJob.objects.filter(
+                pk=job.pk, status=ReportJob.Status.RUNNING, attempts=job.attempts
+            ).update(
+                artifact=job.artifact.name or '', artifact_name=job.artifact_name, content_type=job.content_type,
+                status=job.status, error=job.error, finished_at=job.finished_at, lease_expires_at=None,
+            )
+            if not recorded:
+                logger.warning(f"Report job {job.job_id} was claimed again before attempt {job.attempts} finished")
+                if job.artifact:
+                    job.artifact.delete(save=False)
+            if self.workers > 1:
+                # Pool threads hold their own database connections.
+                connections.close_all()
+        return job.status if recorded else None
+
+    def run_once(self) -> dict:
+        """
+        Claims and builds one batch.
+
+        Returns:
+            A dict with the number of jobs that 'succeeded' and 'failed'.
+            Jobs another worker took over are in neither.
+        """
+        counts = {'succeeded': 0, 'failed': 0}
+        jobs = self.claim()
+        if not jobs:
+            return counts
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                outcomes = list(pool.map(self.execute, jobs))
+        else:
+            outcomes = [self.execute(job) for job in jobs]
+        for outcome in outcomes:
+            if outcome is not None:
+                counts[outcome] += 1
+        return counts
+
+    def purge_expired(self) -> int:
+        """
+        Deletes finished jobs (and their files) older than `RETENTION_SECONDS`,
+        and cached bulk PDFs of the same age.
+        """
+        purge_pdf_cache(settings.REPORT_JOBS['RETENTION_SECONDS'])
+        cutoff = timezone.now() - timedelta(seconds=settings.REPORT_JOBS['RETENTION_SECONDS'])
+        expired = ReportJob.objects.filter(
+            status__in=[ReportJob.Status.SUCCEEDED, ReportJob.Status.FAILED], finished_at__lt=cutoff
+        )
+        count = 0
+        for job in expired.iterator():
+            if job.artifact:
+                job.artifact.delete(save=False)
+            job.delete()
+            count += 1
+        return count
@@ -0,0 +1,157 @@
+# =================================================================
+# apps/reports/services/pdf_batch.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Bulk student performance PDFs, written into one ZIP.
+# - HTML is rendered by the Django template engine in the calling
+#   process; only the WeasyPrint layout (the expensive part) is sent
+#   to a process pool, whose workers parse the stylesheet and font
+#   configuration once when they start.
+# - Every PDF is cached in the default storage under a hash of its
+#   data, the generation date, the template and the stylesheet, so
+#   re-running a report the same day only renders the students whose
+#   numbers changed.
+# - By default the pool gets an equal share of the CPUs per report
+#   job thread (`REPORT_JOBS['WORKERS']`), since bulk jobs can run
+#   side by side.
+# - Documents are consumed from an iterator in chunks, so memory
+#   stays bounded by the chunk size rather than the cohort size.
+# =================================================================
+
+import hashlib
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .pdf_generator import (
+    STUDENT_PERFORMANCE_STYLESHEET, STUDENT_PERFORMANCE_TEMPLATE, PDFReportGenerator,
+    render_html_to_pdf, shared_stylesheet, template_source,
+)
+
+PDF_CACHE_DIR = 'reports/pdf-cache'
+
+# Documents looked up in the cache and handed to the pool at a time.
+PDF_CHUNK_SIZE = 64
+
+_process_css_source = None
+
+
+def _init_render_process(css_source):
+    """ Pool initializer: parse the stylesheet once for the life of the process. """
+    global _process_css_source
+    _process_css_source = css_source
+    shared_stylesheet(css_source)
+
+
+def _render_in_process(html_string):
+    return render_html_to_pdf(html_string, _process_css_source)
+
+
+class BulkPDFRenderer:
+    """
+    Renders many student performance reports into a ZIP archive.
+
+    Args:
+        processes: Size of the WeasyPrint process pool. 0 divides the CPUs
+            between the report job worker's threads; 1 renders in the
+            calling process.
+        generated_on: The date printed on the reports (default today).
+    """
+    def __init__(self, processes=0, chunk_size=PDF_CHUNK_SIZE, generated_on=None):
+        self.processes = processes or max(1, (os.cpu_count() or 1) // max(1, settings.REPORT_JOBS['WORKERS']))
+        self.chunk_size = chunk_size
+        self.generated_on = generated_on or timezone.localdate()
+        self.generator = PDFReportGenerator()
+        self.template_source = template_source(STUDENT_PERFORMANCE_TEMPLATE)
+        self.css_source = template_source(STUDENT_PERFORMANCE_STYLESHEET)
+        self._source_digest = hashlib.sha256(
+            (self.template_source + '\0' + self.css_source).encode('utf-8')
+        ).hexdigest()
+
+    def cache_path(self, student_data: dict) -> str:
+        """ Storage path of the cached PDF for `student_data`. """
+        canonical = json.dumps(student_data, sort_keys=True, separators=(',', ':'), default=str)
+        digest = hashlib.sha256(
+            f"{self._source_digest}:{self.generated_on.isoformat()}:{canonical}".encode('utf-8')
+        ).hexdigest()
+        return f"{PDF_CACHE_DIR}/{digest[:2]}/{digest}.pdf"
+
+    def write_zip(self, documents, output) -> dict:
+        """
+        Writes one PDF per (filename, student_data) pair of `documents` into
+        the binary file object `output`.
+
+        Returns:
+            A dict with the number of 'documents', how many were 'rendered'
+            and how many came from the 'cached' artifacts.
+        """
+        stats = {'documents': 0, 'rendered': 0, 'cached': 0}
+        pool = None
+        if self.processes > 1:
+            # spawn: the caller may hold database connections and threads.
+            pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_render_process, initargs=(self.css_source,),
+            )
+        try:
+            # PDF streams are already compressed; storing them is much faster.
+            with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+                documents = iter(documents)
+                while chunk := list(islice(documents, self.chunk_size)):
+                    for filename, pdf in self._render_chunk(chunk, pool, stats):
+                        archive.writestr(filename, pdf)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return stats
+
+    def _render_chunk(self, chunk, pool, stats):
+        results = [None] * len(chunk)
+        misses = []
+        for index, (filename, student_data) in enumerate(chunk):
+            path = self.cache_path(student_data)
+            if default_storage.exists(path):
+                with default_storage.open(path, 'rb') as cached:
+                    results[index] = cached.read()
+                stats['cached'] += 1
+            else:
+                misses.append((index, path, self.generator.render_student_performance_html(student_data, self.generated_on)))
+
+        html_strings = [html for _, _, html in misses]
+        if pool is not None:
+            rendered = pool.map(_render_in_process, html_strings, chunksize=max(1, len(html_strings) // self.processes))
+        else:
+            rendered = (render_html_to_pdf(html, self.css_source) for html in html_strings)
+        for (index, path, _), pdf in zip(misses, rendered):
+            default_storage.save(path, ContentFile(pdf))
+            results[index] = pdf
+            stats['rendered'] += 1
+
+        stats['documents'] += len(chunk)
+        return zip((filename for filename, _ in chunk), results)
+
+
+def purge_pdf_cache(max_age_seconds: int) -> int:
+    """ Deletes cached PDFs older than `max_age_seconds`. Returns how many were removed. """
+    cutoff = timezone.now() - timedelta(seconds=max_age_seconds)
+    count = 0
+    try:
+        buckets, _ = default_storage.listdir(PDF_CACHE_DIR)
+    except FileNotFoundError:
+        return 0
+    for bucket in buckets:
+        _, names = default_storage.listdir(f"{PDF_CACHE_DIR}/{bucket}")
+        for name in names:
+            path = f"{PDF_CACHE_DIR}/{bucket}/{name}"
+            if default_storage.get_modified_time(path) < cutoff:
+                default_storage.delete(path)
+                count += 1
+    return count
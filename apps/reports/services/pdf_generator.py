@@ -4,16 +4,61 @@
 # KEEPS THE SYSTEM INTEGRATED: This service is updated to handle
 # a richer dictionary of real data, making the generated PDF reports
 # accurate and aligned with the actual system state.
+# PERFORMANCE: The report stylesheet is a separate file that is
+# parsed once per process (together with the font configuration)
+# and reused for every document, including by the bulk renderer's
+# pool processes.
 # =================================================================
 
+from functools import lru_cache
+
 from django.http import HttpResponse
-from django.template.loader import render_to_string
-from weasyprint import HTML
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+STUDENT_PERFORMANCE_TEMPLATE = 'reports/student_performance_template.html'
+STUDENT_PERFORMANCE_STYLESHEET = 'reports/student_performance.css'
+
+
+@lru_cache(maxsize=None)
+def template_source(template_name: str) -> str:
+    """ The raw source of a template file, read once per process. """
+    return get_template(template_name).template.source
+
+
+@lru_cache(maxsize=4)
+def shared_stylesheet(css_source: str):
+    """
+    Parses `css_source` once per process. Returns a (CSS, FontConfiguration)
+    pair to hand to every `write_pdf` call.
+    """
+    font_config = FontConfiguration()
+    return CSS(string=css_source, font_config=font_config), font_config
+
+
+def render_html_to_pdf(html_string: str, css_source: str) -> bytes:
+    """ Runs WeasyPrint on `html_string` with the shared, pre-parsed stylesheet. """
+    stylesheet, font_config = shared_stylesheet(css_source)
+    return HTML(string=html_string).write_pdf(stylesheets=[stylesheet], font_config=font_config)
 
 class PDFReportGenerator:
     """
     A service to generate PDF files from HTML templates.
     """
+    def render_student_performance_html(self, student_data: dict, generated_on=None) -> str:
+        # The generation date is data, not `{% now %}`, so cached PDFs can be keyed on it.
+        return render_to_string(STUDENT_PERFORMANCE_TEMPLATE, {
+            'student': student_data, 'generated_on': generated_on or timezone.localdate(),
+        })
+
+    def render_student_performance_pdf(self, student_data: dict) -> bytes:
+        """ Renders a single student's performance report and returns the PDF bytes. """
+        return render_html_to_pdf(
+            self.render_student_performance_html(student_data), template_source(STUDENT_PERFORMANCE_STYLESHEET)
+        )
+
     def generate_student_performance_pdf(self, student_data: dict) -> HttpResponse:
         """
         Generates a PDF report for a single student's performance.
@@ -24,12 +69,8 @@ class PDFReportGenerator:
         Returns:
             An HttpResponse object with the PDF file.
         """
-        html_string = render_to_string('reports/student_performance_template.html', {'student': student_data})
-        
-        # Create the PDF
-        html = HTML(string=html_string)
-        pdf = html.write_pdf()
-        
+        pdf = self.render_student_performance_pdf(student_data)
+
         # Create the HTTP response
         response = HttpResponse(pdf, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="student_report_{student_data.get("student_name", "user")}.pdf"'
@@ -0,0 +1,214 @@
+# =================================================================
+# apps/reports/tests.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Checks that report exports stream rows lazily through
+# the XLSX/CSV exporters, and covers the background report job queue
+# and the cached bulk PDF renderer.
+# =================================================================
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO
+
+import openpyxl
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db.models import F
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.contracts.models import Contract
+from apps.enrollment.models import Enrollment
+from apps.learning.models import Course
+from apps.reports.models import ReportJob
+from apps.reports.services.datasets import course_enrollment_data, course_performance_documents
+from apps.reports.services.excel_generator import ExcelReportGenerator
+from apps.reports.services.exporters import Sheet, get_exporter
+from apps.reports.services.jobs import ReportJobWorker, submit_report_job
+from apps.reports.services.pdf_batch import BulkPDFRenderer
+from apps.reports.views import ReportDashboardView, ReportJobStatusView
+from apps.users.models import CustomUser
+
+class StreamingExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='reporter', role=CustomUser.Roles.ADMIN)
+        cls.course = Course.objects.create(title="Exported", slug='exported', description="", category="Web")
+        course_content_type = ContentType.objects.get_for_model(Course)
+        for n in range(5):
+            student = CustomUser.objects.create_user(username=f'exported{n}', email=f'x{n}@example.com')
+            Enrollment.objects.create(
+                student=student, content_type=course_content_type, object_id=cls.course.pk, progress=n * 25
+            )
+
+    def test_csv_rows_are_produced_on_demand(self):
+        consumed = []
+
+        def rows():
+            for n in range(3):
+                consumed.append(n)
+                yield (n, f"row {n}")
+
+        response = get_exporter('csv').export('lazy', [Sheet("Rows", ["n", "label"], rows())])
+        self.assertEqual(consumed, [])
+        self.assertEqual(b''.join(response.streaming_content), b'n,label\r\n0,row 0\r\n1,row 1\r\n2,row 2\r\n')
+
+    def test_course_export_builders_stream_rows(self):
+        output = BytesIO()
+        generator = ExcelReportGenerator()
+        get_exporter('xlsx').write(generator.course_enrollment_sheets(self.course.title, course_enrollment_data(self.course)), output)
+        rows = list(openpyxl.load_workbook(output).active.values)
+        self.assertEqual(rows[0][0], "Student Name")
+        self.assertEqual([row[:2] for row in rows[1:3]], [('exported0', 'x0@example.com'), ('exported1', 'x1@example.com')])
+        self.assertEqual(rows[-1][3:], (100, 'In Progress'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReportJobTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisors = [
+            CustomUser.objects.create_user(username=f'supervisor{n}', role=CustomUser.Roles.SUPERVISOR)
+            for n in range(3)
+        ]
+        cls.course = Course.objects.create(title="Queued", slug='queued', description="", category="Web")
+        cls.student = CustomUser.objects.create_user(username='queued-student', email='q@example.com')
+        Enrollment.objects.create(
+            student=cls.student, content_type=ContentType.objects.get_for_model(Course), object_id=cls.course.pk
+        )
+        cls.outsider = CustomUser.objects.create_user(username='outsider')
+
+    def submit(self, user, **data):
+        self.client.force_authenticate(user)
+        payload = {'report_type': 'course_excel', 'course_id': self.course.pk, 'export_format': 'csv', **data}
+        return self.client.post(reverse('reports-api:report-job-list'), payload, format='json')
+
+    def test_identical_requests_share_one_job(self):
+        responses = [self.submit(supervisor) for supervisor in self.supervisors]
+        self.assertEqual({response.status_code for response in responses}, {202})
+        self.assertEqual(len({response.data['job_id'] for response in responses}), 1)
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+        self.assertEqual(self.submit(self.supervisors[0], export_format='xlsx').status_code, 202)
+        self.assertEqual(ReportJob.objects.count(), 2)
+
+    def test_worker_builds_and_serves_the_artifact(self):
+        job_id = self.submit(self.supervisors[0]).data['job_id']
+        self.assertEqual(ReportJobWorker(WORKERS=1).run_once(), {'succeeded': 1, 'failed': 0})
+
+        response = self.client.get(reverse('reports-api:report-job-detail', kwargs={'job_id': job_id}))
+        self.assertEqual(response.data['status'], 'succeeded')
+        download = self.client.get(response.data['download_url'])
+        self.assertEqual(b''.join(download.streaming_content).decode().splitlines()[1], 'queued-student,q@example.com,'
+                         + timezone.localdate().strftime("%Y-%m-%d") + ',0.0,In Progress')
+
+        # A finished report is reused for identical requests.
+        response = self.submit(self.supervisors[1])
+        self.assertEqual((response.status_code, response.data['job_id']), (200, job_id))
+
+    def test_a_round_claims_no_more_jobs_than_workers(self):
+        for export_format in ('csv', 'xlsx'):
+            submit_report_job('course_excel', {'course_id': self.course.pk, 'export_format': export_format})
+        submit_report_job('student_pdf', {'course_id': self.course.pk, 'student_id': self.student.pk})
+        self.assertEqual(len(ReportJobWorker(WORKERS=2, BATCH_SIZE=8).claim()), 2)
+        self.assertEqual(ReportJob.objects.filter(status=ReportJob.Status.QUEUED).count(), 1)
+
+    def test_a_reclaimed_job_is_not_overwritten(self):
+        submit_report_job('course_excel', {'course_id': self.course.pk, 'export_format': 'csv'})
+        worker = ReportJobWorker(WORKERS=1)
+        job, = worker.claim()
+        # The lease ran out mid-build and another worker claimed the job.
+        ReportJob.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1)
+
+        self.assertIsNone(worker.execute(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.artifact.name), (ReportJob.Status.RUNNING, 2, ''))
+
+    def test_failures_and_validation(self):
+        response = self.submit(self.supervisors[0], report_type='student_pdf', student_id=self.outsider.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.submit(self.outsider).status_code, 403)
+
+        job, _ = submit_report_job('student_pdf', {'course_id': self.course.pk, 'student_id': self.outsider.pk})
+        self.assertEqual(ReportJobWorker(WORKERS=1).run_once(), {'succeeded': 0, 'failed': 1})
+        job.refresh_from_db()
+        self.assertIn("is not enrolled", job.error)
+
+    def test_dashboard_queues_and_polls(self):
+        request = RequestFactory().post('/reports/', {'report_type': 'course_excel', 'course_id': self.course.pk})
+        request.user = self.supervisors[0]
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        response = ReportDashboardView.as_view()(request)
+        job = ReportJob.objects.get()
+        self.assertEqual(response.url, f"{reverse('reports:report_dashboard')}?job={job.job_id}")
+
+        ReportJobWorker(WORKERS=1).run_once()
+        request = RequestFactory().get('/status/', HTTP_HX_REQUEST='true')
+        request.user = self.supervisors[0]
+        request.htmx = True
+        response = ReportJobStatusView.as_view()(request, job_id=job.job_id)
+        self.assertEqual(response.status_code, 286)
+        self.assertEqual(response.context_data['job'], job)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BulkPDFReportTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = CustomUser.objects.create_user(username='bulk-supervisor', role=CustomUser.Roles.SUPERVISOR)
+        cls.course = Course.objects.create(title="Bulk", slug='bulk', description="", category="Web")
+        cls.students = [CustomUser.objects.create_user(username=f'bulk{n}', full_name="Same Name") for n in range(3)]
+        cls.enrollments = [
+            Enrollment.objects.create(
+                student=student, content_type=ContentType.objects.get_for_model(Course), object_id=cls.course.pk,
+                progress=n * 10,
+            )
+            for n, student in enumerate(cls.students)
+        ]
+        cls.contract = Contract.objects.create(
+            title="Bulk Corp", client=cls.supervisor,
+            start_date=timezone.now(), end_date=timezone.now() + timedelta(days=30),
+        )
+        cls.contract.enrolled_students.set(cls.students[:2])
+
+    def submit(self, **data):
+        self.client.force_authenticate(self.supervisor)
+        return self.client.post(reverse('reports-api:report-job-list'), {'report_type': 'bulk_pdf', **data}, format='json')
+
+    def download(self, job_id):
+        ReportJobWorker(WORKERS=1).run_once()
+        response = self.client.get(reverse('reports-api:report-job-detail', kwargs={'job_id': job_id}))
+        self.assertEqual(response.data['status'], 'succeeded')
+        download = self.client.get(response.data['download_url'])
+        return zipfile.ZipFile(BytesIO(b''.join(download.streaming_content)))
+
+    def test_course_and_contract_archives(self):
+        with self.settings(REPORT_JOBS={**settings.REPORT_JOBS, 'PDF_PROCESSES': 1}):
+            archive = self.download(self.submit(course_id=self.course.pk).data['job_id'])
+            self.assertEqual(archive.namelist(), [f"bulk/{student.pk}_same-name.pdf" for student in self.students])
+            self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+            archive = self.download(self.submit(contract_id=self.contract.pk).data['job_id'])
+            self.assertEqual(len(archive.namelist()), 2)
+
+        self.assertEqual(self.submit().status_code, 400)
+        self.assertEqual(self.submit(course_id=self.course.pk, contract_id=self.contract.pk).status_code, 400)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_unchanged_reports_come_from_the_cache(self):
+        renderer = BulkPDFRenderer(processes=1, chunk_size=2)
+        stats = renderer.write_zip(course_performance_documents(self.course), BytesIO())
+        self.assertEqual(stats, {'documents': 3, 'rendered': 3, 'cached': 0})
+
+        Enrollment.objects.filter(pk=self.enrollments[0].pk).update(progress=55)
+        stats = renderer.write_zip(course_performance_documents(self.course), BytesIO())
+        self.assertEqual(stats, {'documents': 3, 'rendered': 1, 'cached': 2})
+
+        # The generation date is printed on every report.
+        tomorrow = BulkPDFRenderer(processes=1, generated_on=renderer.generated_on + timedelta(days=1))
+        stats = tomorrow.write_zip(course_performance_documents(self.course), BytesIO())
+        self.assertEqual(stats, {'documents': 3, 'rendered': 3, 'cached': 0})
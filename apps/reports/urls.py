@@ -6,10 +6,11 @@
 # =================================================================
 
 from django.urls import path
-from .views import ReportDashboardView
+from .views import ReportDashboardView, ReportJobStatusView
 
 app_name = 'reports'
 
 urlpatterns = [
     path('', ReportDashboardView.as_view(), name='report_dashboard'),
+    path('jobs/<uuid:job_id>/status/', ReportJobStatusView.as_view(), name='job_status'),
 ]
\ No newline at end of file
@@ -4,19 +4,28 @@
 # MIGRATION: All data-fetching logic for report generation has
 # been updated to use the relational ORM, including queries that
 # utilize the GenericForeignKey on the Enrollment model.
+# PERFORMANCE: Reports are no longer rendered inside the request.
+# Posting the form queues a background `ReportJob` (identical
+# requests share one), and the page polls its status over HTMX.
 # =================================================================
 
+import json
+
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 
-from .services.pdf_generator import PDFReportGenerator
-from .services.excel_generator import ExcelReportGenerator
+from .api.serializers import ReportJobRequestSerializer
+from .models import ReportJob
+from .services.jobs import submit_report_job
 from apps.users.models import CustomUser
 from apps.learning.models import Course
-from apps.enrollment.models import Enrollment
+
+# HTMX stops polling when a response has this status code.
+HTMX_STOP_POLLING = 286
 
 class ReportDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
     template_name = "reports/report_dashboard.html"
@@ -29,61 +38,50 @@ class ReportDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView)
         context["title"] = "Reporting Dashboard"
         context["students"] = CustomUser.objects.filter(role=CustomUser.Roles.STUDENT)
         context["courses"] = Course.objects.all()
+        job_id = self.request.GET.get("job")
+        if job_id:
+            try:
+                context["job"] = ReportJob.objects.filter(job_id=job_id).first()
+            except ValidationError:
+                pass  # not a UUID
         return context
 
     def post(self, request, *args, **kwargs):
-        report_type = request.POST.get("report_type")
-        course_id = request.POST.get("course_id") # This name is used by both forms now
-
-        if not course_id:
-            messages.error(request, "Please select a course.")
+        # Reports are built by the `run_report_jobs` worker; the request only
+        # validates the parameters and queues (or joins) a job.
+        data = {
+            key: request.POST.get(key)
+            for key in ('report_type', 'course_id', 'student_id', 'export_format')
+            if request.POST.get(key)
+        }
+        serializer = ReportJobRequestSerializer(data=data)
+        if not serializer.is_valid():
+            for errors in serializer.errors.values():
+                messages.error(request, " ".join(str(error) for error in errors))
             return redirect('reports:report_dashboard')
-        
-        course = get_object_or_404(Course, pk=course_id)
-        course_content_type = ContentType.objects.get_for_model(Course)
-
-        if report_type == "student_pdf":
-            student_id = request.POST.get("student_id")
-            if not student_id:
-                messages.error(request, "Please select a student for the PDF report.")
-                return redirect('reports:report_dashboard')
 
-            student = get_object_or_404(CustomUser, id=student_id)
-            enrollment = Enrollment.objects.filter(
-                student=student, content_type=course_content_type, object_id=course.pk
-            ).first()
+        job, created = submit_report_job(serializer.validated_data['report_type'], serializer.job_params, request.user)
+        if created:
+            messages.info(request, "Your report is being generated. It will be ready to download shortly.")
+        return redirect(f"{reverse('reports:report_dashboard')}?job={job.job_id}")
 
-            if not enrollment:
-                messages.warning(request, f"{student} is not enrolled in '{course.title}'.")
-                return redirect('reports:report_dashboard')
 
-            student_data = {
-                "student_name": student.full_name or student.username,
-                "course_title": course.title,
-                "enrollment_date": enrollment.enrollment_date.strftime("%Y-%m-%d"),
-                "progress": enrollment.progress,
-                "status": enrollment.get_status_display(),
-            }
-            generator = PDFReportGenerator()
-            return generator.generate_student_performance_pdf(student_data)
+class ReportJobStatusView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    HTMX fragment showing the state of a report job. The fragment polls
+    itself until the job finishes, then answers with status 286 so HTMX
+    stops polling, and raises a toast.
+    """
+    template_name = "reports/partials/_job_status.html"
 
-        elif report_type == "course_excel":
-            enrollments = Enrollment.objects.filter(
-                content_type=course_content_type, object_id=course.pk
-            ).select_related('student')
-
-            enrollments_data = [
-                {
-                    'student_name': enr.student.full_name or enr.student.username,
-                    'student_email': enr.student.email,
-                    'enrollment_date': enr.enrollment_date.strftime("%Y-%m-%d"),
-                    'progress': enr.progress,
-                    'status': enr.get_status_display(),
-                }
-                for enr in enrollments
-            ]
-            generator = ExcelReportGenerator()
-            return generator.generate_course_enrollment_excel(course.title, enrollments_data)
+    def test_func(self):
+        return self.request.user.role in [CustomUser.Roles.ADMIN, CustomUser.Roles.SUPERVISOR]
 
-        messages.error(request, "Invalid report type selected.")
-        return redirect('reports:report_dashboard')
\ No newline at end of file
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(ReportJob, job_id=kwargs['job_id'])
+        response = self.render_to_response({'job': job})
+        if job.is_finished and request.htmx:
+            response.status_code = HTMX_STOP_POLLING
+            message = "Your report is ready." if job.status == ReportJob.Status.SUCCEEDED else "Your report failed."
+            response['HX-Trigger'] = json.dumps({'showToast': {'message': message}})
+        return response
@@ -20,4 +20,11 @@ class IsInstructorRole(BasePermission):
     Allows access only to users with the 'instructor' role.
     """
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.role == 'instructor')
\ No newline at end of file
+        return bool(request.user and request.user.is_authenticated and request.user.role == 'instructor')
+
+class IsAdminOrSupervisorRole(BasePermission):
+    """
+    Allows access only to users with the 'admin' or 'supervisor' role.
+    """
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role in ('admin', 'supervisor'))
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from apps.users.models import CustomUser
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the CustomUser model.
     Used for listing, retrieving, and creating/updating users via the API.
@@ -9,9 +9,11 @@ class UserViewSet(viewsets.ModelViewSet):
     API endpoint that allows users to be viewed or edited.
     Access is restricted to Admin users only.
     """
-    queryset = CustomUser.objects.all().order_by('-date_joined')
+    queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminRole] # Only Admins can manage users
+    # Newest first; ids follow date_joined and are indexed.
+    keyset_ordering = ('-pk',)
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
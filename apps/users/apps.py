@@ -1,5 +1,22 @@
+# =================================================================
+# apps/users/apps.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Creates the PostgreSQL trigram index behind the user
+# search after `migrate` (see apps/users/search.py).
+# =================================================================
+
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def create_search_index(sender, using, **kwargs):
+    from .search import ensure_search_index
+    ensure_search_index(using)
+
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.users'
\ No newline at end of file
+    name = 'apps.users'
+
+    def ready(self):
+        post_migrate.connect(create_search_index, sender=self)
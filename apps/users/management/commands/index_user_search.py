@@ -0,0 +1,26 @@
+# =================================================================
+# apps/users/management/commands/index_user_search.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Fills `CustomUser.search_text` for every user in one
+# UPDATE and makes sure the PostgreSQL trigram index over it exists.
+# Users get their search text on save, so this backfills existing
+# users once and repairs rows written by bulk operations.
+# =================================================================
+
+from django.core.management.base import BaseCommand
+from django.db.models import Value
+from django.db.models.functions import Concat, Lower
+
+from apps.users.models import CustomUser
+from apps.users.search import ensure_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the user search text and its trigram index."
+
+    def handle(self, *args, **options):
+        updated = CustomUser.objects.update(
+            search_text=Lower(Concat('username', Value(' '), 'full_name', Value(' '), 'email'))
+        )
+        ensure_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {updated} user(s) for search."))
@@ -4,6 +4,11 @@
 # MIGRATION: This model is already mostly compatible. No significant
 # changes were needed for PostgreSQL. The primary key is now
 # managed by Django's default AutoField.
+# PERFORMANCE: `search_text` holds the lower-cased username, full
+# name and email that the user management search matches against.
+# On PostgreSQL it carries a trigram index (see apps/users/search.py),
+# and the list's (full_name, id) ordering is indexed, with and
+# without a leading role.
 # =================================================================
 
 from django.contrib.auth.models import AbstractUser
@@ -33,12 +38,27 @@ class CustomUser(AbstractUser):
         null=True,
         help_text="URL for the user's profile picture."
     )
+    # Maintained by save(); see `build_search_text`.
+    search_text = models.TextField(blank=True, default='', editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['full_name', 'id']),
+            models.Index(fields=['role', 'full_name', 'id']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.full_name and (self.first_name or self.last_name):
             self.full_name = f"{self.first_name} {self.last_name}".strip()
+        self.search_text = self.build_search_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'username', 'full_name', 'email'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
         super().save(*args, **kwargs)
 
+    def build_search_text(self):
+        return f"{self.username} {self.full_name} {self.email or ''}".lower()
+
     def __str__(self):
         # If full_name is available, use it for a more human-readable representation.
         return self.full_name or self.username
\ No newline at end of file
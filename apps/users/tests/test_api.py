@@ -1,6 +1,9 @@
+from unittest import mock
+
 from rest_framework.test import APITestCase
 from django.urls import reverse
 from rest_framework import status
+from apps.core.pagination import KeysetPagination, encode_cursor
 from apps.users.models import CustomUser
 
 class UserAPITest(APITestCase):
@@ -21,4 +24,50 @@ class UserAPITest(APITestCase):
         """
         url = reverse('user-list') # Assumes the URL name is 'user-list'
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class UserAPIPaginationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = CustomUser.objects.create_user(username='pageadmin', role=CustomUser.Roles.ADMIN)
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'user{n}', email=f'user{n}@example.com') for n in range(6)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin_user)
+
+    def test_pages_follow_next_links_newest_first(self):
+        url, ids = reverse('user-list') + '?page_size=3', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, list(CustomUser.objects.order_by('-pk').values_list('pk', flat=True)))
+
+    def test_page_size_is_capped(self):
+        with self.settings(REST_FRAMEWORK={'PAGE_SIZE': 2}):
+            self.assertEqual(len(self.client.get(reverse('user-list')).data['results']), 2)
+        with mock.patch.object(KeysetPagination, 'max_page_size', 4):
+            response = self.client.get(reverse('user-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse('user-list'), {'fields': 'id,username'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username'})
+
+        response = self.client.get(reverse('user-list'), {'fields': 'id,salary'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('user-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        for values in (["x"], [True], [2 ** 70]):
+            with self.subTest(values=values):
+                response = self.client.get(reverse('user-list'), {'cursor': encode_cursor(values)})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
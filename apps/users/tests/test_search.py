@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.users.models import CustomUser
+from apps.users.search import search_users
+
+class UserSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='root', full_name="Site Admin", role=CustomUser.Roles.ADMIN)
+        cls.ada = CustomUser.objects.create_user(
+            username='alovelace', full_name="Ada Lovelace", email='ada@engine.org', role=CustomUser.Roles.INSTRUCTOR
+        )
+        cls.alan = CustomUser.objects.create_user(username='aturing', full_name="Alan Turing", email='alan@bletchley.uk')
+        cls.grace = CustomUser.objects.create_user(username='ghopper', first_name="Grace", last_name="Hopper")
+
+    def names(self, page):
+        return [user.username for user in page['results']]
+
+    def test_search_text_is_maintained_on_save(self):
+        self.assertEqual(self.grace.search_text, 'ghopper grace hopper ')
+        self.grace.full_name = "Rear Admiral Hopper"
+        self.grace.save(update_fields=['full_name'])
+        self.grace.refresh_from_db()
+        self.assertIn('rear admiral', self.grace.search_text)
+
+    def test_every_term_must_match_any_field(self):
+        self.assertEqual(self.names(search_users("LOVELACE")), ['alovelace'])
+        self.assertEqual(self.names(search_users("bletchley alan")), ['aturing'])
+        self.assertEqual(self.names(search_users("ada turing")), [])
+        # Terms too short for the trigram index still filter.
+        self.assertEqual(self.names(search_users("ur")), ['aturing'])
+        self.assertEqual(self.names(search_users("Ad lo")), ['alovelace'])
+
+    def test_role_filter_and_pages_in_name_order(self):
+        self.assertEqual(self.names(search_users(role=CustomUser.Roles.INSTRUCTOR)), ['alovelace'])
+
+        first = search_users(page_size=3)
+        self.assertEqual(self.names(first), ['alovelace', 'aturing', 'ghopper'])
+        rest = search_users(cursor=first['next_cursor'], page_size=3)
+        self.assertEqual((self.names(rest), rest['next_cursor']), (['root'], None))
+
+    def test_backfill_command(self):
+        CustomUser.objects.update(search_text='')
+        call_command('index_user_search', stdout=StringIO())
+        self.assertEqual(self.names(search_users("engine")), ['alovelace'])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('users:user_list'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
@@ -5,16 +5,20 @@
 # to support a full Single-Page Application (SPA) experience for
 # user management using HTMX. It now handles requests for modals
 # and partial updates, eliminating page reloads entirely.
+# PERFORMANCE: The user list is searched through an index (see
+# search.py) and served a page at a time; scrolling to the end of the
+# table fetches only the next page's rows.
 # =================================================================
 
 from django.views.generic import TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
 
 from .models import CustomUser
 from .forms import CustomUserCreationForm, CustomUserChangeForm
+from .search import search_users
+from apps.core.pagination import InvalidCursor
 
 class UserManagementView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
     """
@@ -26,29 +30,37 @@ class UserManagementView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
     def test_func(self):
         return self.request.user.role == CustomUser.Roles.ADMIN
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['roles'] = CustomUser.Roles.choices
+        return context
+
 class UserListView(LoginRequiredMixin, UserPassesTestMixin, View):
     """
     Handles rendering the list of users. Responds to initial loads
-    and HTMX-powered search/filter requests by returning just the list partial.
+    and HTMX-powered search/filter requests by returning just the list partial,
+    and to infinite-scroll requests (with a `cursor`) with just the next rows.
     """
     def test_func(self):
         return self.request.user.role == CustomUser.Roles.ADMIN
 
     def get(self, request, *args, **kwargs):
-        search_query = request.GET.get('q', '')
-        users = CustomUser.objects.all().order_by('full_name')
-        if search_query:
-            users = users.filter(
-                Q(username__icontains=search_query) |
-                Q(full_name__icontains=search_query) |
-                Q(email__icontains=search_query)
-            )
+        search_query = request.GET.get('q', '').strip()
+        role = request.GET.get('role', '')
+        cursor = request.GET.get('cursor')
+        try:
+            page = search_users(search_query, role, cursor)
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
         context = {
-            'users': users,
+            'users': page['results'],
+            'next_cursor': page['next_cursor'],
             'search_query': search_query,
-            'is_search': bool(search_query)
+            'role': role,
+            'is_search': bool(search_query or role)
         }
-        return render(request, 'partials/_user_list.html', context)
+        template = 'partials/_user_rows.html' if cursor else 'partials/_user_list.html'
+        return render(request, template, context)
 
 class UserFormView(LoginRequiredMixin, UserPassesTestMixin, View):
     """
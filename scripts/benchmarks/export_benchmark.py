@@ -0,0 +1,120 @@
+# =================================================================
+# scripts/benchmarks/export_benchmark.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Measures throughput (rows/sec) and peak RSS of the
+# streaming report exporters against the previous in-memory
+# workbook path. Every run happens in a fresh subprocess so peak RSS
+# is not inherited from an earlier, larger run.
+#
+#   python scripts/benchmarks/export_benchmark.py
+#   python scripts/benchmarks/export_benchmark.py --rows 10000 100000 1000000 --formats csv xlsx
+# =================================================================
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEADERS = ["Student Name", "Email", "Enrollment Date", "Progress (%)", "Status"]
+
+
+def synthetic_rows(count):
+    """ Yields enrollment-shaped rows without touching the database. """
+    start = datetime(2025, 1, 1)
+    for n in range(count):
+        yield (
+            f"Student {n}",
+            f"student{n}@example.com",
+            (start + timedelta(minutes=n)).strftime("%Y-%m-%d"),
+            round((n * 7) % 10000 / 100, 2),
+            'Completed' if n % 5 == 0 else 'In Progress',
+        )
+
+
+def run_streaming(export_format, count):
+    from apps.reports.services.exporters import Sheet, get_exporter
+
+    response = get_exporter(export_format).export('benchmark', [Sheet("Enrollments", HEADERS, synthetic_rows(count))])
+    size = 0
+    for chunk in response.streaming_content:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def run_legacy(count):
+    """ The previous path: a list of dicts and a fully built in-memory workbook. """
+    from io import BytesIO
+
+    import openpyxl
+
+    data = [dict(zip(HEADERS, row)) for row in synthetic_rows(count)]
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(HEADERS)
+    for item in data:
+        sheet.append([item[header] for header in HEADERS])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return len(buffer.getvalue())
+
+
+def child(export_format, count):
+    sys.path.insert(0, ROOT)
+    # The exporters only need HTTP response settings, not the database.
+    from django.conf import settings
+    settings.configure()
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    size = run_legacy(count) if export_format == 'legacy-xlsx' else run_streaming(export_format, count)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'format': export_format,
+        'rows': count,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(count / elapsed) if elapsed else None,
+        'peak_rss_mb': round(peak_kb / 1024, 1),
+        'rss_growth_mb': round((peak_kb - baseline_kb) / 1024, 1),
+        'output_mb': round(size / 1024 / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming report exporters.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--formats', nargs='+', default=['csv', 'xlsx', 'legacy-xlsx'],
+                        choices=['csv', 'xlsx', 'legacy-xlsx'])
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000,
+                        help="Skip the in-memory baseline above this size (it needs several GB at 1M rows).")
+    parser.add_argument('--child', nargs=2, metavar=('FORMAT', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{'format':<12} {'rows':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS MB':>12} {'RSS growth MB':>14} {'output MB':>10}")
+    for count in args.rows:
+        for export_format in args.formats:
+            if export_format == 'legacy-xlsx' and count > args.legacy_max_rows:
+                continue
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', export_format, str(count)],
+                check=True, capture_output=True, text=True, cwd=ROOT,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{result['format']:<12} {result['rows']:>10} {result['seconds']:>9} {result['rows_per_second']:>10} "
+                f"{result['peak_rss_mb']:>12} {result['rss_growth_mb']:>14} {result['output_mb']:>10}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# =================================================================
+# scripts/benchmarks/pdf_benchmark.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Measures bulk student performance PDF throughput
+# (PDFs/sec and PDFs/sec per process) for several pool sizes, with a
+# cold and a warm artifact cache, against the previous path that
+# parsed the stylesheet again for every document. Needs WeasyPrint
+# and its system libraries (pango).
+#
+#   python scripts/benchmarks/pdf_benchmark.py
+#   python scripts/benchmarks/pdf_benchmark.py --documents 500 --processes 1 2 4 8
+# =================================================================
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_documents(count):
+    """ Yields (filename, student_data) pairs without touching the database. """
+    for n in range(count):
+        yield f"benchmark/{n}.pdf", {
+            "student_name": f"Student {n}",
+            "course_title": "Benchmark Course",
+            "enrollment_date": "2025-01-01",
+            "progress": round((n * 7) % 10000 / 100, 2),
+            "status": 'Completed' if n % 5 == 0 else 'In Progress',
+        }
+
+
+def run_legacy(count):
+    """ The previous path: the stylesheet and fonts parsed again for every PDF. """
+    from django.template.loader import render_to_string
+    from weasyprint import CSS, HTML
+
+    from apps.reports.services.pdf_generator import (
+        STUDENT_PERFORMANCE_STYLESHEET, STUDENT_PERFORMANCE_TEMPLATE, template_source,
+    )
+
+    css_source = template_source(STUDENT_PERFORMANCE_STYLESHEET)
+    for _, student_data in synthetic_documents(count):
+        html_string = render_to_string(STUDENT_PERFORMANCE_TEMPLATE, {'student': student_data})
+        HTML(string=html_string).write_pdf(stylesheets=[CSS(string=css_source)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk PDF renderer.")
+    parser.add_argument('--documents', type=int, default=200)
+    parser.add_argument('--processes', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    # Only the template engine and a scratch storage are needed.
+    from django.conf import settings
+    settings.configure(
+        MEDIA_ROOT=tempfile.mkdtemp(),
+        TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [os.path.join(ROOT, 'templates')]}],
+    )
+    import django
+    django.setup()
+
+    from django.test.utils import override_settings
+
+    from apps.reports.services.pdf_batch import BulkPDFRenderer
+
+    print(f"{'case':<16} {'processes':>9} {'documents':>9} {'seconds':>9} {'PDFs/s':>8} {'PDFs/s/proc':>12}")
+
+    def report(case, processes, elapsed):
+        rate = args.documents / elapsed if elapsed else 0
+        print(f"{case:<16} {processes:>9} {args.documents:>9} {elapsed:>9.2f} {rate:>8.1f} {rate / processes:>12.1f}")
+
+    started = time.perf_counter()
+    run_legacy(args.documents)
+    report('legacy', 1, time.perf_counter() - started)
+
+    for processes in args.processes:
+        # An empty cache per pool size, so every "cold" run renders everything.
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            renderer = BulkPDFRenderer(processes=processes)
+            for case in ('cold cache', 'warm cache'):
+                started = time.perf_counter()
+                renderer.write_zip(synthetic_documents(args.documents), BytesIO())
+                report(case, processes, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
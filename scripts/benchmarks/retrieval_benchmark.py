@@ -0,0 +1,115 @@
+# =================================================================
+# scripts/benchmarks/retrieval_benchmark.py
+# -----------------------------------------------------------------
+# PERFORMANCE: Measures the AI assistant's lesson retrieval index
+# for several course sizes: chunking and term counting per lesson
+# (the work done when a lesson is saved), `get_course_index` on a
+# cold process (reading the stored chunks and building the index),
+# the pickled size of the index, and the latency percentiles of
+# `get_course_index(course).search(...)` once the index is built,
+# which is what every assistant question pays. Chunks are stored in
+# an in-memory SQLite database.
+#
+#   python scripts/benchmarks/retrieval_benchmark.py
+#   python scripts/benchmarks/retrieval_benchmark.py --lessons 10 100 1000 --words 800 --queries 500
+# =================================================================
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_lessons(count, words, seed=42):
+    """ Yields lesson texts over a Zipf-like vocabulary, without touching the database. """
+    rng = random.Random(seed)
+    vocabulary = [f"term{n}" for n in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for _ in range(count):
+        yield ' '.join(rng.choices(vocabulary, weights=weights, k=words))
+
+
+def percentile_ms(sorted_seconds, q):
+    index = min(int(q * len(sorted_seconds)), len(sorted_seconds) - 1)
+    return round(sorted_seconds[index] * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lesson retrieval index.")
+    parser.add_argument('--lessons', type=int, nargs='+', default=[10, 100, 500, 2000])
+    parser.add_argument('--words', type=int, default=800, help="Words per lesson.")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--token-budget', type=int, default=1500)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from django.conf import settings
+    from academy_suite import settings as project_settings
+    settings.configure(
+        INSTALLED_APPS=project_settings.INSTALLED_APPS,
+        AUTH_USER_MODEL=project_settings.AUTH_USER_MODEL,
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        SECRET_KEY='benchmark',
+    )
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+
+    from apps.learning.models import Course, Lesson, LessonChunk
+    from apps.learning.retrieval import chunk_text, clear_course_indexes, estimate_tokens, get_course_index, tokenize
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    print(f"{'lessons':>8} {'chunks':>8} {'chunk ms/lesson':>16} {'build ms':>9} {'index MB':>9} "
+          f"{'query p50 ms':>13} {'query p95 ms':>13}")
+    rng = random.Random(7)
+    for count in args.lessons:
+        # Lessons go in with bulk_create so the lesson signals stay out of
+        # the measurement; the chunking they would do is timed here.
+        course = Course.objects.create(title=f"Benchmark {count}", slug=f'benchmark-{count}', description="", category="Bench")
+        lessons = Lesson.objects.bulk_create(
+            Lesson(course=course, title=f"Lesson {i}", order=i, content_type='text_editor') for i in range(1, count + 1)
+        )
+        started = time.perf_counter()
+        chunks = []
+        for lesson, text in zip(lessons, synthetic_lessons(count, args.words)):
+            for position, chunk in enumerate(chunk_text(text)):
+                chunks.append(LessonChunk(
+                    lesson=lesson,
+                    course=course,
+                    position=position,
+                    text=chunk,
+                    token_estimate=estimate_tokens(chunk),
+                    term_counts=dict(Counter(tokenize(chunk))),
+                ))
+        chunk_ms = (time.perf_counter() - started) * 1000 / count
+        LessonChunk.objects.bulk_create(chunks, batch_size=500)
+
+        clear_course_indexes()
+        started = time.perf_counter()
+        index = get_course_index(course)
+        build_ms = (time.perf_counter() - started) * 1000
+        size_mb = len(pickle.dumps(index)) / 1024 / 1024
+
+        terms = list(index.postings)
+        latencies = []
+        for _ in range(args.queries):
+            query = ' '.join(rng.choices(terms, k=5))
+            started = time.perf_counter()
+            get_course_index(course).search(query, args.top_k, args.token_budget)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+
+        print(f"{count:>8} {len(index):>8} {chunk_ms:>16.2f} {build_ms:>9.1f} {size_mb:>9.1f} "
+              f"{percentile_ms(latencies, 0.5):>13} {percentile_ms(latencies, 0.95):>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@
 // KEEPS THE SYSTEM INTEGRATED: This file is updated with crucial
 // JavaScript logic to manage modal interactions for the SPA-like
 // user management page, ensuring a smooth and professional UX.
+// PERFORMANCE: The AI chat form reads the assistant's answer as a
+// server-sent event stream and renders it token by token.
 // =================================================================
 
 document.addEventListener("DOMContentLoaded", function() {
@@ -26,6 +28,66 @@ document.addEventListener("DOMContentLoaded", function() {
         });
     }
     
+    // --- Streamed AI Assistant Answers ---
+    // The chat form is loaded by HTMX, so the submit handler is delegated.
+    document.body.addEventListener('submit', async function(event) {
+        const form = event.target;
+        if (form.id !== 'ai-chat-form') {
+            return;
+        }
+        event.preventDefault();
+        const chatBody = document.getElementById('ai-chat-body');
+        const indicator = document.getElementById('ai-typing-indicator');
+        const questionInput = form.querySelector('input[name="question"]');
+
+        const userBubble = document.createElement('div');
+        userBubble.className = 'user-bubble';
+        userBubble.textContent = questionInput.value;
+        const answerRow = document.createElement('div');
+        answerRow.className = 'd-flex align-items-start gap-3';
+        answerRow.innerHTML = '<div class="ai-avatar"><i class="bi bi-robot"></i></div><div class="ai-bubble"></div>';
+        const answerBubble = answerRow.querySelector('.ai-bubble');
+        chatBody.append(userBubble, answerRow);
+
+        const body = new FormData(form);
+        questionInput.value = '';
+        indicator.classList.add('htmx-request');
+        try {
+            const response = await fetch(form.dataset.streamUrl, {
+                method: 'POST',
+                body: body,
+                headers: { 'X-CSRFToken': body.get('csrfmiddlewaretoken') },
+            });
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += value;
+                // Events are separated by a blank line: "event: <name>\ndata: <json>".
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                for (const raw of events) {
+                    const name = raw.match(/^event: (.*)$/m)[1];
+                    const data = JSON.parse(raw.match(/^data: (.*)$/m)[1]);
+                    if (name === 'token' || name === 'error') {
+                        answerBubble.textContent += data;
+                    }
+                }
+                chatBody.scrollTop = chatBody.scrollHeight;
+            }
+        } catch (error) {
+            answerBubble.textContent = 'Sorry, I encountered an error while processing your request. Please try again later.';
+        } finally {
+            indicator.classList.remove('htmx-request');
+        }
+    });
+
     // --- Logic for User Management Modals ---
     const userFormModalEl = document.getElementById('user-form-modal');
     if (userFormModalEl) {